@@ -0,0 +1,150 @@
+# Archiwum rekrutacji: zamknięte przed horyzontem przenoszone są do rekrutacje_archiwum
+#
+# Codzienny ruch (otwarte rekrutacje, ostatnie miesiące, zapisy) czyta tylko tabelę
+# rekrutacje, która nie rośnie z historią. Zapytania, których zakres dat sięga
+# archiwum, czytają obie tabele przez UNION ALL (ze_wszystkich), a zapis rekrutacji
+# z archiwum najpierw przenosi ją z powrotem (przywroc). Archiwizacja nie zmienia
+# danych - agregaty, indeks wyszukiwania i dziennik zmian obejmują obie tabele.
+import argparse
+import os
+from datetime import date, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import delete, func, insert, or_, select, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.util import ClauseAdapter
+
+from backend.database import Rekrutacja, RekrutacjaArchiwalna, SessionLocal, init_db, jako_date
+
+ARCHIWUM_PO_DNIACH = int(os.getenv("ARCHIWUM_PO_DNIACH", "730"))
+ROZMIAR_PARTII = 5000
+
+_biezace = Rekrutacja.__table__
+_archiwum = RekrutacjaArchiwalna.__table__
+_KOLUMNY = list(_biezace.columns.keys())
+
+_wszystkie = union_all(select(_biezace), select(_archiwum)).subquery("rekrutacje_wszystkie")
+# Podmiana tabeli rekrutacje na UNION ALL obu tabel (kolumny podzapytania wskazują na rekrutacje)
+_na_wszystkie = ClauseAdapter(_wszystkie)
+# Podmiana kolumn rekrutacje na kolumny archiwum o tych samych nazwach (pozostałe tabele bez zmian)
+_na_archiwum = ClauseAdapter(
+    _archiwum, adapt_on_names=True, include_fn=lambda kolumna: getattr(kolumna, "table", None) is _biezace
+)
+
+
+def horyzont(dni: int = ARCHIWUM_PO_DNIACH) -> date:
+    """Domyślna granica archiwizacji: rekrutacje zamknięte przed tą datą trafiają do archiwum"""
+    return date.today() - timedelta(days=dni)
+
+
+def _jako_wyrazenie(obiekt):
+    # Atrybut ORM (Rekrutacja.departament) nie jest wyrażeniem SQL - traverse zwróciłby go bez zmian
+    return obiekt.__clause_element__() if hasattr(obiekt, "__clause_element__") else obiekt
+
+
+def ze_wszystkich(wyrazenie):
+    """Wyrażenie lub zapytanie na tabeli rekrutacje przeniesione na rekrutacje + archiwum"""
+    return _na_wszystkie.traverse(_jako_wyrazenie(wyrazenie))
+
+
+def z_archiwum(wyrazenie):
+    """Wyrażenie lub zapytanie na tabeli rekrutacje przeniesione na tabelę archiwum"""
+    return _na_archiwum.traverse(_jako_wyrazenie(wyrazenie))
+
+
+def granica_archiwum(db: Session) -> Optional[date]:
+    """Najpóźniejsza data otwarcia w archiwum (odczyt z indeksu); None, gdy archiwum jest puste"""
+    return db.execute(select(func.max(_archiwum.c.data_otwarcia))).scalar()
+
+
+def siega_archiwum(db: Session, data_od=None, status: Optional[str] = None) -> bool:
+    """Czy zapytanie o rekrutacje otwarte od data_od (i w danym statusie) może trafić w archiwum"""
+    if status == "otwarta":
+        return False  # w archiwum są tylko zamknięte rekrutacje
+    granica = granica_archiwum(db)
+    return granica is not None and (not data_od or jako_date(data_od) <= granica)
+
+
+def zajete_w_archiwum(db: Session, id_referencyjne) -> dict:
+    """ID referencyjne z archiwum spośród podanych -> id rekrutacji"""
+    if not id_referencyjne:
+        return {}
+    return dict(db.execute(
+        select(_archiwum.c.id_referencyjne, _archiwum.c.id)
+        .where(_archiwum.c.id_referencyjne.in_(list(id_referencyjne)))
+    ).all())
+
+
+def _przenies(db: Session, z, do, ids: list, *warunki) -> int:
+    """Przenosi wiersze o podanych id spełniające warunki; zwraca liczbę przeniesionych"""
+    warunki = (z.c.id.in_(ids), *warunki)
+    db.execute(insert(do).from_select(_KOLUMNY, select(*[z.c[k] for k in _KOLUMNY]).where(*warunki)))
+    return db.execute(delete(z).where(*warunki)).rowcount
+
+
+def przywroc(db: Session, ids=(), id_referencyjne=()) -> int:
+    """
+    Przenosi wskazane rekrutacje z archiwum do tabeli rekrutacje (bez commit).
+    Wywoływane przed zmianą lub usunięciem - zapisy dotyczą tylko tabeli rekrutacje.
+    """
+    warunki = []
+    if ids:
+        warunki.append(_archiwum.c.id.in_(list(ids)))
+    if id_referencyjne:
+        warunki.append(_archiwum.c.id_referencyjne.in_(list(id_referencyjne)))
+    if not warunki:
+        return 0
+    # FOR UPDATE - równoległe przywrócenie tej samej rekrutacji czeka i nie znajduje jej już w archiwum
+    znalezione = list(db.scalars(select(_archiwum.c.id).where(or_(*warunki)).with_for_update()))
+    if znalezione:
+        _przenies(db, _archiwum, _biezace, znalezione)
+    return len(znalezione)
+
+
+def archiwizuj(db: Session, przed: date, postep: Optional[Callable[[dict], None]] = None) -> int:
+    """Przenosi do archiwum rekrutacje zamknięte przed datą; commit po każdej partii"""
+    # Rekrutacja o najwyższym id zostaje - SQLite bez AUTOINCREMENT (bazy sprzed archiwum)
+    # nadaje nowe id jako max(id) + 1 i mógłby powtórzyć id z archiwum
+    najnowsza = db.execute(select(func.max(_biezace.c.id))).scalar()
+    przeniesione = 0
+    zamknieta = _biezace.c.data_zamkniecia < przed
+    while True:
+        # FOR UPDATE: rekrutacja nie zostanie ponownie otwarta między wyborem partii a przeniesieniem
+        # (SKIP LOCKED - wiersze zmieniane właśnie przez API poczekają na następne uruchomienie).
+        # SQLite pomija FOR UPDATE, a odczyt partii jest tam poza transakcją zapisu,
+        # więc przeniesienie jeszcze raz sprawdza datę zamknięcia.
+        ids = list(db.scalars(
+            select(_biezace.c.id)
+            .where(zamknieta, _biezace.c.id != najnowsza)
+            .order_by(_biezace.c.id)
+            .limit(ROZMIAR_PARTII)
+            .with_for_update(skip_locked=True)
+        ))
+        if not ids:
+            return przeniesione
+        przeniesione += _przenies(db, _biezace, _archiwum, ids, zamknieta)
+        db.commit()
+        if postep:
+            postep({"przeniesione": przeniesione})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archiwizacja zamkniętych rekrutacji")
+    parser.add_argument("polecenie", choices=["archiwizuj"], help="archiwizuj - przenosi zamknięte przed horyzontem")
+    parser.add_argument(
+        "--przed", type=date.fromisoformat, default=None,
+        help=f"Data zamknięcia YYYY-MM-DD (domyślnie dziś - {ARCHIWUM_PO_DNIACH} dni)",
+    )
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        przed = args.przed or horyzont()
+        print(f"✓ Przeniesiono do archiwum: {archiwizuj(db, przed)} rekrutacji zamkniętych przed {przed}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
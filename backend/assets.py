@@ -0,0 +1,170 @@
+# Serwowanie frontendu: nazwy plików z hashem treści, warianty gzip/brotli przygotowane
+# przy starcie i nagłówki cache (immutable dla plików z hashem, ETag/Last-Modified i 304)
+#
+# Strony HTML odwołują się do /static/<nazwa>.<hash>.<rozszerzenie>, więc przeglądarka
+# trzyma JS/CSS bezterminowo, a po zmianie pliku dostaje nowy adres. Same strony
+# mają Cache-Control: no-cache - każde wejście to tanie 304, dopóki HTML się nie zmieni.
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable, Optional
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:  # brotli jest opcjonalny - bez niego tylko gzip
+    brotli = None
+
+CACHE_NIEZMIENNY = "public, max-age=31536000, immutable"
+CACHE_REWALIDACJA = "no-cache"
+ROZSZERZENIA_STRON = (".html",)
+_ODNOSNIK = re.compile(r"/static/([\w./-]+)")
+_KODOWANIA = ("br", "gzip")  # w kolejności preferencji
+
+
+class Zasob:
+    """Treść pliku z wariantami skompresowanymi i nagłówkami walidacji cache"""
+
+    def __init__(self, tresc: bytes, typ: str, zmieniono: float, cache_control: str):
+        self.typ = typ
+        self.cache_control = cache_control
+        self.hash = hashlib.sha256(tresc).hexdigest()[:12]
+        self.ostatnia_zmiana = formatdate(zmieniono, usegmt=True)
+        self.zmieniono = int(zmieniono)
+        self.warianty = {"identity": tresc}
+        skompresowane = {"gzip": gzip.compress(tresc, 9, mtime=0)}
+        if brotli is not None:
+            skompresowane["br"] = brotli.compress(tresc, quality=11)
+        for kodowanie, dane in skompresowane.items():
+            if len(dane) < len(tresc):
+                self.warianty[kodowanie] = dane
+
+    def etag(self, kodowanie: str) -> str:
+        # Inny ETag dla każdego kodowania - to różne reprezentacje tej samej treści
+        return f'"{self.hash}"' if kodowanie == "identity" else f'"{self.hash}-{kodowanie}"'
+
+    def aktualny(self, naglowki: Headers) -> bool:
+        """Czy kopia w cache klienta jest aktualna (If-None-Match, a bez niego If-Modified-Since)"""
+        if_none_match = naglowki.get("if-none-match")
+        if if_none_match is not None:
+            etagi = {etag.strip().removeprefix("W/") for etag in if_none_match.split(",")}
+            return "*" in etagi or any(self.etag(k) in etagi for k in self.warianty)
+        if_modified_since = naglowki.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return parsedate_to_datetime(if_modified_since).timestamp() >= self.zmieniono
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+def wybierz_kodowanie(accept_encoding: str, dostepne) -> str:
+    """Najlepsze dostępne kodowanie akceptowane przez klienta (z uwzględnieniem q=0)"""
+    wagi = {}
+    for czesc in accept_encoding.lower().split(","):
+        nazwa, _, parametry = czesc.partition(";")
+        waga = 1.0
+        parametry = parametry.strip()
+        if parametry.startswith("q="):
+            try:
+                waga = float(parametry[2:])
+            except ValueError:
+                waga = 0.0
+        wagi[nazwa.strip()] = waga
+    for kodowanie in _KODOWANIA:
+        if kodowanie in dostepne and wagi.get(kodowanie, wagi.get("*", 0.0)) > 0:
+            return kodowanie
+    return "identity"
+
+
+def _z_hashem(nazwa: str, hash: str) -> str:
+    baza, rozszerzenie = os.path.splitext(nazwa)
+    return f"{baza}.{hash}{rozszerzenie}"
+
+
+class Zasoby:
+    """Pliki katalogu frontendu wczytane do pamięci przy starcie"""
+
+    def __init__(self, katalog: str):
+        self.katalog = katalog
+        self.pliki = {}  # ścieżka pod /static -> Zasob
+        self.adresy = {}  # ścieżka oryginalna -> ścieżka z hashem
+        strony = []
+        for sciezka in sorted(self._sciezki()):
+            if sciezka.endswith(ROZSZERZENIA_STRON):
+                strony.append(sciezka)
+                continue
+            zasob = self._wczytaj(sciezka, CACHE_NIEZMIENNY)
+            nazwa = _z_hashem(sciezka, zasob.hash)
+            self.adresy[sciezka] = nazwa
+            self.pliki[nazwa] = zasob
+            # Stary adres bez hasha nadal działa, ale wymaga rewalidacji
+            self.pliki[sciezka] = self._wczytaj(sciezka, CACHE_REWALIDACJA)
+
+        for sciezka in strony:
+            self.pliki[sciezka] = self._wczytaj(sciezka, CACHE_REWALIDACJA, self._podmien_odnosniki)
+
+    def _sciezki(self):
+        for katalog, _, pliki in os.walk(self.katalog):
+            for plik in pliki:
+                yield os.path.relpath(os.path.join(katalog, plik), self.katalog).replace(os.sep, "/")
+
+    def _wczytaj(self, sciezka: str, cache_control: str, przetworz=None) -> Zasob:
+        pelna = os.path.join(self.katalog, sciezka)
+        with open(pelna, "rb") as plik:
+            tresc = plik.read()
+        if przetworz is not None:
+            tresc = przetworz(tresc)
+        typ = mimetypes.guess_type(sciezka)[0] or "application/octet-stream"  # charset dla text/* dodaje Response
+        return Zasob(tresc, typ, os.path.getmtime(pelna), cache_control)
+
+    def _podmien_odnosniki(self, tresc: bytes) -> bytes:
+        def podmien(dopasowanie):
+            return "/static/" + self.adresy.get(dopasowanie.group(1), dopasowanie.group(1))
+        return _ODNOSNIK.sub(podmien, tresc.decode("utf-8")).encode("utf-8")
+
+    def odpowiedz(self, request: Request, sciezka: str) -> Optional[Response]:
+        """Odpowiedź z pliku (wybrane kodowanie lub 304); None, gdy pliku nie ma"""
+        zasob = self.pliki.get(sciezka)
+        if zasob is None:
+            return None
+        kodowanie = wybierz_kodowanie(request.headers.get("accept-encoding", ""), zasob.warianty)
+        naglowki = {
+            "Cache-Control": zasob.cache_control,
+            "ETag": zasob.etag(kodowanie),
+            "Last-Modified": zasob.ostatnia_zmiana,
+            "Vary": "Accept-Encoding",
+        }
+        if zasob.aktualny(request.headers):
+            return Response(status_code=304, headers=naglowki)
+        if kodowanie != "identity":
+            naglowki["Content-Encoding"] = kodowanie
+        return Response(zasob.warianty[kodowanie], media_type=zasob.typ, headers=naglowki)
+
+
+class MiddlewareGZip(GZipMiddleware):
+    """
+    GZipMiddleware ze Starlette pomijający żądania wskazane przez pomin(scope).
+
+    Decyzja zapada przed wywołaniem aplikacji, z samego żądania - pominięte odpowiedzi
+    (np. strumień zdarzeń, pliki już skompresowane) idą do klienta bez udziału kompresora.
+    """
+
+    def __init__(self, app, minimum_size: int = 500, compresslevel: int = 9,
+                 pomin: Callable[[Scope], bool] = lambda scope: False):
+        super().__init__(app, minimum_size, compresslevel)
+        self.pomin = pomin
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self.pomin(scope):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
@@ -0,0 +1,181 @@
+# Operacje wsadowe na rekrutacjach: wiele elementów w jednej transakcji z błędami per element
+from types import SimpleNamespace
+
+from pydantic import ValidationError
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.orm import Session
+
+from backend.archive import przywroc, zajete_w_archiwum
+from backend.database import Rekrutacja, insert_pomijajacy_duplikaty
+from backend.importer import opis_bledu
+from backend.schemas import RekrutacjaCreate, RekrutacjaUpdate
+from backend.zapis import TransakcjaZapisu
+
+_tabela = Rekrutacja.__table__
+_WYMAGANE = {kolumna.key for kolumna in _tabela.columns if not kolumna.nullable}
+
+
+def _blad(indeks: int, klucz, komunikat: str) -> dict:
+    return {"indeks": indeks, "klucz": klucz, "blad": komunikat}
+
+
+def _wiersze(db: Session, ids, id_referencyjne) -> list:
+    """Pełne wiersze rekrutacji o podanych ID lub ID referencyjnych (jedno zapytanie)"""
+    # Zmieniane i usuwane rekrutacje z archiwum wracają najpierw do tabeli rekrutacje
+    przywroc(db, ids, id_referencyjne)
+    warunki = []
+    if ids:
+        warunki.append(_tabela.c.id.in_(list(ids)))
+    if id_referencyjne:
+        warunki.append(_tabela.c.id_referencyjne.in_(list(id_referencyjne)))
+    if not warunki:
+        return []
+    # FOR UPDATE: stan sprzed zmiany (delta agregatów, dziennik) nie zmieni się do commit;
+    # kolejność po id - równoległe partie blokują wiersze w tej samej kolejności
+    zapytanie = select(_tabela).where(or_(*warunki)).order_by(_tabela.c.id).with_for_update()
+    return [dict(wiersz) for wiersz in db.execute(zapytanie).mappings()]
+
+
+def utworz_wiele(db: Session, elementy: list) -> dict:
+    """
+    Tworzy rekrutacje jednym INSERT (executemany) z pominięciem istniejących
+    ID referencyjnych; niepoprawne elementy trafiają do listy błędów.
+    """
+    bledy = []
+    poprawne = {}
+    for indeks, item in enumerate(elementy):
+        id_ref = item.get("id_referencyjne")
+        try:
+            wiersz = RekrutacjaCreate.model_validate(item).model_dump()
+        except ValidationError as e:
+            bledy.append(_blad(indeks, id_ref, opis_bledu(e)))
+            continue
+        if wiersz["id_referencyjne"] in poprawne:
+            bledy.append(_blad(indeks, id_ref, "ID referencyjne powtórzone w żądaniu"))
+            continue
+        poprawne[wiersz["id_referencyjne"]] = (indeks, wiersz)
+
+    utworzone = []
+    zapis = TransakcjaZapisu(db)
+    if poprawne:
+        istniejace = set(db.scalars(
+            select(Rekrutacja.id_referencyjne).where(Rekrutacja.id_referencyjne.in_(list(poprawne)))
+        ))
+        istniejace.update(zajete_w_archiwum(db, poprawne))
+        nowe = [wiersz for id_ref, (_, wiersz) in poprawne.items() if id_ref not in istniejace]
+        wstawione = {}
+        if nowe:
+            wstawione = {
+                id_ref: id for id, id_ref in db.connection().execute(insert_pomijajacy_duplikaty(db), nowe)
+            }
+        for id_ref, (indeks, wiersz) in poprawne.items():
+            if id_ref not in wstawione:
+                bledy.append(_blad(indeks, id_ref, f"Rekrutacja z ID referencyjnym {id_ref} już istnieje"))
+                continue
+            zapis.dodana(SimpleNamespace(id=wstawione[id_ref], **wiersz))
+            utworzone.append({"indeks": indeks, "id": wstawione[id_ref], "id_referencyjne": id_ref})
+    zapis.zatwierdz()
+
+    bledy.sort(key=lambda b: b["indeks"])
+    return {"created": len(utworzone), "utworzone": utworzone, "errors": bledy}
+
+
+def aktualizuj_wiele(db: Session, elementy: list) -> dict:
+    """
+    Aktualizuje rekrutacje wskazane przez "id" albo (bez "id") przez "id_referencyjne".
+    Pozostałe pola elementu jak w PUT /api/rekrutacje/{id}; z kluczem "id"
+    pole id_referencyjne jest zwykłym polem do zmiany.
+
+    Stan sprzed zmian pobierany jest jednym SELECT, zmiany zapisywane
+    jednym UPDATE ... WHERE id = ? (executemany).
+    """
+    bledy = []
+    zmiany = []
+    for indeks, item in enumerate(elementy):
+        pola = dict(item)
+        if "id" in pola:
+            klucz = ("id", pola.pop("id"))
+        elif "id_referencyjne" in pola:
+            klucz = ("id_referencyjne", pola.pop("id_referencyjne"))
+        else:
+            bledy.append(_blad(indeks, None, "Brak klucza: podaj id lub id_referencyjne"))
+            continue
+        try:
+            dane = RekrutacjaUpdate.model_validate(pola).model_dump(exclude_unset=True)
+        except ValidationError as e:
+            bledy.append(_blad(indeks, klucz[1], opis_bledu(e)))
+            continue
+        puste = sorted(pole for pole, wartosc in dane.items() if wartosc is None and pole in _WYMAGANE)
+        if puste:
+            bledy.append(_blad(indeks, klucz[1], f"Pola nie mogą być puste: {', '.join(puste)}"))
+            continue
+        zmiany.append((indeks, klucz, dane))
+
+    wiersze = _wiersze(
+        db,
+        {wartosc for _, (pole, wartosc), _ in zmiany if pole == "id"},
+        {wartosc for _, (pole, wartosc), _ in zmiany if pole == "id_referencyjne"},
+    )
+    wg_klucza = {("id", w["id"]): w for w in wiersze}
+    wg_klucza.update({("id_referencyjne", w["id_referencyjne"]): w for w in wiersze})
+
+    # Nowe ID referencyjne nie mogą być zajęte przez inne rekrutacje
+    nowe_id_ref = {dane["id_referencyjne"] for _, _, dane in zmiany if "id_referencyjne" in dane}
+    zajete = {}
+    if nowe_id_ref:
+        zajete = dict(db.execute(
+            select(_tabela.c.id_referencyjne, _tabela.c.id).where(_tabela.c.id_referencyjne.in_(list(nowe_id_ref)))
+        ).all())
+        zajete.update(zajete_w_archiwum(db, nowe_id_ref))
+
+    zaktualizowane = []
+    parametry = []
+    uzyte_id = set()
+    zapis = TransakcjaZapisu(db)
+    for indeks, klucz, dane in zmiany:
+        stary = wg_klucza.get(klucz)
+        if stary is None:
+            bledy.append(_blad(indeks, klucz[1], f"Rekrutacja z {klucz[0]} {klucz[1]} nie została znaleziona"))
+            continue
+        if stary["id"] in uzyte_id:
+            bledy.append(_blad(indeks, klucz[1], "Rekrutacja powtórzona w żądaniu"))
+            continue
+        id_ref = dane.get("id_referencyjne")
+        if id_ref is not None and zajete.setdefault(id_ref, stary["id"]) != stary["id"]:
+            bledy.append(_blad(indeks, klucz[1], f"Rekrutacja z ID referencyjnym {id_ref} już istnieje"))
+            continue
+        uzyte_id.add(stary["id"])
+        if dane:
+            parametry.append({"id": stary["id"], **dane})
+            zapis.zmieniona(SimpleNamespace(**stary), SimpleNamespace(**{**stary, **dane}))
+        zaktualizowane.append({"indeks": indeks, "id": stary["id"]})
+
+    if parametry:
+        # ORM bulk UPDATE po kluczu głównym - grupuje elementy o tym samym zestawie pól
+        db.execute(update(Rekrutacja), parametry)
+    zapis.zatwierdz()
+
+    bledy.sort(key=lambda b: b["indeks"])
+    return {"updated": len(zaktualizowane), "zaktualizowane": zaktualizowane, "errors": bledy}
+
+
+def usun_wiele(db: Session, ids: list, id_referencyjne: list) -> dict:
+    """Usuwa rekrutacje jednym DELETE ... WHERE id IN (...); nieznalezione trafiają do błędów"""
+    wiersze = _wiersze(db, set(ids), set(id_referencyjne))
+    znalezione_id = {w["id"] for w in wiersze}
+    znalezione_id_ref = {w["id_referencyjne"] for w in wiersze}
+
+    bledy = []
+    klucze = [("id", id) for id in ids] + [("id_referencyjne", id_ref) for id_ref in id_referencyjne]
+    for indeks, (pole, wartosc) in enumerate(klucze):
+        znalezione = znalezione_id if pole == "id" else znalezione_id_ref
+        if wartosc not in znalezione:
+            bledy.append(_blad(indeks, wartosc, f"Rekrutacja z {pole} {wartosc} nie została znaleziona"))
+
+    zapis = TransakcjaZapisu(db)
+    if wiersze:
+        for wiersz in wiersze:
+            zapis.usunieta(SimpleNamespace(**wiersz))
+        db.execute(delete(Rekrutacja).where(Rekrutacja.id.in_(sorted(znalezione_id))))
+    zapis.zatwierdz()
+    return {"deleted": len(wiersze), "ids": sorted(znalezione_id), "errors": bledy}
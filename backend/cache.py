@@ -0,0 +1,110 @@
+# Cache odpowiedzi endpointów statystycznych unieważniany wersją danych
+import hashlib
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.database import WersjaDanych
+
+CACHE_MAX_WPISOW = int(os.getenv("CACHE_MAX_WPISOW", "256"))
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))
+
+
+def pobierz_wersje(db: Session) -> int:
+    return db.query(WersjaDanych.wersja).filter(WersjaDanych.id == 1).scalar() or 0
+
+
+def podbij_wersje(db: Session) -> int:
+    """Zwiększa wersję danych w bieżącej transakcji - wywoływać przy każdym zapisie; zwraca nową wersję"""
+    db.query(WersjaDanych).filter(WersjaDanych.id == 1).update(
+        {WersjaDanych.wersja: WersjaDanych.wersja + 1}, synchronize_session=False
+    )
+    return pobierz_wersje(db)
+
+
+class PamiecPodreczna:
+    """Prosty cache LRU z czasem życia wpisów, bezpieczny dla wątków"""
+
+    def __init__(self, max_wpisow: int = CACHE_MAX_WPISOW, ttl: float = CACHE_TTL):
+        self.max_wpisow = max_wpisow
+        self.ttl = ttl
+        self._wpisy = OrderedDict()
+        self._lock = threading.Lock()
+
+    def pobierz(self, klucz):
+        with self._lock:
+            wpis = self._wpisy.get(klucz)
+            if wpis is None:
+                return None
+            wartosc, wygasa = wpis
+            if wygasa < time.monotonic():
+                del self._wpisy[klucz]
+                return None
+            self._wpisy.move_to_end(klucz)
+            return wartosc
+
+    def zapisz(self, klucz, wartosc):
+        with self._lock:
+            self._wpisy[klucz] = (wartosc, time.monotonic() + self.ttl)
+            self._wpisy.move_to_end(klucz)
+            while len(self._wpisy) > self.max_wpisow:
+                self._wpisy.popitem(last=False)
+
+    def wyczysc(self):
+        with self._lock:
+            self._wpisy.clear()
+
+
+cache_odpowiedzi = PamiecPodreczna()
+
+
+def _klucz_i_naglowki(endpoint: str, parametry: dict, wersja: int):
+    znormalizowane = tuple(sorted((k, str(v)) for k, v in parametry.items() if v not in (None, "")))
+    klucz = (endpoint, znormalizowane, wersja)
+    etag = '"%s"' % hashlib.sha1(repr(klucz).encode("utf-8")).hexdigest()[:20]
+    return klucz, {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def _niezmienione(request: Request, naglowki: dict) -> bool:
+    if_none_match = request.headers.get("if-none-match", "")
+    return naglowki["ETag"] in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+
+
+async def odpowiedz_z_cache_async(
+    request: Request,
+    db: AsyncSession,
+    endpoint: str,
+    parametry: dict,
+    oblicz: Callable[[Session], dict],
+) -> Response:
+    """
+    Zwraca odpowiedź JSON z cache (klucz: endpoint + parametry + wersja danych).
+
+    ETag zależy tylko od klucza, więc 304 Not Modified nie wymaga liczenia statystyk.
+    oblicz dostaje synchroniczną sesję (run_sync), więc korzysta z tych samych
+    zapytań co reszta aplikacji, a pętla zdarzeń nie czeka na bazę.
+    Funkcja async (bez argumentów) jest po prostu oczekiwana.
+    """
+    wersja = await db.scalar(select(WersjaDanych.wersja).where(WersjaDanych.id == 1))
+    klucz, naglowki = _klucz_i_naglowki(endpoint, parametry, wersja or 0)
+    if _niezmienione(request, naglowki):
+        return Response(status_code=304, headers=naglowki)
+
+    tresc = cache_odpowiedzi.pobierz(klucz)
+    if tresc is None:
+        if inspect.iscoroutinefunction(oblicz):
+            wynik = await oblicz()
+        else:
+            wynik = await db.run_sync(oblicz)
+        tresc = JSONResponse(content=wynik).body
+        cache_odpowiedzi.zapisz(klucz, tresc)
+    return Response(content=tresc, media_type="application/json", headers=naglowki)
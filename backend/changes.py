@@ -0,0 +1,103 @@
+# Dziennik zmian rekrutacji dla odbiorców synchronizujących dane przyrostowo (np. hurtownia BI)
+#
+# TransakcjaZapisu dopisuje wpisy (operacja, id, zmienione pola) w transakcji zapisu,
+# po podbiciu wersji danych. Blokada wiersza wersji szereguje transakcje zapisu,
+# więc numery seq rosną w kolejności zatwierdzeń także w PostgreSQL.
+import asyncio
+import json
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from backend.database import Rekrutacja, ZmianaRekrutacji
+
+POLA_REKRUTACJI = tuple(pole for pole in Rekrutacja.__table__.columns.keys() if pole != "id")
+MAX_ZMIAN = 10000
+ODSTEP_SSE = 1.0  # sekundy między sprawdzeniami nowych wpisów
+PODTRZYMANIE_SSE = 15.0  # komentarz SSE, żeby proxy nie zamykały bezczynnego połączenia
+
+
+def _wartosc(wartosc):
+    return wartosc.isoformat() if isinstance(wartosc, date) else wartosc
+
+
+def wpis_dodania(rekrutacja) -> dict:
+    return {
+        "operacja": "insert",
+        "rekrutacja_id": rekrutacja.id,
+        "id_referencyjne": rekrutacja.id_referencyjne,
+        "pola": {pole: _wartosc(getattr(rekrutacja, pole)) for pole in POLA_REKRUTACJI},
+    }
+
+
+def wpis_zmiany(stara, nowa) -> Optional[dict]:
+    """Wpis z polami, które się zmieniły; None, gdy zmiana niczego nie zmienia"""
+    pola = {
+        pole: _wartosc(getattr(nowa, pole))
+        for pole in POLA_REKRUTACJI if getattr(stara, pole) != getattr(nowa, pole)
+    }
+    if not pola:
+        return None
+    return {"operacja": "update", "rekrutacja_id": nowa.id, "id_referencyjne": nowa.id_referencyjne, "pola": pola}
+
+
+def wpis_usuniecia(rekrutacja) -> dict:
+    return {
+        "operacja": "delete",
+        "rekrutacja_id": rekrutacja.id,
+        "id_referencyjne": rekrutacja.id_referencyjne,
+        "pola": None,
+    }
+
+
+def zapisz_wpisy(db: Session, wpisy: list, wersja: Optional[int]):
+    """Dopisuje wpisy w bieżącej transakcji (jeden INSERT executemany)"""
+    czas = datetime.now()
+    db.execute(insert(ZmianaRekrutacji), [{**wpis, "wersja": wersja, "czas": czas} for wpis in wpisy])
+
+
+def ostatni_seq(db: Session) -> int:
+    return db.execute(select(func.max(ZmianaRekrutacji.seq))).scalar() or 0
+
+
+def zmiany_od(db: Session, since: int, limit: int = 1000):
+    """Zwraca (wpisy o seq > since w kolejności zapisu, czy są dalsze wpisy)"""
+    tabela = ZmianaRekrutacji.__table__
+    wiersze = db.execute(
+        select(tabela).where(tabela.c.seq > since).order_by(tabela.c.seq).limit(limit + 1)
+    ).all()
+    zmiany = [
+        {
+            "seq": w.seq,
+            "operacja": w.operacja,
+            "id": w.rekrutacja_id,
+            "id_referencyjne": w.id_referencyjne,
+            "pola": w.pola,
+            "wersja": w.wersja,
+            "czas": w.czas.isoformat(),
+        }
+        for w in wiersze[:limit]
+    ]
+    return zmiany, len(wiersze) > limit
+
+
+async def strumien_sse(request, since: int, nowa_sesja):
+    """Zdarzenia Server-Sent Events z nowymi wpisami (id zdarzenia = seq) do rozłączenia klienta"""
+    cisza = 0.0
+    while not await request.is_disconnected():
+        async with nowa_sesja() as db:
+            zmiany, wiecej = await db.run_sync(zmiany_od, since)
+        for zmiana in zmiany:
+            since = zmiana["seq"]
+            yield f"id: {since}\nevent: zmiana\ndata: {json.dumps(zmiana, ensure_ascii=False)}\n\n"
+        if wiecej:
+            continue
+        if zmiany:
+            cisza = 0.0
+        elif cisza >= PODTRZYMANIE_SSE:
+            cisza = 0.0
+            yield ": ping\n\n"
+        await asyncio.sleep(ODSTEP_SSE)
+        cisza += ODSTEP_SSE
@@ -0,0 +1,344 @@
+# Opcjonalna migawka kolumnowa (NumPy) do liczenia KPI dashboardu w pamięci
+#
+# Włączana zmienną ANALITYKA_KOLUMNOWA=1, wymaga pakietu numpy.
+# Zapisy przez TransakcjaZapisu aktualizują migawkę przyrostowo, pozostałe zmiany
+# (inny proces) wykrywane są po wersji danych i powodują ponowne wczytanie.
+import os
+import threading
+from datetime import date
+from types import SimpleNamespace
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.archive import ze_wszystkich
+from backend.cache import pobierz_wersje
+from backend.database import Rekrutacja, SessionLocal, jako_date
+from backend.stats import kwantyl_liniowy, wynik_dashboardu
+
+try:
+    import numpy as np
+except ImportError:  # numpy jest opcjonalny
+    np = None
+
+ANALITYKA_KOLUMNOWA = os.getenv("ANALITYKA_KOLUMNOWA", "0").lower() in ("1", "true", "tak")
+ROZMIAR_PARTII = 50000
+
+# Liczniki (int64 - sumy przez iloczyn skalarny z maską bez przepełnienia),
+# daty jako ordinal (int32) i kategorie kodowane słownikiem
+LICZNIKI = (
+    "liczba_cv_otrzymana",
+    "liczba_cv_odrzucone_rekruter",
+    "liczba_spotkan",
+    "liczba_zlozonych_ofert",
+    "liczba_zatrudnionych",
+    "liczba_odrzuconych_ofert_przez_kandydata",
+)
+DATY = ("data_otwarcia", "data_zamkniecia", "data_zatrudnienia")  # ordinal, 0 = brak daty
+KATEGORIE = ("departament", "collar_type", "przyczyna_rekrutacji", "typ_zatrudnienia")
+
+KOLUMNY_ZRODLOWE = (
+    Rekrutacja.id,
+    Rekrutacja.data_otwarcia,
+    Rekrutacja.data_zamkniecia,
+    Rekrutacja.data_zatrudnienia,
+    Rekrutacja.czy_manager,
+    Rekrutacja.liczba_cv_otrzymana,
+    Rekrutacja.liczba_cv_odrzucone_rekruter,
+    Rekrutacja.liczba_spotkan_rekruter,
+    Rekrutacja.liczba_spotkan_hiring_manager,
+    Rekrutacja.liczba_zlozonych_ofert,
+    Rekrutacja.liczba_zatrudnionych,
+    Rekrutacja.liczba_odrzuconych_ofert_przez_kandydata,
+    Rekrutacja.departament,
+    Rekrutacja.collar_type,
+    Rekrutacja.przyczyna_rekrutacji,
+    Rekrutacja.typ_zatrudnienia,
+)
+
+
+def _ordinal(wartosc) -> int:
+    wartosc = jako_date(wartosc)
+    return wartosc.toordinal() if wartosc else 0
+
+
+class _Slownik:
+    """Kodowanie wartości kategorii liczbami całkowitymi"""
+
+    def __init__(self):
+        self.wartosci = []
+        self.kody = {}
+
+    def koduj(self, wartosc) -> int:
+        kod = self.kody.get(wartosc)
+        if kod is None:
+            kod = self.kody[wartosc] = len(self.wartosci)
+            self.wartosci.append(wartosc)
+        return kod
+
+
+class MigawkaKolumnowa:
+    """
+    Kolumnowa kopia tabeli rekrutacje (razem z archiwum): tablice NumPy z licznikami, datami
+    jako liczbami dni i kodami kategorii. Filtry dashboardu to maski logiczne.
+
+    Wiersze usunięte są tylko oznaczane w masce "aktywne"; tablice rosną
+    z zapasem, więc dopisanie rekrutacji nie kopiuje całej migawki.
+    """
+
+    def __init__(self):
+        self.wersja = None
+        self._lock = threading.RLock()
+        self._wyczysc()
+
+    def _wyczysc(self, pojemnosc: int = 1024):
+        self._n = 0
+        self._slowniki = {k: _Slownik() for k in KATEGORIE}
+        self._kolumny = {
+            "id": np.zeros(pojemnosc, dtype=np.int64),
+            "aktywne": np.zeros(pojemnosc, dtype=bool),
+            "czy_manager": np.zeros(pojemnosc, dtype=bool),
+            **{k: np.zeros(pojemnosc, dtype=np.int32) for k in DATY},
+            **{k: np.zeros(pojemnosc, dtype=np.int64) for k in LICZNIKI},
+            **{k: np.zeros(pojemnosc, dtype=np.intp) for k in KATEGORIE},
+        }
+
+    def _zapewnij_pojemnosc(self, potrzebne: int):
+        pojemnosc = len(self._kolumny["id"])
+        if potrzebne <= pojemnosc:
+            return
+        while pojemnosc < potrzebne:
+            pojemnosc *= 2
+        for nazwa, tablica in self._kolumny.items():
+            nowa = np.zeros(pojemnosc, dtype=tablica.dtype)
+            nowa[:self._n] = tablica[:self._n]
+            self._kolumny[nazwa] = nowa
+
+    def _zapisz_wiersze(self, indeksy, wiersze):
+        """Wpisuje wiersze (krotki w kolejności KOLUMNY_ZRODLOWE) pod podane indeksy"""
+        k = self._kolumny
+        kolumny = list(zip(*wiersze))
+        (ids, otwarcie, zamkniecie, zatrudnienie, manager, cv, cv_odrzucone, spotkania_rekruter,
+         spotkania_hm, oferty, zatrudnieni, odrzucone_oferty, *kategorie) = kolumny
+
+        k["id"][indeksy] = ids
+        k["aktywne"][indeksy] = True
+        k["czy_manager"][indeksy] = [bool(m) for m in manager]
+        k["data_otwarcia"][indeksy] = [_ordinal(d) for d in otwarcie]
+        k["data_zamkniecia"][indeksy] = [_ordinal(d) for d in zamkniecie]
+        k["data_zatrudnienia"][indeksy] = [_ordinal(d) for d in zatrudnienie]
+        k["liczba_cv_otrzymana"][indeksy] = [v or 0 for v in cv]
+        k["liczba_cv_odrzucone_rekruter"][indeksy] = [v or 0 for v in cv_odrzucone]
+        k["liczba_spotkan"][indeksy] = [(a or 0) + (b or 0) for a, b in zip(spotkania_rekruter, spotkania_hm)]
+        k["liczba_zlozonych_ofert"][indeksy] = [v or 0 for v in oferty]
+        k["liczba_zatrudnionych"][indeksy] = [v or 0 for v in zatrudnieni]
+        k["liczba_odrzuconych_ofert_przez_kandydata"][indeksy] = [v or 0 for v in odrzucone_oferty]
+        for nazwa, wartosci in zip(KATEGORIE, kategorie):
+            slownik = self._slowniki[nazwa]
+            k[nazwa][indeksy] = [slownik.koduj(w or "") for w in wartosci]
+
+    def _dopisz(self, wiersze):
+        self._zapewnij_pojemnosc(self._n + len(wiersze))
+        self._zapisz_wiersze(np.arange(self._n, self._n + len(wiersze)), wiersze)
+        self._n += len(wiersze)
+
+    def _indeks(self, id: int) -> Optional[int]:
+        # ID rosną wraz z dopisywaniem, więc kolumna id jest posortowana
+        ids = self._kolumny["id"][:self._n]
+        indeks = int(np.searchsorted(ids, id))
+        if indeks < self._n and ids[indeks] == id:
+            return indeks
+        return None
+
+    def zaladuj(self, db: Session):
+        """Wczytuje obie tabele partiami; wersja danych odczytana w tej samej transakcji"""
+        with self._lock:
+            wersja = pobierz_wersje(db)
+            self._wyczysc()
+            wynik = db.execute(
+                ze_wszystkich(select(*KOLUMNY_ZRODLOWE).order_by(Rekrutacja.id))
+                .execution_options(yield_per=ROZMIAR_PARTII)
+            )
+            for partia in wynik.partitions():
+                self._dopisz(partia)
+            self.wersja = wersja
+
+    def odswiez(self, db: Session):
+        """Wczytuje migawkę ponownie, jeśli baza ma inną wersję danych"""
+        if pobierz_wersje(db) != self.wersja:
+            self.zaladuj(db)
+
+    def _zmien(self, wersja: int, zmiana):
+        with self._lock:
+            if self.wersja is None:
+                return
+            if self.wersja != wersja - 1:
+                # Pominięta zmiana (np. import lub inny proces) - pełne wczytanie przy następnym odczycie
+                self.wersja = None
+                return
+            if zmiana() is False:
+                self.wersja = None
+                return
+            self.wersja = wersja
+
+    @staticmethod
+    def wiersz(rekrutacja) -> tuple:
+        """Krotka kolumn migawki z obiektu Rekrutacja (lub obiektu o tych samych atrybutach)"""
+        return tuple(getattr(rekrutacja, kolumna.key) for kolumna in KOLUMNY_ZRODLOWE)
+
+    def zastosuj(self, zmiany: dict, wersja: int):
+        """
+        Nakłada zmiany transakcji zatwierdzonej z podaną wersją danych:
+        {id: krotka z wiersz()} dla zapisanych, {id: None} dla usuniętych.
+        """
+        def zmiana():
+            indeksy, wiersze, nowe = [], [], []
+            for id in sorted(zmiany):
+                wiersz = zmiany[id]
+                indeks = self._indeks(id)
+                if wiersz is None:
+                    if indeks is not None:
+                        self._kolumny["aktywne"][indeks] = False
+                elif indeks is None:
+                    nowe.append(wiersz)
+                else:
+                    indeksy.append(indeks)
+                    wiersze.append(wiersz)
+            if nowe and self._n and nowe[0][0] < self._kolumny["id"][self._n - 1]:
+                # Nowe ID mniejsze od ostatniego (równoległe transakcje) - kolumna id przestałaby być posortowana
+                return False
+            if wiersze:
+                self._zapisz_wiersze(indeksy, wiersze)
+            if nowe:
+                self._dopisz(nowe)
+
+        self._zmien(wersja, zmiana)
+
+    def _maska(self, data_od: Optional[date], data_do: Optional[date], departament, collar_type):
+        # Daty filtrów sprawdza już endpoint (422) - tekst nie trafia tu, więc błąd nie zależy od ścieżki
+        k = {nazwa: tablica[:self._n] for nazwa, tablica in self._kolumny.items()}
+        maska = k["aktywne"].copy()
+        if data_od:
+            maska &= k["data_otwarcia"] >= _ordinal(data_od)
+        if data_do:
+            maska &= k["data_otwarcia"] <= _ordinal(data_do)
+        for nazwa, wartosc in (("departament", departament), ("collar_type", collar_type)):
+            if wartosc:
+                kod = self._slowniki[nazwa].kody.get(wartosc)
+                if kod is None:
+                    maska[:] = False
+                else:
+                    maska &= k[nazwa] == kod
+        return k, maska
+
+    def _rozbicie(self, nazwa: str, kody, maska, pomin=()) -> dict:
+        """Liczba wierszy z maski w każdej wartości kategorii (bez kopiowania kolumny)"""
+        slownik = self._slowniki[nazwa]
+        liczby = np.bincount(kody, weights=maska, minlength=len(slownik.wartosci))
+        return {
+            wartosc: int(liczby[kod])
+            for wartosc, kod in sorted(slownik.kody.items())
+            if liczby[kod] and wartosc not in pomin
+        }
+
+    def statystyki(
+        self,
+        data_od: Optional[date] = None,
+        data_do: Optional[date] = None,
+        departament: Optional[str] = None,
+        collar_type: Optional[str] = None,
+    ) -> dict:
+        """KPI dashboardu w tym samym formacie co statystyki_dashboardu"""
+        with self._lock:
+            k, maska = self._maska(data_od, data_do, departament, collar_type)
+
+            # Maski na pełnej długości kolumn - wybierane są tylko wartości metryk czasowych
+            otwarcie = k["data_otwarcia"]
+            zamkniete = maska & (k["data_zamkniecia"] > 0)
+            zatrudnione = maska & (k["data_zatrudnienia"] > 0)
+            z_ofertami = zamkniete & (k["liczba_zlozonych_ofert"] > 0)
+            ttf = k["data_zatrudnienia"][zatrudnione] - otwarcie[zatrudnione]
+            tto = k["data_zamkniecia"][z_ofertami] - otwarcie[z_ofertami]
+            czas_otwarcia = k["data_zamkniecia"][zamkniete] - otwarcie[zamkniete]
+
+            waga = maska.astype(np.int64)
+
+            def suma(nazwa):
+                return int(k[nazwa] @ waga)
+
+            def liczba_gdzie(nazwa, wartosc):
+                kod = self._slowniki[nazwa].kody.get(wartosc)
+                return 0 if kod is None else int(np.count_nonzero(maska & (k[nazwa] == kod)))
+
+            total = int(np.count_nonzero(maska))
+            liczba_zamknietych = int(np.count_nonzero(zamkniete))
+            sumy = SimpleNamespace(
+                total=total,
+                otwarte=total - liczba_zamknietych,
+                zamkniete=liczba_zamknietych,
+                z_zatrudnieniem=int(np.count_nonzero(zatrudnione)),
+                suma_ttf=int(ttf.sum(dtype=np.int64)),
+                liczba_ttf=len(ttf),
+                suma_tto=int(tto.sum(dtype=np.int64)),
+                liczba_tto=len(tto),
+                suma_czas_otwarcia=int(czas_otwarcia.sum(dtype=np.int64)),
+                liczba_czas_otwarcia=len(czas_otwarcia),
+                total_cv=suma("liczba_cv_otrzymana"),
+                total_cv_odrzucone=suma("liczba_cv_odrzucone_rekruter"),
+                total_spotkan=suma("liczba_spotkan"),
+                total_ofert=suma("liczba_zlozonych_ofert"),
+                total_zatrudnionych=suma("liczba_zatrudnionych"),
+                total_ofert_odrzuconych=suma("liczba_odrzuconych_ofert_przez_kandydata"),
+                white_collar=liczba_gdzie("collar_type", "White"),
+                blue_collar=liczba_gdzie("collar_type", "Blue"),
+                managers=int(np.count_nonzero(maska & k["czy_manager"])),
+                replacement=liczba_gdzie("przyczyna_rekrutacji", "Replacement"),
+            )
+            if not total:
+                return wynik_dashboardu(sumy)
+
+            departament_kody = k["departament"]
+            zamkniete_dep = self._rozbicie("departament", departament_kody, zamkniete)
+            zatrudnione_dep = self._rozbicie("departament", departament_kody, zatrudnione)
+            departamenty = {
+                nazwa_dep: {
+                    "total": liczba,
+                    "otwarte": liczba - zamkniete_dep.get(nazwa_dep, 0),
+                    "zamkniete": zamkniete_dep.get(nazwa_dep, 0),
+                    "z_zatrudnieniem": zatrudnione_dep.get(nazwa_dep, 0),
+                }
+                for nazwa_dep, liczba in self._rozbicie("departament", departament_kody, maska).items()
+            }
+
+            return wynik_dashboardu(
+                sumy,
+                median_ttf=_mediana(ttf),
+                median_tto=_mediana(tto),
+                departamenty=departamenty,
+                przyczyny=self._rozbicie("przyczyna_rekrutacji", k["przyczyna_rekrutacji"], maska),
+                zrodla_rekrutacji=self._rozbicie("typ_zatrudnienia", k["typ_zatrudnienia"], maska, pomin=("",)),
+            )
+
+    def statystyki_aktualne(self, filtry: dict) -> dict:
+        """Odświeża migawkę w razie potrzeby (własna sesja) i liczy KPI - do wywołania w wątku"""
+        with SessionLocal() as db:
+            self.odswiez(db)
+        return self.statystyki(**filtry)
+
+    def rozmiar_bajtow(self) -> int:
+        return sum(tablica.nbytes for tablica in self._kolumny.values())
+
+
+def _mediana(wartosci):
+    """Mediana jak w percentyle(); np.partition zamiast pełnego sortowania"""
+    n = len(wartosci)
+    if not n:
+        return None
+    dolna = (n - 1) // 2
+    sasiedzi = np.partition(wartosci, [dolna, min(dolna + 1, n - 1)])
+    return kwantyl_liniowy(lambda i: int(sasiedzi[i]) if i < n else None, n, 0.5)
+
+
+# Migawka procesu - None, gdy wyłączona albo brak numpy
+migawka_kolumnowa = MigawkaKolumnowa() if ANALITYKA_KOLUMNOWA and np is not None else None
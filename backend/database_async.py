@@ -0,0 +1,53 @@
+# Asynchroniczna warstwa bazy (AsyncSession) dla endpointów tylko do odczytu
+import os
+from typing import AsyncIterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from backend.database import SQLALCHEMY_DATABASE_URL, jest_w_pamieci, opcje_engine, ustaw_pragma_sqlite
+
+# Sterowniki asynchroniczne odpowiadające bazie z DATABASE_URL
+STEROWNIKI_ASYNC = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def adres_async(url: str = SQLALCHEMY_DATABASE_URL) -> str:
+    """Adres bazy z asynchronicznym sterownikiem (ASYNC_DATABASE_URL ma pierwszeństwo)"""
+    if os.getenv("ASYNC_DATABASE_URL"):
+        return os.getenv("ASYNC_DATABASE_URL")
+    adres = make_url(url)
+    sterownik = STEROWNIKI_ASYNC.get(adres.get_backend_name())
+    if sterownik is None:
+        raise ValueError(f"Brak asynchronicznego sterownika dla bazy {adres.get_backend_name()}")
+    return adres.set(drivername=sterownik).render_as_string(hide_password=False)
+
+
+def utworz_async_engine(url: str):
+    """Engine asynchroniczny z tą samą konfiguracją puli i PRAGMA co engine synchroniczny"""
+    opcje = opcje_engine(url)
+    w_pamieci = jest_w_pamieci(url)
+    if url.startswith("sqlite") and not w_pamieci:
+        # aiosqlite domyślnie nie trzyma połączeń (NullPool) - każde zapytanie otwierałoby plik od nowa
+        opcje["poolclass"] = AsyncAdaptedQueuePool
+
+    nowy_engine = create_async_engine(url, **opcje)
+    if url.startswith("sqlite"):
+        event.listen(
+            nowy_engine.sync_engine, "connect",
+            lambda polaczenie, _rekord: ustaw_pragma_sqlite(polaczenie, w_pamieci),
+        )
+    return nowy_engine
+
+
+async_engine = utworz_async_engine(adres_async())
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,127 @@
+# Strumieniowy eksport rekrutacji (JSON, NDJSON, CSV) ze stałym zużyciem pamięci
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Iterator
+
+from sqlalchemy import select
+
+from backend.archive import siega_archiwum, ze_wszystkich
+from backend.database import Rekrutacja, SessionLocal
+
+POLA_EKSPORTU = (
+    "id_referencyjne",
+    "przyczyna_rekrutacji",
+    "replacement_za_kogo",
+    "collar_type",
+    "czy_manager",
+    "departament",
+    "dzial",
+    "stanowisko",
+    "miejsce_pracy",
+    "hiring_manager",
+    "data_otwarcia",
+    "liczba_cv_otrzymana",
+    "liczba_cv_odrzucone_rekruter",
+    "liczba_spotkan_rekruter",
+    "liczba_spotkan_hiring_manager",
+    "data_zamkniecia",
+    "data_zatrudnienia",
+    "typ_zatrudnienia",
+    "liczba_zatrudnionych",
+    "liczba_odrzuconych_ofert_przez_kandydata",
+    "liczba_zlozonych_ofert",
+    "komentarz",
+    "plec",
+)
+
+FORMATY = {
+    "json": ("application/json", "json"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),  # charset=utf-8 dokłada klasa odpowiedzi
+}
+
+ROZMIAR_PARTII = 1000
+
+
+def _wiersze(warunki) -> Iterator[dict]:
+    """Iteruje po rekrutacjach partiami (yield_per), bez ładowania całej tabeli"""
+    kolumny = [getattr(Rekrutacja, pole) for pole in POLA_EKSPORTU]
+    # Własna sesja - generator działa już po zamknięciu sesji z zależności get_db
+    with SessionLocal() as db:
+        zapytanie = select(*kolumny).where(*warunki).order_by(Rekrutacja.id)
+        if siega_archiwum(db):
+            zapytanie = ze_wszystkich(zapytanie)
+        wynik = db.execute(zapytanie.execution_options(yield_per=ROZMIAR_PARTII))
+        for wiersz in wynik:
+            yield {
+                pole: wartosc.isoformat() if isinstance(wartosc, date) else wartosc
+                for pole, wartosc in zip(POLA_EKSPORTU, wiersz)
+            }
+
+
+def _partie(wiersze: Iterator[dict], formatuj) -> Iterator[str]:
+    """Skleja sformatowane wiersze w większe kawałki, żeby ograniczyć liczbę zapisów"""
+    kawalek = []
+    for wiersz in wiersze:
+        kawalek.append(formatuj(wiersz))
+        if len(kawalek) >= ROZMIAR_PARTII:
+            yield "".join(kawalek)
+            kawalek = []
+    if kawalek:
+        yield "".join(kawalek)
+
+
+def _json(warunki) -> Iterator[str]:
+    yield '{"rekrutacje": ['
+    pierwszy = True
+
+    def formatuj(wiersz):
+        nonlocal pierwszy
+        separator = "" if pierwszy else ", "
+        pierwszy = False
+        return separator + json.dumps(wiersz, ensure_ascii=False)
+
+    yield from _partie(_wiersze(warunki), formatuj)
+    yield '], "exported_at": %s}' % json.dumps(datetime.now().isoformat())
+
+
+def _ndjson(warunki) -> Iterator[str]:
+    yield from _partie(_wiersze(warunki), lambda wiersz: json.dumps(wiersz, ensure_ascii=False) + "\n")
+
+
+def _csv(warunki) -> Iterator[str]:
+    bufor = io.StringIO()
+    pisarz = csv.DictWriter(bufor, fieldnames=POLA_EKSPORTU)
+
+    def formatuj(wiersz):
+        pisarz.writerow(wiersz)
+        tekst = bufor.getvalue()
+        bufor.seek(0)
+        bufor.truncate()
+        return tekst
+
+    # BOM, żeby Excel poprawnie rozpoznał polskie znaki
+    pisarz.writeheader()
+    yield "\ufeff" + bufor.getvalue()
+    bufor.seek(0)
+    bufor.truncate()
+    yield from _partie(_wiersze(warunki), formatuj)
+
+
+def _gzip(kawalki: Iterator[bytes]) -> Iterator[bytes]:
+    kompresor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for kawalek in kawalki:
+        skompresowane = kompresor.compress(kawalek)
+        if skompresowane:
+            yield skompresowane
+    yield kompresor.flush()
+
+
+def strumien_eksportu(warunki, format: str = "json", gzip: bool = False) -> Iterator[bytes]:
+    """Generator bajtów eksportu w wybranym formacie"""
+    generatory = {"json": _json, "ndjson": _ndjson, "csv": _csv}
+    kawalki = (tekst.encode("utf-8") for tekst in generatory[format](warunki))
+    return _gzip(kawalki) if gzip else kawalki
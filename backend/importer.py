@@ -0,0 +1,219 @@
+# Import wsadowy rekrutacji z pliku JSON {"rekrutacje": [...]}
+import codecs
+import json
+from types import SimpleNamespace
+from typing import BinaryIO, Callable, Iterator, Optional
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from backend.archive import zajete_w_archiwum
+from backend.database import Rekrutacja, insert_pomijajacy_duplikaty
+from backend.schemas import RekrutacjaCreate
+from backend.zapis import TransakcjaZapisu
+
+ROZMIAR_PARTII = 1000
+ROZMIAR_BLOKU = 64 * 1024
+MAX_BLEDOW = 1000
+
+
+class BladFormatu(ValueError):
+    """Plik jest poprawnym JSON-em, ale nie ma struktury {rekrutacje: [...]}"""
+
+
+class _CzytnikJSON:
+    """Minimalny przyrostowy parser: czyta plik blokami i dekoduje kolejne wartości"""
+
+    def __init__(self, plik: BinaryIO, rozmiar_bloku: int = ROZMIAR_BLOKU):
+        self._plik = plik
+        self._rozmiar_bloku = rozmiar_bloku
+        self._dekoder_utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+        self._dekoder = json.JSONDecoder()
+        self._bufor = ""
+        self._pozycja = 0
+        self._koniec = False
+
+    def _doczytaj(self) -> bool:
+        if self._koniec:
+            return False
+        blok = self._plik.read(self._rozmiar_bloku)
+        if not blok:
+            self._koniec = True
+            self._bufor = self._bufor[self._pozycja:] + self._dekoder_utf8.decode(b"", final=True)
+        else:
+            self._bufor = self._bufor[self._pozycja:] + self._dekoder_utf8.decode(blok)
+        self._pozycja = 0
+        return True
+
+    def znak(self) -> str:
+        """Zwraca (bez konsumowania) pierwszy znak po białych znakach, "" na końcu pliku"""
+        while True:
+            while self._pozycja < len(self._bufor) and self._bufor[self._pozycja].isspace():
+                self._pozycja += 1
+            if self._pozycja < len(self._bufor):
+                return self._bufor[self._pozycja]
+            if not self._doczytaj():
+                return ""
+
+    def oczekuj(self, *dozwolone: str) -> str:
+        znak = self.znak()
+        if znak not in dozwolone:
+            raise json.JSONDecodeError(f"Oczekiwano {' lub '.join(dozwolone)}", self._bufor, self._pozycja)
+        self._pozycja += 1
+        return znak
+
+    def wartosc(self):
+        """Dekoduje następną kompletną wartość JSON"""
+        self.znak()
+        while True:
+            try:
+                wartosc, koniec = self._dekoder.raw_decode(self._bufor, self._pozycja)
+                # Liczba lub literał na końcu bufora mogą być ucięte - dociągamy dalszą część
+                if koniec < len(self._bufor) or self._koniec:
+                    self._pozycja = koniec
+                    return wartosc
+            except json.JSONDecodeError:
+                if self._koniec:
+                    raise
+            self._doczytaj()
+
+
+def iteruj_rekrutacje(plik: BinaryIO) -> Iterator[dict]:
+    """Strumieniowo zwraca elementy tablicy "rekrutacje" bez wczytywania całego pliku"""
+    czytnik = _CzytnikJSON(plik)
+    if czytnik.znak() != "{":
+        raise BladFormatu()
+    czytnik.oczekuj("{")
+
+    znaleziono = False
+    if czytnik.znak() == "}":
+        czytnik.oczekuj("}")
+    else:
+        while True:
+            klucz = czytnik.wartosc()
+            czytnik.oczekuj(":")
+            if klucz == "rekrutacje" and czytnik.znak() == "[":
+                znaleziono = True
+                czytnik.oczekuj("[")
+                if czytnik.znak() == "]":
+                    czytnik.oczekuj("]")
+                else:
+                    while True:
+                        yield czytnik.wartosc()
+                        if czytnik.oczekuj(",", "]") == "]":
+                            break
+            else:
+                czytnik.wartosc()
+            if czytnik.oczekuj(",", "}") == "}":
+                break
+
+    if not znaleziono:
+        raise BladFormatu()
+
+
+def opis_bledu(blad: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in blad.errors()
+    )
+
+
+class ImportWsadowy:
+    """
+    Import rekrutacji partiami: walidacja przez RekrutacjaCreate, pobranie
+    istniejących ID jednym zapytaniem na partię, wstawienie executemany
+    z pominięciem konfliktów i commit po każdej partii.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        rozmiar_partii: int = ROZMIAR_PARTII,
+        postep: Optional[Callable[[dict], None]] = None,
+    ):
+        self.db = db
+        self.rozmiar_partii = rozmiar_partii
+        self.postep = postep
+        self.imported = 0
+        self.skipped = 0
+        self.przetworzone = 0
+        self.partie = 0
+        self.liczba_bledow = 0
+        self.errors = []
+        self._widziane = set()
+
+    def _blad(self, komunikat: str):
+        self.liczba_bledow += 1
+        if len(self.errors) < MAX_BLEDOW:
+            self.errors.append(komunikat)
+
+    def _zapisz_partie(self, partia: list):
+        zapis = TransakcjaZapisu(self.db)
+        poprawne = {}
+        for item in partia:
+            self.przetworzone += 1
+            id_ref = item.get("id_referencyjne", "unknown") if isinstance(item, dict) else "unknown"
+            try:
+                rekrutacja = RekrutacjaCreate.model_validate(item)
+            except ValidationError as e:
+                self._blad(f"Błąd dla ID {id_ref}: {opis_bledu(e)}")
+                continue
+            if rekrutacja.id_referencyjne in self._widziane:
+                self.skipped += 1
+                continue
+            self._widziane.add(rekrutacja.id_referencyjne)
+            poprawne[rekrutacja.id_referencyjne] = rekrutacja.model_dump()
+
+        if poprawne:
+            istniejace = {
+                id_ref for (id_ref,) in self.db.query(Rekrutacja.id_referencyjne).filter(
+                    Rekrutacja.id_referencyjne.in_(list(poprawne))
+                )
+            }
+            istniejace.update(zajete_w_archiwum(self.db, poprawne))
+            nowe = [wiersz for id_ref, wiersz in poprawne.items() if id_ref not in istniejace]
+            self.skipped += len(istniejace)
+
+            wstawione = {}
+            if nowe:
+                wstawione = {
+                    id_ref: id for id, id_ref in
+                    self.db.connection().execute(insert_pomijajacy_duplikaty(self.db), nowe)
+                }
+            self.skipped += len(nowe) - len(wstawione)
+            self.imported += len(wstawione)
+
+            for wiersz in nowe:
+                if wiersz["id_referencyjne"] in wstawione:
+                    zapis.dodana(SimpleNamespace(id=wstawione[wiersz["id_referencyjne"]], **wiersz))
+        zapis.zatwierdz()
+
+        self.partie += 1
+        if self.postep:
+            self.postep(self.wynik())
+
+    def importuj(self, rekrutacje) -> dict:
+        partia = []
+        for item in rekrutacje:
+            partia.append(item)
+            if len(partia) >= self.rozmiar_partii:
+                self._zapisz_partie(partia)
+                partia = []
+        if partia or not self.partie:
+            self._zapisz_partie(partia)
+        return self.wynik()
+
+    def wynik(self) -> dict:
+        return {
+            "success": True,
+            "imported": self.imported,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "liczba_bledow": self.liczba_bledow,
+            "przetworzone": self.przetworzone,
+            "partie": self.partie,
+        }
+
+
+def importuj_plik(db: Session, plik: BinaryIO, **opcje) -> dict:
+    """Importuje rekrutacje z pliku JSON czytanego strumieniowo"""
+    return ImportWsadowy(db, **opcje).importuj(iteruj_rekrutacje(plik))
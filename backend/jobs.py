@@ -0,0 +1,221 @@
+# Zadania w tle: import z pliku, eksport do pliku, przebudowa agregatów, archiwizacja
+# i migawka KPI
+#
+# Zadania wykonuje pula wątków procesu (ZADANIA_WATKI), a stan, postęp i wynik
+# trafiają do tabeli zadania, więc GET /api/jobs/{id} działa z każdego workera.
+# Import zatwierdza każdą partię osobno - blokada zapisu SQLite trzymana jest
+# tylko na czas jednej partii, a pozostałe żądania obsługiwane są w międzyczasie.
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import BinaryIO, Optional
+
+from sqlalchemy.orm import Session
+
+from backend.archive import archiwizuj
+from backend.cache import podbij_wersje
+from backend.database import SessionLocal, Zadanie
+from backend.exporter import FORMATY, strumien_eksportu
+from backend.importer import BladFormatu, ImportWsadowy, iteruj_rekrutacje
+from backend.rollup import przebuduj_agregaty
+from backend.snapshots import zapisz_migawke
+from backend.stats import filtry_dashboardu
+
+KATALOG_ZADAN = os.getenv("KATALOG_ZADAN", "./zadania")
+ZADANIA_WATKI = int(os.getenv("ZADANIA_WATKI", "2"))
+ODSTEP_POSTEPU = 1.0  # sekundy między zapisami postępu do bazy
+
+ZAKONCZONE = ("zakonczone", "blad")
+
+
+class BladZadania(Exception):
+    """Błąd z komunikatem dla użytkownika, zapisywany w polu blad zadania"""
+
+
+_pula: Optional[ThreadPoolExecutor] = None
+_pula_lock = threading.Lock()
+_zatrzymaj = threading.Event()
+
+
+def _wykonawca() -> ThreadPoolExecutor:
+    global _pula
+    with _pula_lock:
+        if _pula is None:
+            _pula = ThreadPoolExecutor(max_workers=ZADANIA_WATKI, thread_name_prefix="zadanie")
+        return _pula
+
+
+def zamknij_kolejke():
+    """Przerywa trwające zadania przy najbliższym zapisie postępu (zamknięcie serwera)"""
+    global _pula
+    _zatrzymaj.set()
+    with _pula_lock:
+        if _pula is not None:
+            _pula.shutdown(wait=True, cancel_futures=True)
+            _pula = None
+    _zatrzymaj.clear()
+
+
+def przerwij_niedokonczone(db: Session):
+    """Zadania, które nie skończyły się przed restartem serwera, oznacza jako błędne"""
+    db.query(Zadanie).filter(Zadanie.status.notin_(ZAKONCZONE)).update(
+        {
+            Zadanie.status: "blad",
+            Zadanie.blad: "Zadanie przerwane przez restart serwera",
+            Zadanie.zakonczono: datetime.now(),
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def _aktualizuj(id: int, **pola):
+    """Zapis stanu zadania w osobnej, krótkiej transakcji"""
+    with SessionLocal() as db:
+        db.query(Zadanie).filter(Zadanie.id == id).update(pola, synchronize_session=False)
+        db.commit()
+
+
+class _Postep:
+    """Zapisuje postęp najwyżej co ODSTEP_POSTEPU sekund; przerywa zadanie przy zamykaniu serwera"""
+
+    def __init__(self, id: int):
+        self.id = id
+        self.ostatni = None
+        self._czas = 0.0
+
+    def __call__(self, postep: dict, wymus: bool = False):
+        if _zatrzymaj.is_set():
+            raise BladZadania("Zadanie przerwane przez zamknięcie serwera")
+        self.ostatni = postep
+        teraz = time.monotonic()
+        if wymus or teraz - self._czas >= ODSTEP_POSTEPU:
+            self._czas = teraz
+            _aktualizuj(self.id, postep=postep)
+
+
+def _import(db: Session, zadanie: Zadanie, postep: _Postep) -> dict:
+    import_wsadowy = ImportWsadowy(
+        db,
+        rozmiar_partii=zadanie.parametry["rozmiar_partii"],
+        postep=lambda wynik: postep({k: v for k, v in wynik.items() if k != "errors"}),
+    )
+    try:
+        with open(zadanie.plik, "rb") as plik:
+            return import_wsadowy.importuj(iteruj_rekrutacje(plik))
+    except BladFormatu:
+        raise BladZadania("Nieprawidłowy format pliku. Wymagana struktura: {rekrutacje: [...]}")
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise BladZadania(
+            f"Nieprawidłowy format JSON (zaimportowano {import_wsadowy.imported} rekordów przed błędem)"
+        )
+    except BladZadania:
+        raise
+    except Exception as e:
+        raise BladZadania(f"Błąd importu: {str(e)} (zaimportowano {import_wsadowy.imported} rekordów przed błędem)")
+    finally:
+        os.remove(zadanie.plik)
+
+
+def _eksport(db: Session, zadanie: Zadanie, postep: _Postep) -> dict:
+    parametry = zadanie.parametry
+    warunki = filtry_dashboardu(
+        parametry.get("data_od"), parametry.get("data_do"), parametry.get("departament"), parametry.get("collar_type")
+    )
+    media_type, rozszerzenie = FORMATY[parametry["format"]]
+    nazwa_pliku = f"rekrutacje_export_{zadanie.utworzono.strftime('%Y%m%d_%H%M%S')}.{rozszerzenie}"
+    if parametry.get("gzip"):
+        media_type = "application/gzip"
+        nazwa_pliku += ".gz"
+
+    # Zapis do pliku tymczasowego - pod docelową nazwą pojawia się dopiero kompletny wynik
+    sciezka = os.path.join(KATALOG_ZADAN, f"eksport_{zadanie.id}_{nazwa_pliku}")
+    rozmiar = 0
+    try:
+        with open(sciezka + ".part", "wb") as plik:
+            for kawalek in strumien_eksportu(warunki, parametry["format"], parametry.get("gzip", False)):
+                plik.write(kawalek)
+                rozmiar += len(kawalek)
+                postep({"rozmiar": rozmiar})
+        os.replace(sciezka + ".part", sciezka)
+    except BaseException:
+        if os.path.exists(sciezka + ".part"):
+            os.remove(sciezka + ".part")
+        raise
+    zadanie.plik = sciezka
+    return {"rozmiar": rozmiar, "nazwa_pliku": nazwa_pliku, "media_type": media_type}
+
+
+def _agregaty(db: Session, zadanie: Zadanie, postep: _Postep) -> dict:
+    grupy = przebuduj_agregaty(db)
+    podbij_wersje(db)
+    db.commit()
+    return {"success": True, "grupy": grupy}
+
+
+def _archiwizacja(db: Session, zadanie: Zadanie, postep: _Postep) -> dict:
+    przed = date.fromisoformat(zadanie.parametry["przed"])
+    return {"przeniesione": archiwizuj(db, przed, postep), "przed": przed.isoformat()}
+
+
+def _migawka_kpi(db: Session, zadanie: Zadanie, postep: _Postep) -> dict:
+    dzien = date.today()
+    grupy = zapisz_migawke(db, dzien)
+    db.commit()
+    return {"dzien": dzien.isoformat(), "grupy": grupy}
+
+
+WYKONAWCY = {
+    "import": _import,
+    "eksport": _eksport,
+    "agregaty": _agregaty,
+    "archiwizacja": _archiwizacja,
+    "migawka_kpi": _migawka_kpi,
+}
+
+
+def _wykonaj(id: int):
+    with SessionLocal() as db:
+        zadanie = db.get(Zadanie, id)
+        if zadanie is None or zadanie.status != "oczekuje":
+            return
+        zadanie.status = "w_toku"
+        zadanie.rozpoczeto = datetime.now()
+        db.commit()
+
+        postep = _Postep(id)
+        try:
+            wynik = WYKONAWCY[zadanie.typ](db, zadanie, postep)
+        except Exception as e:
+            db.rollback()
+            zadanie.status = "blad"
+            zadanie.blad = str(e) if isinstance(e, BladZadania) else f"Błąd zadania: {str(e)}"
+            zadanie.postep = postep.ostatni
+        else:
+            zadanie.status = "zakonczone"
+            zadanie.wynik = wynik
+            zadanie.postep = postep.ostatni
+        zadanie.zakonczono = datetime.now()
+        db.commit()
+
+
+def zlec(db: Session, typ: str, parametry: dict, plik: Optional[BinaryIO] = None) -> Zadanie:
+    """Zapisuje zadanie (i jego plik wejściowy) w bazie i przekazuje je do puli wątków"""
+    zadanie = Zadanie(typ=typ, status="oczekuje", parametry=parametry)
+    db.add(zadanie)
+    db.flush()
+    if plik is not None:
+        os.makedirs(KATALOG_ZADAN, exist_ok=True)
+        zadanie.plik = os.path.join(KATALOG_ZADAN, f"import_{zadanie.id}.json")
+        with open(zadanie.plik, "wb") as cel:
+            shutil.copyfileobj(plik, cel, 1024 * 1024)
+    elif typ == "eksport":
+        os.makedirs(KATALOG_ZADAN, exist_ok=True)
+    db.commit()
+    db.refresh(zadanie)
+    _wykonawca().submit(_wykonaj, zadanie.id)
+    return zadanie
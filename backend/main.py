@@ -1,43 +1,115 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Query, UploadFile, File
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, Depends, HTTPException, status, Query, UploadFile, File, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.datastructures import QueryParams
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, or_, select
+from contextlib import asynccontextmanager
 from typing import List, Optional
 from datetime import datetime, date
 import os
 import json
+import re
 
-from backend.database import get_db, init_db, Rekrutacja
-from backend.schemas import RekrutacjaCreate, RekrutacjaResponse, RekrutacjaUpdate
+import anyio
 
-app = FastAPI(title="System Statystyk Rekrutacji")
+from backend.database import get_db, get_db_zapis, Rekrutacja, RekrutacjaAgregat, Zadanie
+from backend.database_async import get_async_db, async_engine, AsyncSessionLocal
+from backend.schemas import (
+    RekrutacjaCreate, RekrutacjaResponse, RekrutacjaUpdate, RekrutacjeBatch, RekrutacjeBatchDelete, ZadanieResponse,
+)
+from backend.stats import filtry_dashboardu, statystyki_dashboardu, percentyle_metryk
+from backend.trend import trend_kpi, GRANULACJE
+from backend.pivot import tabela_przestawna, BladPivotu, WYMIARY
+from backend.ranking import ranking, MIARY_RANKINGU, MAX_K
+from backend.columnar import migawka_kolumnowa
+from backend.search import wyszukaj
+from backend.rollup import przebuduj_agregaty
+from backend.archive import siega_archiwum, ze_wszystkich, przywroc, zajete_w_archiwum, horyzont
+from backend.snapshots import kpi_na_dzien, BladMigawki, GRUPOWANIA
+from backend.cache import odpowiedz_z_cache_async, podbij_wersje, pobierz_wersje
+from backend.zapis import TransakcjaZapisu, kopia
+from backend.batch import utworz_wiele, aktualizuj_wiele, usun_wiele
+from backend.importer import ImportWsadowy, BladFormatu, iteruj_rekrutacje, ROZMIAR_PARTII
+from backend.exporter import strumien_eksportu, FORMATY
+from backend.changes import zmiany_od, ostatni_seq, strumien_sse, MAX_ZMIAN
+from backend.jobs import zlec, zamknij_kolejke
+from backend.server import przygotuj_baze, baza_przygotowana
+from backend.pagination import filtry_listy, strona_rekrutacji, BladKursora, SORTOWANIE, STATUSY
+from backend.serializacja import KOLUMNY, OdpowiedzJSON, jako_slowniki
+from backend.assets import Zasoby, MiddlewareGZip
+from backend.metrics import MiddlewareMetryk, rejestr_metryk, profiluj_endpointy_synchroniczne
 
-# Inicjalizacja bazy danych
-init_db()
+# Liczba wątków dla endpointów synchronicznych (zapisy, import, eksport)
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
 
-# Montowanie folderu frontend jako static files
-app.mount("/static", StaticFiles(directory="frontend"), name="static")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    # Uruchomienie bez backend.server (uvicorn backend.main:app, testy) - baza przygotowywana tutaj
+    if not baza_przygotowana():
+        await anyio.to_thread.run_sync(przygotuj_baze)
+    yield
+    await anyio.to_thread.run_sync(zamknij_kolejke)
+    await async_engine.dispose()
 
-@app.get("/")
-async def root():
+
+# Odpowiedzi, których MiddlewareGZip nie kompresuje, rozpoznawane po samym żądaniu: strumień
+# zdarzeń (kompresor buforowałby zdarzenia), pliki frontendu (Zasoby mają własne warianty
+# gzip/brotli) i pliki już skompresowane (eksport z gzip=true, pliki wynikowe zadań)
+_STRONY_FRONTENDU = ("/", "/dashboard")
+_WYNIK_ZADANIA = re.compile(r"/api/jobs/\d+/wynik")
+_PRAWDA = ("1", "true", "t", "yes", "y", "on")  # wartości bool akceptowane w parametrach zapytań
+
+
+def bez_kompresji(scope) -> bool:
+    sciezka = scope["path"]
+    if sciezka == "/api/export":
+        return QueryParams(scope["query_string"]).get("gzip", "").lower() in _PRAWDA
+    return (
+        sciezka == "/api/changes/stream"
+        or sciezka in _STRONY_FRONTENDU
+        or sciezka.startswith("/static/")
+        or _WYNIK_ZADANIA.fullmatch(sciezka) is not None
+    )
+
+
+app = FastAPI(title="System Statystyk Rekrutacji", lifespan=lifespan)
+app.add_middleware(MiddlewareGZip, minimum_size=1024, compresslevel=6, pomin=bez_kompresji)
+app.add_middleware(MiddlewareMetryk)
+
+# Pliki frontendu wczytane przy starcie (nazwy z hashem, warianty gzip/brotli)
+zasoby = Zasoby("frontend")
+
+
+@app.get("/", include_in_schema=False)
+async def root(request: Request):
     """Serwuje główną stronę aplikacji"""
-    return FileResponse("frontend/index.html")
+    return zasoby.odpowiedz(request, "index.html")
 
 
-@app.get("/dashboard")
-async def dashboard():
+@app.get("/dashboard", include_in_schema=False)
+async def dashboard(request: Request):
     """Serwuje stronę dashboardu"""
-    return FileResponse("frontend/dashboard.html")
+    return zasoby.odpowiedz(request, "dashboard.html")
+
+
+@app.api_route("/static/{sciezka:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def static(sciezka: str, request: Request):
+    """Pliki frontendu; adresy z hashem treści są cache'owane bezterminowo"""
+    odpowiedz = zasoby.odpowiedz(request, sciezka)
+    if odpowiedz is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plik nie został znaleziony")
+    return odpowiedz
 
 
 @app.post("/api/rekrutacje", response_model=RekrutacjaResponse, status_code=status.HTTP_201_CREATED)
-def create_rekrutacja(rekrutacja: RekrutacjaCreate, db: Session = Depends(get_db)):
+def create_rekrutacja(rekrutacja: RekrutacjaCreate, db: Session = Depends(get_db_zapis)):
     """Tworzy nową rekrutację"""
     # Sprawdź czy ID referencyjne już istnieje
     existing = db.query(Rekrutacja).filter(Rekrutacja.id_referencyjne == rekrutacja.id_referencyjne).first()
-    if existing:
+    if existing or zajete_w_archiwum(db, [rekrutacja.id_referencyjne]):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Rekrutacja z ID referencyjnym {rekrutacja.id_referencyjne} już istnieje"
@@ -45,351 +117,593 @@ def create_rekrutacja(rekrutacja: RekrutacjaCreate, db: Session = Depends(get_db
     
     db_rekrutacja = Rekrutacja(**rekrutacja.model_dump())
     db.add(db_rekrutacja)
-    db.commit()
+    db.flush()
+
+    zapis = TransakcjaZapisu(db)
+    zapis.dodana(db_rekrutacja)
+    zapis.zatwierdz()
     db.refresh(db_rekrutacja)
     return db_rekrutacja
 
 
+@app.post("/api/rekrutacje/batch")
+def create_rekrutacje_batch(batch: RekrutacjeBatch, db: Session = Depends(get_db_zapis)):
+    """Tworzy wiele rekrutacji w jednej transakcji; błędne elementy zwracane są w errors"""
+    return utworz_wiele(db, batch.rekrutacje)
+
+
+@app.patch("/api/rekrutacje/batch")
+def update_rekrutacje_batch(batch: RekrutacjeBatch, db: Session = Depends(get_db_zapis)):
+    """Aktualizuje wiele rekrutacji (klucz: id lub id_referencyjne) w jednej transakcji"""
+    return aktualizuj_wiele(db, batch.rekrutacje)
+
+
+@app.delete("/api/rekrutacje/batch")
+def delete_rekrutacje_batch(batch: RekrutacjeBatchDelete, db: Session = Depends(get_db_zapis)):
+    """Usuwa wiele rekrutacji po ID lub ID referencyjnych w jednej transakcji"""
+    if not batch.ids and not batch.id_referencyjne:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Podaj ids lub id_referencyjne rekrutacji do usunięcia"
+        )
+    return usun_wiele(db, batch.ids, batch.id_referencyjne)
+
+
 @app.get("/api/rekrutacje", response_model=List[RekrutacjaResponse])
-def list_rekrutacje(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Zwraca listę wszystkich rekrutacji"""
-    rekrutacje = db.query(Rekrutacja).offset(skip).limit(limit).all()
-    return rekrutacje
+async def list_rekrutacje(
+    skip: int = Query(0, ge=0, description="Przesunięcie (zamiast kursora, wolne dla dalekich stron)"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Kursor z nagłówka X-Next-Cursor poprzedniej strony"),
+    sort: str = Query("id", pattern="^(" + "|".join(SORTOWANIE) + ")$", description="Kolumna sortowania"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="Kierunek sortowania"),
+    departament: Optional[str] = Query(None, description="Filtr po departamencie"),
+    dzial: Optional[str] = Query(None, description="Filtr po dziale"),
+    collar_type: Optional[str] = Query(None, description="Filtr po typie collar"),
+    status_rekrutacji: Optional[str] = Query(
+        None, alias="status", pattern="^(" + "|".join(STATUSY) + ")$", description="Status rekrutacji"
+    ),
+    hiring_manager: Optional[str] = Query(None, description="Filtr po hiring managerze"),
+    data_od: Optional[date] = Query(None, description="Data otwarcia od (YYYY-MM-DD)"),
+    data_do: Optional[date] = Query(None, description="Data otwarcia do (YYYY-MM-DD)"),
+    ttf_min: Optional[int] = Query(None, description="Minimalny TTF (dni)"),
+    ttf_max: Optional[int] = Query(None, description="Maksymalny TTF (dni)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Zwraca stronę rekrutacji; kursor następnej strony w nagłówku X-Next-Cursor"""
+    warunki = filtry_listy(
+        departament, dzial, collar_type, status_rekrutacji, hiring_manager, data_od, data_do, ttf_min, ttf_max
+    )
+
+    def strona(db: Session):
+        archiwum = siega_archiwum(db, data_od, status_rekrutacji)
+        return strona_rekrutacji(db, warunki, sort, order, limit, cursor, skip, archiwum)
+
+    try:
+        rekrutacje, next_cursor = await db.run_sync(strona)
+    except BladKursora as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    odpowiedz = OdpowiedzJSON(jako_slowniki(rekrutacje))
+    if next_cursor:
+        odpowiedz.headers["X-Next-Cursor"] = next_cursor
+    return odpowiedz
+
+
+@app.get("/api/rekrutacje/szukaj", response_model=List[RekrutacjaResponse])
+async def search_rekrutacje(
+    q: str = Query(..., min_length=1, max_length=200, description="Słowa w stanowisku, hiring managerze, komentarzu lub polu replacement"),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0, description="Wartość nagłówka X-Next-Offset poprzedniej strony"),
+    departament: Optional[str] = Query(None, description="Filtr po departamencie"),
+    dzial: Optional[str] = Query(None, description="Filtr po dziale"),
+    collar_type: Optional[str] = Query(None, description="Filtr po typie collar"),
+    status_rekrutacji: Optional[str] = Query(
+        None, alias="status", pattern="^(" + "|".join(STATUSY) + ")$", description="Status rekrutacji"
+    ),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Wyszukiwanie pełnotekstowe rekrutacji, od najlepiej dopasowanych"""
+    warunki = filtry_listy(departament, dzial, collar_type, status_rekrutacji)
+
+    def szukaj(db: Session):
+        return wyszukaj(db, q, warunki, limit, offset, siega_archiwum(db, status=status_rekrutacji))
+
+    rekrutacje, next_offset = await db.run_sync(szukaj)
+    odpowiedz = OdpowiedzJSON(jako_slowniki(rekrutacje))
+    if next_offset is not None:
+        odpowiedz.headers["X-Next-Offset"] = str(next_offset)
+    return odpowiedz
 
 
 @app.get("/api/rekrutacje/{rekrutacja_id}", response_model=RekrutacjaResponse)
-def get_rekrutacja(rekrutacja_id: int, db: Session = Depends(get_db)):
-    """Zwraca szczegóły pojedynczej rekrutacji"""
-    rekrutacja = db.query(Rekrutacja).filter(Rekrutacja.id == rekrutacja_id).first()
+async def get_rekrutacja(rekrutacja_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Zwraca szczegóły pojedynczej rekrutacji (także z archiwum)"""
+    rekrutacja = (await db.execute(ze_wszystkich(select(*KOLUMNY).where(Rekrutacja.id == rekrutacja_id)))).first()
     if not rekrutacja:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Rekrutacja z ID {rekrutacja_id} nie została znaleziona"
         )
-    return rekrutacja
+    return OdpowiedzJSON(jako_slowniki([rekrutacja])[0])
 
 
 @app.put("/api/rekrutacje/{rekrutacja_id}", response_model=RekrutacjaResponse)
-def update_rekrutacja(rekrutacja_id: int, rekrutacja_update: RekrutacjaUpdate, db: Session = Depends(get_db)):
+def update_rekrutacja(rekrutacja_id: int, rekrutacja_update: RekrutacjaUpdate, db: Session = Depends(get_db_zapis)):
     """Aktualizuje istniejącą rekrutację"""
-    rekrutacja = db.query(Rekrutacja).filter(Rekrutacja.id == rekrutacja_id).first()
+    przywroc(db, ids=[rekrutacja_id])
+    # Blokada wiersza - stan sprzed zmiany dla agregatów i dziennika nie może się zmienić do commit
+    rekrutacja = db.query(Rekrutacja).filter(Rekrutacja.id == rekrutacja_id).with_for_update().first()
     if not rekrutacja:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Rekrutacja z ID {rekrutacja_id} nie została znaleziona"
         )
     
+    zapis = TransakcjaZapisu(db)
+    stara = kopia(rekrutacja)
+
     update_data = rekrutacja_update.model_dump(exclude_unset=True)
+    nowe_id_referencyjne = update_data.get("id_referencyjne")
+    if nowe_id_referencyjne and zajete_w_archiwum(db, [nowe_id_referencyjne]):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Rekrutacja z ID referencyjnym {nowe_id_referencyjne} już istnieje"
+        )
     for field, value in update_data.items():
         setattr(rekrutacja, field, value)
     
-    db.commit()
+    zapis.zmieniona(stara, rekrutacja)
+    zapis.zatwierdz()
     db.refresh(rekrutacja)
     return rekrutacja
 
 
 @app.delete("/api/rekrutacje/{rekrutacja_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_rekrutacja(rekrutacja_id: int, db: Session = Depends(get_db)):
+def delete_rekrutacja(rekrutacja_id: int, db: Session = Depends(get_db_zapis)):
     """Usuwa rekrutację"""
-    rekrutacja = db.query(Rekrutacja).filter(Rekrutacja.id == rekrutacja_id).first()
+    przywroc(db, ids=[rekrutacja_id])
+    rekrutacja = db.query(Rekrutacja).filter(Rekrutacja.id == rekrutacja_id).with_for_update().first()
     if not rekrutacja:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Rekrutacja z ID {rekrutacja_id} nie została znaleziona"
         )
     
+    zapis = TransakcjaZapisu(db)
+    zapis.usunieta(rekrutacja)
     db.delete(rekrutacja)
-    db.commit()
+    zapis.zatwierdz()
     return None
 
 
 @app.get("/api/statystyki")
-def get_statystyki(db: Session = Depends(get_db)):
+async def get_statystyki(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Zwraca podstawowe statystyki rekrutacji"""
-    total_rekrutacje = db.query(Rekrutacja).count()
-    otwarte = db.query(Rekrutacja).filter(Rekrutacja.data_zamkniecia.is_(None)).count()
-    zamkniete = db.query(Rekrutacja).filter(Rekrutacja.data_zamkniecia.isnot(None)).count()
-    
-    return {
-        "total_rekrutacje": total_rekrutacje,
-        "otwarte": otwarte,
-        "zamkniete": zamkniete,
-    }
+    def oblicz(db: Session):
+        # Z tabeli agregatów - obejmuje archiwum, a koszt nie rośnie z liczbą rekrutacji
+        total_rekrutacje, otwarte = db.query(
+            func.coalesce(func.sum(RekrutacjaAgregat.liczba_rekrutacji), 0),
+            func.coalesce(func.sum(RekrutacjaAgregat.otwarte), 0),
+        ).one()
+        return {
+            "total_rekrutacje": total_rekrutacje,
+            "otwarte": otwarte,
+            "zamkniete": total_rekrutacje - otwarte,
+        }
+
+    return await odpowiedz_z_cache_async(request, db, "statystyki", {}, oblicz)
 
 
 @app.get("/api/dashboard")
-def get_dashboard_stats(
+async def get_dashboard_stats(
+    request: Request,
+    data_od: Optional[date] = Query(None, description="Data początkowa (YYYY-MM-DD)"),
+    data_do: Optional[date] = Query(None, description="Data końcowa (YYYY-MM-DD)"),
+    departament: Optional[str] = Query(None, description="Filtr po departamencie"),
+    collar_type: Optional[str] = Query(None, description="Filtr po typie collar"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Zwraca zaawansowane statystyki dla dashboardu zarządczego
+    """
+    filtry = {"data_od": data_od, "data_do": data_do, "departament": departament, "collar_type": collar_type}
+    if migawka_kolumnowa is not None:
+        async def oblicz():
+            return await anyio.to_thread.run_sync(migawka_kolumnowa.statystyki_aktualne, filtry)
+    else:
+        def oblicz(db: Session):
+            return statystyki_dashboardu(db, **filtry)
+
+    return await odpowiedz_z_cache_async(request, db, "dashboard", filtry, oblicz)
+
+
+@app.get("/api/dashboard/percentyle")
+async def get_dashboard_percentyle(
+    request: Request,
+    data_od: Optional[date] = Query(None, description="Data początkowa (YYYY-MM-DD)"),
+    data_do: Optional[date] = Query(None, description="Data końcowa (YYYY-MM-DD)"),
+    departament: Optional[str] = Query(None, description="Filtr po departamencie"),
+    collar_type: Optional[str] = Query(None, description="Filtr po typie collar"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Zwraca percentyle p50/p75/p90/p95 dla TTF, TTO i czasu otwarcia
+    """
+    filtry = {"data_od": data_od, "data_do": data_do, "departament": departament, "collar_type": collar_type}
+    return await odpowiedz_z_cache_async(
+        request, db, "percentyle", filtry,
+        lambda db: percentyle_metryk(db, filtry_dashboardu(**filtry), archiwum=siega_archiwum(db, data_od)),
+    )
+
+
+@app.get("/api/dashboard/trend")
+async def get_dashboard_trend(
+    request: Request,
+    granularity: str = Query("month", pattern="^(" + "|".join(GRANULACJE) + ")$", description="week, month lub quarter"),
     data_od: Optional[str] = Query(None, description="Data początkowa (YYYY-MM-DD)"),
     data_do: Optional[str] = Query(None, description="Data końcowa (YYYY-MM-DD)"),
     departament: Optional[str] = Query(None, description="Filtr po departamencie"),
     collar_type: Optional[str] = Query(None, description="Filtr po typie collar"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Zwraca zaawansowane statystyki dla dashboardu zarządczego
+    Zwraca KPI w kolejnych tygodniach, miesiącach lub kwartałach
     """
-    
-    # Budowanie zapytania z filtrami
-    query = db.query(Rekrutacja)
-    
-    if data_od:
-        query = query.filter(Rekrutacja.data_otwarcia >= data_od)
-    if data_do:
-        query = query.filter(Rekrutacja.data_otwarcia <= data_do)
-    if departament:
-        query = query.filter(Rekrutacja.departament == departament)
-    if collar_type:
-        query = query.filter(Rekrutacja.collar_type == collar_type)
-    
-    rekrutacje = query.all()
-    
-    if not rekrutacje:
-        return {
-            "message": "Brak danych dla wybranych filtrów",
-            "total_rekrutacje": 0
-        }
-    
-    # Obliczanie metryk
-    total = len(rekrutacje)
-    otwarte = sum(1 for r in rekrutacje if not r.data_zamkniecia)
-    zamkniete = sum(1 for r in rekrutacje if r.data_zamkniecia)
-    z_zatrudnieniem = sum(1 for r in rekrutacje if r.data_zatrudnienia)
-    
-    # TTF i TTO
-    ttf_values = [r.ttf for r in rekrutacje if r.ttf is not None]
-    tto_values = [r.tto for r in rekrutacje if r.tto is not None]
-    czas_otwarcia_values = [r.czas_otwarcia for r in rekrutacje if r.czas_otwarcia is not None]
-    
-    avg_ttf = round(sum(ttf_values) / len(ttf_values), 1) if ttf_values else None
-    median_ttf = sorted(ttf_values)[len(ttf_values)//2] if ttf_values else None
-    avg_tto = round(sum(tto_values) / len(tto_values), 1) if tto_values else None
-    median_tto = sorted(tto_values)[len(tto_values)//2] if tto_values else None
-    avg_czas_otwarcia = round(sum(czas_otwarcia_values) / len(czas_otwarcia_values), 1) if czas_otwarcia_values else None
-    
-    # Wskaźniki konwersji
-    total_cv = sum(r.liczba_cv_otrzymana for r in rekrutacje)
-    total_cv_odrzucone = sum(r.liczba_cv_odrzucone_rekruter for r in rekrutacje)
-    total_spotkan_rekruter = sum(r.liczba_spotkan_rekruter for r in rekrutacje)
-    total_spotkan_hm = sum(r.liczba_spotkan_hiring_manager for r in rekrutacje)
-    total_ofert = sum(r.liczba_zlozonych_ofert for r in rekrutacje)
-    total_zatrudnionych = sum(r.liczba_zatrudnionych for r in rekrutacje)
-    total_ofert_odrzuconych = sum(r.liczba_odrzuconych_ofert_przez_kandydata for r in rekrutacje)
-    
-    # Wskaźnik akceptacji ofert
-    offer_acceptance_rate = round((total_zatrudnionych / total_ofert * 100), 2) if total_ofert > 0 else 0
-    
-    # Konwersja CV -> Spotkania
-    cv_to_interview_rate = round(((total_spotkan_rekruter + total_spotkan_hm) / total_cv * 100), 2) if total_cv > 0 else 0
-    
-    # Konwersja Spotkania -> Oferty
-    interview_to_offer_rate = round((total_ofert / (total_spotkan_rekruter + total_spotkan_hm) * 100), 2) if (total_spotkan_rekruter + total_spotkan_hm) > 0 else 0
-    
-    # Statystyki po departamentach
-    departamenty_stats = {}
-    for r in rekrutacje:
-        if r.departament not in departamenty_stats:
-            departamenty_stats[r.departament] = {
-                "total": 0,
-                "otwarte": 0,
-                "zamkniete": 0,
-                "z_zatrudnieniem": 0
-            }
-        departamenty_stats[r.departament]["total"] += 1
-        if not r.data_zamkniecia:
-            departamenty_stats[r.departament]["otwarte"] += 1
-        if r.data_zamkniecia:
-            departamenty_stats[r.departament]["zamkniete"] += 1
-        if r.data_zatrudnienia:
-            departamenty_stats[r.departament]["z_zatrudnieniem"] += 1
-    
-    # Statystyki po przyczynach
-    przyczyny_stats = {}
-    for r in rekrutacje:
-        przyczyna = r.przyczyna_rekrutacji
-        przyczyny_stats[przyczyna] = przyczyny_stats.get(przyczyna, 0) + 1
-    
-    # Statystyki White vs Blue Collar
-    white_collar = sum(1 for r in rekrutacje if r.collar_type == "White")
-    blue_collar = sum(1 for r in rekrutacje if r.collar_type == "Blue")
-    
-    # Statystyki Manager vs Non-Manager
-    managers = sum(1 for r in rekrutacje if r.czy_manager)
-    non_managers = sum(1 for r in rekrutacje if not r.czy_manager)
-    
-    # Statystyki źródeł rekrutacji
-    zrodla_stats = {}
-    for r in rekrutacje:
-        if r.typ_zatrudnienia:
-            zrodla = r.typ_zatrudnienia
-            zrodla_stats[zrodla] = zrodla_stats.get(zrodla, 0) + 1
-    
-    # Wskaźnik skuteczności rekrutacji (% rekrutacji zakończonych zatrudnieniem)
-    success_rate = round((z_zatrudnieniem / zamkniete * 100), 2) if zamkniete > 0 else 0
-    
-    # Wskaźnik rotacji (replacement vs new position)
-    replacement_count = sum(1 for r in rekrutacje if r.przyczyna_rekrutacji == "Replacement")
-    wskaznik_rotacji = round((replacement_count / total * 100), 2) if total > 0 else 0
-    
-    # Cost per hire (średnia liczba spotkań jako proxy dla kosztu)
-    avg_spotkan_na_zatrudnienie = round(
-        ((total_spotkan_rekruter + total_spotkan_hm) / total_zatrudnionych), 2
-    ) if total_zatrudnionych > 0 else 0
-    
-    return {
-        # Podstawowe metryki
-        "total_rekrutacje": total,
-        "otwarte": otwarte,
-        "zamkniete": zamkniete,
-        "z_zatrudnieniem": z_zatrudnieniem,
-        
-        # Time metrics
-        "avg_ttf": avg_ttf,
-        "median_ttf": median_ttf,
-        "avg_tto": avg_tto,
-        "median_tto": median_tto,
-        "avg_czas_otwarcia": avg_czas_otwarcia,
-        
-        # Wskaźniki konwersji
-        "total_cv_otrzymane": total_cv,
-        "total_cv_odrzucone": total_cv_odrzucone,
-        "total_spotkan": total_spotkan_rekruter + total_spotkan_hm,
-        "total_ofert_zlozonych": total_ofert,
-        "total_zatrudnionych": total_zatrudnionych,
-        "total_ofert_odrzuconych_przez_kandydata": total_ofert_odrzuconych,
-        
-        "offer_acceptance_rate": offer_acceptance_rate,
-        "cv_to_interview_rate": cv_to_interview_rate,
-        "interview_to_offer_rate": interview_to_offer_rate,
-        "success_rate": success_rate,
-        "wskaznik_rotacji": wskaznik_rotacji,
-        "avg_spotkan_na_zatrudnienie": avg_spotkan_na_zatrudnienie,
-        
-        # Rozbicie na kategorie
-        "white_collar": white_collar,
-        "blue_collar": blue_collar,
-        "managers": managers,
-        "non_managers": non_managers,
-        
-        # Statystyki szczegółowe
-        "departamenty": departamenty_stats,
-        "przyczyny": przyczyny_stats,
-        "zrodla_rekrutacji": zrodla_stats,
+    filtry = {"data_od": data_od, "data_do": data_do, "departament": departament, "collar_type": collar_type}
+    return await odpowiedz_z_cache_async(
+        request, db, "trend", {"granularity": granularity, **filtry},
+        lambda db: trend_kpi(db, granularity, **filtry),
+    )
+
+
+@app.get("/api/dashboard/na_dzien")
+async def get_dashboard_na_dzien(
+    dzien: Optional[date] = Query(None, description="Dzień YYYY-MM-DD (domyślnie dziś)"),
+    porownaj_z: Optional[date] = Query(None, description="Dzień YYYY-MM-DD do porównania (zmiana KPI)"),
+    departament: Optional[str] = Query(None, description="Filtr po departamencie"),
+    collar_type: Optional[str] = Query(None, description="Filtr po typie collar"),
+    grupuj: Optional[str] = Query(
+        None, pattern="^(" + "|".join(GRUPOWANIA) + ")$", description="Osobno dla każdego departamentu lub collar"
+    ),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Zwraca KPI dashboardu z dziennej migawki i ich zmianę względem innego dnia
+    """
+    def oblicz(db: Session):
+        return kpi_na_dzien(db, dzien, porownaj_z, departament, collar_type, grupuj)
+
+    try:
+        return await db.run_sync(oblicz)
+    except BladMigawki as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@app.get("/api/pivot")
+async def get_pivot(
+    request: Request,
+    wymiary: str = Query("", description="Wymiary rozdzielone przecinkami, np. departament,dzial"),
+    miary: str = Query("count", description="Miary rozdzielone przecinkami, np. count,avg_ttf,offer_acceptance_rate"),
+    rollup: bool = Query(False, description="Dodaj sumy częściowe i sumę całkowitą"),
+    departament: Optional[str] = Query(None, description="Filtr po departamencie"),
+    dzial: Optional[str] = Query(None, description="Filtr po dziale"),
+    collar_type: Optional[str] = Query(None, description="Filtr po typie collar"),
+    status_rekrutacji: Optional[str] = Query(
+        None, alias="status", pattern="^(" + "|".join(STATUSY) + ")$", description="Status rekrutacji"
+    ),
+    hiring_manager: Optional[str] = Query(None, description="Filtr po hiring managerze"),
+    data_od: Optional[date] = Query(None, description="Data otwarcia od (YYYY-MM-DD)"),
+    data_do: Optional[date] = Query(None, description="Data otwarcia do (YYYY-MM-DD)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Tabela przestawna: grupowanie po dowolnych wymiarach i wybrane miary
+    """
+    filtry = {
+        "departament": departament, "dzial": dzial, "collar_type": collar_type, "status": status_rekrutacji,
+        "hiring_manager": hiring_manager, "data_od": data_od, "data_do": data_do,
+    }
+    warunki = filtry_listy(**filtry)
+
+    def oblicz(db: Session):
+        try:
+            archiwum = siega_archiwum(db, data_od, status_rekrutacji)
+            return tabela_przestawna(db, wymiary, miary, warunki, rollup, archiwum)
+        except BladPivotu as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return await odpowiedz_z_cache_async(
+        request, db, "pivot", {"wymiary": wymiary, "miary": miary, "rollup": rollup, **filtry}, oblicz
+    )
+
+
+@app.get("/api/ranking")
+async def get_ranking(
+    request: Request,
+    wymiar: str = Query(
+        "hiring_manager", pattern="^(" + "|".join(WYMIARY) + ")$", description="Wymiar, np. hiring_manager"
+    ),
+    miara: str = Query(
+        "avg_ttf", pattern="^(" + "|".join(MIARY_RANKINGU) + ")$", description="Miara, np. avg_ttf, otwarte_90_plus"
+    ),
+    k: int = Query(10, ge=1, le=MAX_K, description="Liczba pozycji"),
+    order: str = Query("desc", pattern="^(asc|desc)$", description="desc - najwyższe wartości, asc - najniższe"),
+    min_rekrutacji: int = Query(1, ge=1, description="Pomiń grupy z mniejszą liczbą rekrutacji"),
+    departament: Optional[str] = Query(None, description="Filtr po departamencie"),
+    dzial: Optional[str] = Query(None, description="Filtr po dziale"),
+    collar_type: Optional[str] = Query(None, description="Filtr po typie collar"),
+    status_rekrutacji: Optional[str] = Query(
+        None, alias="status", pattern="^(" + "|".join(STATUSY) + ")$", description="Status rekrutacji"
+    ),
+    hiring_manager: Optional[str] = Query(None, description="Filtr po hiring managerze"),
+    data_od: Optional[date] = Query(None, description="Data otwarcia od (YYYY-MM-DD)"),
+    data_do: Optional[date] = Query(None, description="Data otwarcia do (YYYY-MM-DD)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Ranking top/bottom-K grup wymiaru według miary i wiek otwartych rekrutacji
+    """
+    filtry = {
+        "departament": departament, "dzial": dzial, "collar_type": collar_type, "status": status_rekrutacji,
+        "hiring_manager": hiring_manager, "data_od": data_od, "data_do": data_do,
     }
+    warunki = filtry_listy(**filtry)
+    dzisiaj = date.today()
+
+    def oblicz(db: Session):
+        archiwum = siega_archiwum(db, data_od, status_rekrutacji)
+        return ranking(db, wymiar, miara, warunki, k, order, min_rekrutacji, archiwum, dzisiaj)
+
+    # Wiek otwartych rekrutacji zależy od dnia, nie tylko od wersji danych
+    parametry = {
+        "wymiar": wymiar, "miara": miara, "k": k, "order": order, "min_rekrutacji": min_rekrutacji,
+        "dzien": dzisiaj, **filtry,
+    }
+    return await odpowiedz_z_cache_async(request, db, "ranking", parametry, oblicz)
+
+
+@app.post("/api/agregaty/przebuduj")
+def rebuild_agregaty(db: Session = Depends(get_db_zapis)):
+    """Odtwarza tabelę agregatów dashboardu z tabeli rekrutacji"""
+    grupy = przebuduj_agregaty(db)
+    podbij_wersje(db)
+    db.commit()
+    return {"success": True, "grupy": grupy}
 
 
 @app.get("/api/filtry")
-def get_filtry(db: Session = Depends(get_db)):
+async def get_filtry(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Zwraca dostępne wartości dla filtrów"""
-    departamenty = db.query(Rekrutacja.departament).distinct().all()
-    dzialy = db.query(Rekrutacja.dzial).distinct().all()
-    collar_types = db.query(Rekrutacja.collar_type).distinct().all()
-    
-    return {
-        "departamenty": [d[0] for d in departamenty if d[0]],
-        "dzialy": [d[0] for d in dzialy if d[0]],
-        "collar_types": [c[0] for c in collar_types if c[0]]
-    }
+    def oblicz(db: Session):
+        archiwum = siega_archiwum(db)
+
+        def wartosci(kolumna):
+            zapytanie = select(kolumna).distinct().order_by(kolumna)
+            return [w for (w,) in db.execute(ze_wszystkich(zapytanie) if archiwum else zapytanie) if w]
+
+        return {
+            "departamenty": wartosci(Rekrutacja.departament),
+            "dzialy": wartosci(Rekrutacja.dzial),
+            "collar_types": wartosci(Rekrutacja.collar_type)
+        }
+
+    return await odpowiedz_z_cache_async(request, db, "filtry", {}, oblicz)
 
 
 @app.get("/api/export")
-def export_data(db: Session = Depends(get_db)):
-    """Eksportuje wszystkie dane rekrutacji do JSON"""
-    rekrutacje = db.query(Rekrutacja).all()
-    
-    data = []
-    for r in rekrutacje:
-        data.append({
-            "id_referencyjne": r.id_referencyjne,
-            "przyczyna_rekrutacji": r.przyczyna_rekrutacji,
-            "replacement_za_kogo": r.replacement_za_kogo,
-            "collar_type": r.collar_type,
-            "czy_manager": r.czy_manager,
-            "departament": r.departament,
-            "dzial": r.dzial,
-            "stanowisko": r.stanowisko,
-            "miejsce_pracy": r.miejsce_pracy,
-            "hiring_manager": r.hiring_manager,
-            "data_otwarcia": r.data_otwarcia.isoformat() if r.data_otwarcia else None,
-            "liczba_cv_otrzymana": r.liczba_cv_otrzymana,
-            "liczba_cv_odrzucone_rekruter": r.liczba_cv_odrzucone_rekruter,
-            "liczba_spotkan_rekruter": r.liczba_spotkan_rekruter,
-            "liczba_spotkan_hiring_manager": r.liczba_spotkan_hiring_manager,
-            "data_zamkniecia": r.data_zamkniecia.isoformat() if r.data_zamkniecia else None,
-            "data_zatrudnienia": r.data_zatrudnienia.isoformat() if r.data_zatrudnienia else None,
-            "typ_zatrudnienia": r.typ_zatrudnienia,
-            "liczba_zatrudnionych": r.liczba_zatrudnionych,
-            "liczba_odrzuconych_ofert_przez_kandydata": r.liczba_odrzuconych_ofert_przez_kandydata,
-            "liczba_zlozonych_ofert": r.liczba_zlozonych_ofert,
-            "komentarz": r.komentarz,
-            "plec": r.plec
-        })
-    
-    return JSONResponse(
-        content={"rekrutacje": data, "exported_at": datetime.now().isoformat()},
+def export_data(
+    format: str = Query("json", pattern="^(json|ndjson|csv)$", description="Format: json, ndjson lub csv"),
+    gzip: bool = Query(False, description="Kompresja gzip pliku wynikowego"),
+    data_od: Optional[str] = Query(None, description="Data początkowa (YYYY-MM-DD)"),
+    data_do: Optional[str] = Query(None, description="Data końcowa (YYYY-MM-DD)"),
+    departament: Optional[str] = Query(None, description="Filtr po departamencie"),
+    collar_type: Optional[str] = Query(None, description="Filtr po typie collar"),
+    db: Session = Depends(get_db),
+):
+    """Eksportuje dane rekrutacji strumieniowo (JSON, NDJSON lub CSV)"""
+    warunki = filtry_dashboardu(data_od, data_do, departament, collar_type)
+    media_type, rozszerzenie = FORMATY[format]
+    nazwa_pliku = f"rekrutacje_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{rozszerzenie}"
+    if gzip:
+        media_type = "application/gzip"
+        nazwa_pliku += ".gz"
+
+    return StreamingResponse(
+        strumien_eksportu(warunki, format, gzip),
+        media_type=media_type,
         headers={
-            "Content-Disposition": f"attachment; filename=rekrutacje_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            "Content-Disposition": f"attachment; filename={nazwa_pliku}",
+            # Punkt startowy synchronizacji przyrostowej: dalsze zmiany z /api/changes?since=...
+            "X-Changes-Since": str(ostatni_seq(db)),
         }
     )
 
 
 @app.post("/api/import")
-async def import_data(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    """Importuje dane rekrutacji z pliku JSON"""
+def import_data(
+    file: UploadFile = File(...),
+    rozmiar_partii: int = Query(ROZMIAR_PARTII, ge=1, le=50000, description="Liczba rekordów na transakcję"),
+    db: Session = Depends(get_db_zapis)
+):
+    """Importuje dane rekrutacji z pliku JSON (strumieniowo, partiami)"""
+    import_wsadowy = ImportWsadowy(db, rozmiar_partii=rozmiar_partii)
     try:
-        content = await file.read()
-        data = json.loads(content)
-        
-        if "rekrutacje" not in data:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Nieprawidłowy format pliku. Wymagana struktura: {rekrutacje: [...]}"
-            )
-        
-        imported = 0
-        skipped = 0
-        errors = []
-        
-        for item in data["rekrutacje"]:
-            try:
-                # Sprawdź czy rekrutacja z tym ID już istnieje
-                existing = db.query(Rekrutacja).filter(
-                    Rekrutacja.id_referencyjne == item["id_referencyjne"]
-                ).first()
-                
-                if existing:
-                    skipped += 1
-                    continue
-                
-                # Utwórz nową rekrutację
-                rekrutacja = Rekrutacja(**item)
-                db.add(rekrutacja)
-                imported += 1
-                
-            except Exception as e:
-                errors.append(f"Błąd dla ID {item.get('id_referencyjne', 'unknown')}: {str(e)}")
-        
-        db.commit()
-        
-        return {
-            "success": True,
-            "imported": imported,
-            "skipped": skipped,
-            "errors": errors
-        }
-        
-    except json.JSONDecodeError:
+        return import_wsadowy.importuj(iteruj_rekrutacje(file.file))
+
+    except BladFormatu:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Nieprawidłowy format pliku. Wymagana struktura: {rekrutacje: [...]}"
+        )
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Nieprawidłowy format JSON"
+            detail=f"Nieprawidłowy format JSON (zaimportowano {import_wsadowy.imported} rekordów przed błędem)"
         )
     except Exception as e:
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Błąd importu: {str(e)}"
+            detail=f"Błąd importu: {str(e)} (zaimportowano {import_wsadowy.imported} rekordów przed błędem)"
         )
 
 
+@app.get("/api/changes")
+async def get_changes(
+    since: int = Query(0, ge=0, description="Numer seq ostatniej przetworzonej zmiany"),
+    limit: int = Query(1000, ge=1, le=MAX_ZMIAN),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Zmiany rekrutacji (insert/update/delete) po numerze seq, w kolejności zapisu"""
+    zmiany, wiecej = await db.run_sync(zmiany_od, since, limit)
+    odpowiedz = OdpowiedzJSON(zmiany)
+    if wiecej:
+        odpowiedz.headers["X-Next-Since"] = str(zmiany[-1]["seq"])
+    return odpowiedz
+
+
+@app.get("/api/changes/stream")
+async def stream_changes(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0, description="Domyślnie od bieżącego końca dziennika"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Zmiany na żywo jako Server-Sent Events; po zerwaniu wznawia od nagłówka Last-Event-ID"""
+    ostatnie_zdarzenie = request.headers.get("last-event-id", "")
+    if ostatnie_zdarzenie.isdigit():
+        since = int(ostatnie_zdarzenie)
+    elif since is None:
+        since = await db.run_sync(ostatni_seq)
+    return StreamingResponse(
+        strumien_sse(request, since, AsyncSessionLocal),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/jobs/import", response_model=ZadanieResponse, status_code=status.HTTP_202_ACCEPTED)
+def job_import(
+    file: UploadFile = File(...),
+    rozmiar_partii: int = Query(ROZMIAR_PARTII, ge=1, le=50000, description="Liczba rekordów na transakcję"),
+    db: Session = Depends(get_db)
+):
+    """Zleca import pliku JSON w tle; postęp i wynik pod GET /api/jobs/{id}"""
+    return zlec(db, "import", {"nazwa_pliku": file.filename, "rozmiar_partii": rozmiar_partii}, file.file)
+
+
+@app.post("/api/jobs/export", response_model=ZadanieResponse, status_code=status.HTTP_202_ACCEPTED)
+def job_export(
+    format: str = Query("json", pattern="^(json|ndjson|csv)$", description="Format: json, ndjson lub csv"),
+    gzip: bool = Query(False, description="Kompresja gzip pliku wynikowego"),
+    data_od: Optional[str] = Query(None, description="Data początkowa (YYYY-MM-DD)"),
+    data_do: Optional[str] = Query(None, description="Data końcowa (YYYY-MM-DD)"),
+    departament: Optional[str] = Query(None, description="Filtr po departamencie"),
+    collar_type: Optional[str] = Query(None, description="Filtr po typie collar"),
+    db: Session = Depends(get_db)
+):
+    """Zleca eksport do pliku w tle; plik do pobrania pod GET /api/jobs/{id}/wynik"""
+    parametry = {
+        "format": format, "gzip": gzip, "data_od": data_od, "data_do": data_do,
+        "departament": departament, "collar_type": collar_type,
+    }
+    return zlec(db, "eksport", parametry)
+
+
+@app.post("/api/jobs/agregaty", response_model=ZadanieResponse, status_code=status.HTTP_202_ACCEPTED)
+def job_agregaty(db: Session = Depends(get_db)):
+    """Zleca przebudowę tabeli agregatów dashboardu w tle"""
+    return zlec(db, "agregaty", {})
+
+
+@app.post("/api/jobs/archiwizacja", response_model=ZadanieResponse, status_code=status.HTTP_202_ACCEPTED)
+def job_archiwizacja(
+    przed: Optional[date] = Query(None, description="Data zamknięcia YYYY-MM-DD (domyślnie dziś - ARCHIWUM_PO_DNIACH)"),
+    db: Session = Depends(get_db)
+):
+    """Zleca przeniesienie dawno zamkniętych rekrutacji do archiwum w tle"""
+    return zlec(db, "archiwizacja", {"przed": (przed or horyzont()).isoformat()})
+
+
+@app.post("/api/jobs/migawka_kpi", response_model=ZadanieResponse, status_code=status.HTTP_202_ACCEPTED)
+def job_migawka_kpi(db: Session = Depends(get_db)):
+    """Zleca zapis dzisiejszej migawki KPI dashboardu w tle"""
+    return zlec(db, "migawka_kpi", {})
+
+
+@app.get("/api/jobs", response_model=List[ZadanieResponse])
+def list_jobs(limit: int = Query(20, ge=1, le=200), db: Session = Depends(get_db)):
+    """Zwraca ostatnio zlecone zadania"""
+    return db.query(Zadanie).order_by(Zadanie.id.desc()).limit(limit).all()
+
+
+def _pobierz_zadanie(db: Session, zadanie_id: int) -> Zadanie:
+    zadanie = db.get(Zadanie, zadanie_id)
+    if not zadanie:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Zadanie z ID {zadanie_id} nie zostało znalezione"
+        )
+    return zadanie
+
+
+@app.get("/api/jobs/{zadanie_id}", response_model=ZadanieResponse)
+def get_job(zadanie_id: int, db: Session = Depends(get_db)):
+    """Zwraca stan, postęp i wynik zadania"""
+    return _pobierz_zadanie(db, zadanie_id)
+
+
+@app.get("/api/jobs/{zadanie_id}/wynik")
+def download_job_result(zadanie_id: int, db: Session = Depends(get_db)):
+    """Pobiera plik wynikowy zakończonego eksportu"""
+    zadanie = _pobierz_zadanie(db, zadanie_id)
+    if zadanie.typ != "eksport":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Zadanie z ID {zadanie_id} nie ma pliku wynikowego"
+        )
+    if zadanie.status != "zakonczone":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Zadanie z ID {zadanie_id} nie zostało zakończone (status: {zadanie.status})"
+        )
+    if not zadanie.plik or not os.path.exists(zadanie.plik):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=f"Plik wynikowy zadania {zadanie_id} został usunięty"
+        )
+    return FileResponse(zadanie.plik, media_type=zadanie.wynik["media_type"], filename=zadanie.wynik["nazwa_pliku"])
+
+
+@app.get("/health", include_in_schema=False)
+async def health():
+    """Proces działa (liveness)"""
+    return {"status": "ok", "pid": os.getpid()}
+
+
+@app.get("/ready", include_in_schema=False)
+async def ready(db: AsyncSession = Depends(get_async_db)):
+    """Worker przyjmuje ruch: baza odpowiada (readiness)"""
+    try:
+        wersja = await db.run_sync(pobierz_wersje)
+    except Exception:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "niegotowy", "detail": "Baza danych nie odpowiada"},
+        )
+    return {"status": "gotowy", "pid": os.getpid(), "wersja_danych": wersja}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Metryki żądań i zapytań SQL w formacie tekstowym Prometheus"""
+    return PlainTextResponse(rejestr_metryk.prometheus(), media_type="text/plain; version=0.0.4")
+
+
+# Po zdefiniowaniu wszystkich endpointów
+profiluj_endpointy_synchroniczne(app)
+
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    from backend.server import main
+    main()
@@ -0,0 +1,270 @@
+# Metryki żądań (format tekstowy Prometheus) i profilowanie pojedynczego żądania
+#
+# Middleware mierzy czas i rozmiar odpowiedzi per szablon ścieżki, a zdarzenia
+# SQLAlchemy (dla wszystkich silników, także async) liczą zapytania SQL, ich czas
+# i obiekty ORM załadowane w ramach żądania. Metryki są per proces.
+#
+# Z PROFILOWANIE=1 dodanie ?profile=1 (lub nagłówka X-Profile: 1) zwraca zamiast
+# odpowiedzi raport cProfile tego żądania.
+import cProfile
+import inspect
+import io
+import os
+import pstats
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from backend.database import Base
+
+PROFILOWANIE = os.getenv("PROFILOWANIE", "0").lower() in ("1", "true", "tak")
+PROFIL_WIERSZY = 60
+
+PRZEDZIALY_CZASU = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+PRZEDZIALY_ROZMIARU = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+PRZEDZIALY_ZAPYTAN = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500, 1000)
+
+
+class StatystykiZadania:
+    """Liczniki jednego żądania; współdzielone przez wątki puli, bo ContextVar kopiuje referencję"""
+
+    def __init__(self):
+        self.zapytania = 0
+        self.czas_sql = 0.0
+        self.obiekty_orm = 0
+        self.profile = None  # lista profili cProfile (wątek pętli + wątki puli)
+
+
+_zadanie: ContextVar[Optional[StatystykiZadania]] = ContextVar("zadanie", default=None)
+
+
+class Histogram:
+    def __init__(self, przedzialy):
+        self.przedzialy = przedzialy
+        self.liczniki = defaultdict(lambda: [0] * (len(przedzialy) + 1))
+        self.sumy = defaultdict(float)
+
+    def obserwuj(self, etykiety: tuple, wartosc: float):
+        liczniki = self.liczniki[etykiety]
+        for i, granica in enumerate(self.przedzialy):
+            if wartosc <= granica:
+                liczniki[i] += 1
+                break
+        else:
+            liczniki[-1] += 1
+        self.sumy[etykiety] += wartosc
+
+
+_METODA_SCIEZKA = ("method", "route")
+
+
+def _etykiety(nazwy, wartosci) -> str:
+    def wartosc(w):
+        return str(w).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{n}="{wartosc(w)}"' for n, w in zip(nazwy, wartosci)) + "}"
+
+
+class RejestrMetryk:
+    """Liczniki i histogramy per (metoda, ścieżka); odczyt w formacie tekstowym Prometheus"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.w_toku = 0
+        self.zadania = defaultdict(int)  # (metoda, ścieżka, status) -> liczba
+        self.czas = Histogram(PRZEDZIALY_CZASU)
+        self.rozmiar = Histogram(PRZEDZIALY_ROZMIARU)
+        self.zapytania_na_zadanie = Histogram(PRZEDZIALY_ZAPYTAN)
+        self.zapytania = defaultdict(int)
+        self.czas_sql = defaultdict(float)
+        self.obiekty_orm = defaultdict(int)
+
+    def zapisz(self, metoda, sciezka, status, czas, rozmiar, statystyki: StatystykiZadania):
+        etykiety = (metoda, sciezka)
+        with self._lock:
+            self.zadania[(metoda, sciezka, str(status))] += 1
+            self.czas.obserwuj(etykiety, czas)
+            self.rozmiar.obserwuj(etykiety, rozmiar)
+            self.zapytania_na_zadanie.obserwuj(etykiety, statystyki.zapytania)
+            self.zapytania[etykiety] += statystyki.zapytania
+            self.czas_sql[etykiety] += statystyki.czas_sql
+            self.obiekty_orm[etykiety] += statystyki.obiekty_orm
+
+    def _histogram(self, linie, nazwa, opis, histogram):
+        linie += [f"# HELP {nazwa} {opis}", f"# TYPE {nazwa} histogram"]
+        for etykiety, liczniki in sorted(histogram.liczniki.items()):
+            narastajaco = 0
+            for granica, liczba in zip(list(histogram.przedzialy) + ["+Inf"], liczniki):
+                narastajaco += liczba
+                linie.append(f"{nazwa}_bucket{_etykiety(_METODA_SCIEZKA + ('le',), etykiety + (granica,))} {narastajaco}")
+            linie.append(f"{nazwa}_sum{_etykiety(_METODA_SCIEZKA, etykiety)} {histogram.sumy[etykiety]}")
+            linie.append(f"{nazwa}_count{_etykiety(_METODA_SCIEZKA, etykiety)} {narastajaco}")
+
+    def _licznik(self, linie, nazwa, opis, wartosci):
+        linie += [f"# HELP {nazwa} {opis}", f"# TYPE {nazwa} counter"]
+        for etykiety, wartosc in sorted(wartosci.items()):
+            linie.append(f"{nazwa}{_etykiety(_METODA_SCIEZKA, etykiety)} {wartosc}")
+
+    def prometheus(self) -> str:
+        with self._lock:
+            linie = [
+                "# HELP http_requests_in_progress Żądania w trakcie obsługi",
+                "# TYPE http_requests_in_progress gauge",
+                f"http_requests_in_progress {self.w_toku}",
+                "# HELP http_requests_total Liczba obsłużonych żądań",
+                "# TYPE http_requests_total counter",
+            ]
+            for etykiety, liczba in sorted(self.zadania.items()):
+                linie.append(f"http_requests_total{_etykiety(_METODA_SCIEZKA + ('status',), etykiety)} {liczba}")
+            self._histogram(linie, "http_request_duration_seconds", "Czas obsługi żądania", self.czas)
+            self._histogram(linie, "http_response_size_bytes", "Rozmiar treści odpowiedzi", self.rozmiar)
+            self._histogram(
+                linie, "db_statements_per_request", "Liczba zapytań SQL w jednym żądaniu", self.zapytania_na_zadanie
+            )
+            self._licznik(linie, "db_statements_total", "Zapytania SQL wykonane w żądaniach", self.zapytania)
+            self._licznik(linie, "db_statement_duration_seconds_total", "Łączny czas zapytań SQL", self.czas_sql)
+            self._licznik(linie, "orm_objects_loaded_total", "Obiekty ORM załadowane z bazy", self.obiekty_orm)
+        return "\n".join(linie) + "\n"
+
+
+rejestr_metryk = RejestrMetryk()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _przed_zapytaniem(conn, cursor, statement, parameters, context, executemany):
+    if _zadanie.get() is not None:
+        conn.info.setdefault("start_zapytania", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _po_zapytaniu(conn, cursor, statement, parameters, context, executemany):
+    statystyki = _zadanie.get()
+    if statystyki is not None and conn.info.get("start_zapytania"):
+        statystyki.zapytania += 1
+        statystyki.czas_sql += time.perf_counter() - conn.info["start_zapytania"].pop()
+
+
+@event.listens_for(Base, "load", propagate=True)
+def _zaladowano(obiekt, kontekst):
+    statystyki = _zadanie.get()
+    if statystyki is not None:
+        statystyki.obiekty_orm += 1
+
+
+def _sciezka(scope) -> str:
+    """Szablon ścieżki (np. /api/rekrutacje/{rekrutacja_id}) - ogranicza liczbę serii metryk"""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if scope.get("endpoint") is not None and scope.get("root_path"):
+        return scope["root_path"]  # zamontowana aplikacja, np. /static
+    return "nieznana"
+
+
+def _chce_profil(scope) -> bool:
+    if not PROFILOWANIE:
+        return False
+    if b"profile=1" in scope.get("query_string", b"").split(b"&"):
+        return True
+    return (b"x-profile", b"1") in scope.get("headers", [])
+
+
+def _raport_profilu(profile, czas: float, statystyki: StatystykiZadania) -> bytes:
+    wynik = io.StringIO()
+    wynik.write(
+        f"Czas żądania: {czas * 1000:.1f} ms, zapytania SQL: {statystyki.zapytania} "
+        f"({statystyki.czas_sql * 1000:.1f} ms), obiekty ORM: {statystyki.obiekty_orm}\n\n"
+    )
+    raport = pstats.Stats(profile[0], stream=wynik)
+    for profil in profile[1:]:
+        raport.add(profil)
+    raport.sort_stats("cumulative").print_stats(PROFIL_WIERSZY)
+    return wynik.getvalue().encode("utf-8")
+
+
+class MiddlewareMetryk:
+    """Middleware ASGI: czas, status i rozmiar odpowiedzi oraz liczniki SQL każdego żądania"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        statystyki = StatystykiZadania()
+        token = _zadanie.set(statystyki)
+        odpowiedz = {"status": 500, "rozmiar": 0}
+        profil = None
+        if _chce_profil(scope):
+            profil = cProfile.Profile()
+            statystyki.profile = [profil]
+
+        async def wyslij(wiadomosc):
+            if wiadomosc["type"] == "http.response.start":
+                odpowiedz["status"] = wiadomosc["status"]
+            elif wiadomosc["type"] == "http.response.body":
+                odpowiedz["rozmiar"] += len(wiadomosc.get("body", b""))
+            if profil is None:
+                await send(wiadomosc)
+
+        with rejestr_metryk._lock:
+            rejestr_metryk.w_toku += 1
+        start = time.perf_counter()
+        try:
+            if profil is not None:
+                profil.enable()
+            try:
+                await self.app(scope, receive, wyslij)
+            finally:
+                if profil is not None:
+                    profil.disable()
+        finally:
+            czas = time.perf_counter() - start
+            _zadanie.reset(token)
+            with rejestr_metryk._lock:
+                rejestr_metryk.w_toku -= 1
+            rejestr_metryk.zapisz(
+                scope["method"], _sciezka(scope), odpowiedz["status"], czas, odpowiedz["rozmiar"], statystyki
+            )
+
+        if profil is not None:
+            tresc = _raport_profilu(statystyki.profile, czas, statystyki)
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(tresc)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": tresc})
+
+
+def profiluj_endpointy_synchroniczne(app):
+    """
+    Endpointy synchroniczne działają w puli wątków, a cProfile widzi tylko swój wątek -
+    przy profilowanym żądaniu wywołanie endpointu dostaje własny profil.
+    """
+    if not PROFILOWANIE:
+        return
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not inspect.iscoroutinefunction(route.dependant.call):
+            route.dependant.call = _z_profilem(route.dependant.call)
+
+
+def _z_profilem(funkcja):
+    def wywolaj(*args, **kwargs):
+        statystyki = _zadanie.get()
+        if statystyki is None or statystyki.profile is None:
+            return funkcja(*args, **kwargs)
+        profil = cProfile.Profile()
+        statystyki.profile.append(profil)
+        return profil.runcall(funkcja, *args, **kwargs)
+    return wywolaj
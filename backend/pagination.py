@@ -0,0 +1,138 @@
+# Stronicowanie kursorem (keyset) i filtry listy rekrutacji
+import base64
+import json
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from backend.archive import ze_wszystkich
+from backend.database import Rekrutacja
+from backend.serializacja import KOLUMNY
+
+SORTOWANIE = {
+    "id": Rekrutacja.id,
+    "data_otwarcia": Rekrutacja.data_otwarcia,
+    "departament": Rekrutacja.departament,
+    "stanowisko": Rekrutacja.stanowisko,
+    "hiring_manager": Rekrutacja.hiring_manager,
+    "id_referencyjne": Rekrutacja.id_referencyjne,
+}
+
+STATUSY = ("otwarta", "zamknieta", "z_zatrudnieniem")
+
+
+class BladKursora(ValueError):
+    """Kursor jest uszkodzony lub nie pasuje do wybranego sortowania"""
+
+
+def koduj_kursor(sort: str, kolejnosc: str, wartosc, id: int) -> str:
+    if isinstance(wartosc, date):
+        wartosc = wartosc.isoformat()
+    surowy = json.dumps([sort, kolejnosc, wartosc, id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(surowy.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def dekoduj_kursor(kursor: str, sort: str, kolejnosc: str):
+    try:
+        surowy = base64.urlsafe_b64decode(kursor + "=" * (-len(kursor) % 4))
+        sort_kursora, kolejnosc_kursora, wartosc, id = json.loads(surowy)
+        zgodny = (sort_kursora, kolejnosc_kursora) == (sort, kolejnosc)
+        # Kursor pochodzi od klienta - wartości z niepoprawnym typem nie mogą trafić do zapytania
+        if not isinstance(id, int):
+            raise TypeError(id)
+        if zgodny and sort == "data_otwarcia":
+            wartosc = date.fromisoformat(wartosc)
+    except (ValueError, TypeError):
+        raise BladKursora("Nieprawidłowy kursor")
+    if not zgodny:
+        raise BladKursora("Kursor dotyczy innego sortowania")
+    return wartosc, id
+
+
+def warunki_statusu(status: str) -> list:
+    """Warunki WHERE dla statusu; otwarta po kolumnach - pod indeks częściowy otwartych rekrutacji"""
+    if status == "otwarta":
+        return [Rekrutacja.data_zamkniecia.is_(None), Rekrutacja.data_zatrudnienia.is_(None)]
+    return [Rekrutacja.status == status]
+
+
+def filtry_listy(
+    departament: Optional[str] = None,
+    dzial: Optional[str] = None,
+    collar_type: Optional[str] = None,
+    status: Optional[str] = None,
+    hiring_manager: Optional[str] = None,
+    data_od: Optional[date] = None,
+    data_do: Optional[date] = None,
+    ttf_min: Optional[int] = None,
+    ttf_max: Optional[int] = None,
+):
+    """Buduje listę warunków WHERE dla listy rekrutacji"""
+    warunki = []
+    if departament:
+        warunki.append(Rekrutacja.departament == departament)
+    if dzial:
+        warunki.append(Rekrutacja.dzial == dzial)
+    if collar_type:
+        warunki.append(Rekrutacja.collar_type == collar_type)
+    if status:
+        warunki.extend(warunki_statusu(status))
+    if hiring_manager:
+        warunki.append(Rekrutacja.hiring_manager == hiring_manager)
+    if data_od:
+        warunki.append(Rekrutacja.data_otwarcia >= data_od)
+    if data_do:
+        warunki.append(Rekrutacja.data_otwarcia <= data_do)
+    if ttf_min is not None:
+        warunki.append(Rekrutacja.ttf >= ttf_min)
+    if ttf_max is not None:
+        warunki.append(Rekrutacja.ttf <= ttf_max)
+    return warunki
+
+
+def strona_rekrutacji(
+    db: Session,
+    warunki,
+    sort: str = "id",
+    kolejnosc: str = "asc",
+    limit: int = 100,
+    kursor: Optional[str] = None,
+    skip: int = 0,
+    archiwum: bool = False,
+):
+    """
+    Zwraca (wiersze, next_cursor) dla jednej strony; wiersze to krotki
+    kolumn KOLUMNY, bez tworzenia obiektów ORM.
+
+    Z kursorem zapytanie zaczyna od (wartość sortowania, id) ostatniego
+    wiersza poprzedniej strony, więc koszt nie rośnie z numerem strony.
+    Z archiwum=True strona składana jest z obu tabel (scalanie dwóch
+    odczytów indeksu w kolejności sortowania).
+    """
+    kolumny = [SORTOWANIE[sort], Rekrutacja.id] if sort != "id" else [Rekrutacja.id]
+    zapytanie = select(*KOLUMNY).where(*warunki)
+
+    if kursor:
+        wartosc, ostatnie_id = dekoduj_kursor(kursor, sort, kolejnosc)
+        if sort == "id":
+            klucz, granica = Rekrutacja.id, ostatnie_id
+        else:
+            klucz, granica = tuple_(*kolumny), tuple_(wartosc, ostatnie_id)
+        zapytanie = zapytanie.where(klucz > granica if kolejnosc == "asc" else klucz < granica)
+
+    zapytanie = zapytanie.order_by(*[k.asc() if kolejnosc == "asc" else k.desc() for k in kolumny])
+    if skip and not kursor:
+        zapytanie = zapytanie.offset(skip)
+
+    zapytanie = zapytanie.limit(limit + 1)
+    if archiwum:
+        zapytanie = ze_wszystkich(zapytanie)
+    rekrutacje = db.execute(zapytanie).all()
+    next_cursor = None
+    if len(rekrutacje) > limit:
+        rekrutacje = rekrutacje[:limit]
+        ostatnia = rekrutacje[-1]
+        next_cursor = koduj_kursor(sort, kolejnosc, getattr(ostatnia, sort), ostatnia.id)
+    return rekrutacje, next_cursor
@@ -0,0 +1,123 @@
+# Tabela przestawna: dowolne wymiary × miary liczone jednym zapytaniem GROUP BY
+from sqlalchemy import Numeric, cast, func, literal_column, null, select, union_all
+from sqlalchemy.orm import Session
+
+from backend.archive import ze_wszystkich
+from backend.database import Rekrutacja
+from backend.trend import miesiac_daty, kwartal_daty
+
+MAX_WYMIAROW = 5
+
+WYMIARY = {
+    "departament": Rekrutacja.departament,
+    "dzial": Rekrutacja.dzial,
+    "stanowisko": Rekrutacja.stanowisko,
+    "miejsce_pracy": Rekrutacja.miejsce_pracy,
+    "hiring_manager": Rekrutacja.hiring_manager,
+    "collar_type": Rekrutacja.collar_type,
+    "czy_manager": Rekrutacja.czy_manager,
+    "przyczyna_rekrutacji": Rekrutacja.przyczyna_rekrutacji,
+    "typ_zatrudnienia": Rekrutacja.typ_zatrudnienia,
+    "plec": Rekrutacja.plec,
+    "status": Rekrutacja.status,
+    "miesiac": miesiac_daty(Rekrutacja.data_otwarcia),
+    "kwartal": kwartal_daty(Rekrutacja.data_otwarcia),
+}
+
+
+def _suma(kolumna):
+    return func.coalesce(func.sum(kolumna), 0)
+
+
+def _srednia(wyrazenie):
+    return func.round(cast(func.avg(wyrazenie), Numeric(asdecimal=False)), 1)
+
+
+def _procent(licznik, mianownik):
+    """Stosunek sum w procentach, 0 gdy mianownik jest zerowy (jak w dashboardzie)"""
+    return func.coalesce(
+        func.round(cast(licznik * 100.0 / func.nullif(mianownik, 0), Numeric(asdecimal=False)), 2), 0
+    )
+
+
+_SPOTKANIA = Rekrutacja.liczba_spotkan_rekruter + Rekrutacja.liczba_spotkan_hiring_manager
+
+MIARY = {
+    "count": func.count(Rekrutacja.id),
+    "otwarte": func.count(Rekrutacja.id) - func.count(Rekrutacja.data_zamkniecia),
+    "z_zatrudnieniem": func.count(Rekrutacja.data_zatrudnienia),
+    "sum_cv": _suma(Rekrutacja.liczba_cv_otrzymana),
+    "sum_cv_odrzucone": _suma(Rekrutacja.liczba_cv_odrzucone_rekruter),
+    "sum_spotkan": _suma(_SPOTKANIA),
+    "sum_oferty": _suma(Rekrutacja.liczba_zlozonych_ofert),
+    "sum_zatrudnieni": _suma(Rekrutacja.liczba_zatrudnionych),
+    "sum_oferty_odrzucone": _suma(Rekrutacja.liczba_odrzuconych_ofert_przez_kandydata),
+    "avg_ttf": _srednia(Rekrutacja.ttf),
+    "avg_tto": _srednia(Rekrutacja.tto),
+    "avg_czas_otwarcia": _srednia(Rekrutacja.czas_otwarcia),
+    "offer_acceptance_rate": _procent(
+        _suma(Rekrutacja.liczba_zatrudnionych), _suma(Rekrutacja.liczba_zlozonych_ofert)
+    ),
+    "cv_to_interview_rate": _procent(_suma(_SPOTKANIA), _suma(Rekrutacja.liczba_cv_otrzymana)),
+    "interview_to_offer_rate": _procent(_suma(Rekrutacja.liczba_zlozonych_ofert), _suma(_SPOTKANIA)),
+    "success_rate": _procent(func.count(Rekrutacja.data_zatrudnienia), func.count(Rekrutacja.data_zamkniecia)),
+}
+
+
+class BladPivotu(ValueError):
+    """Nieznany wymiar lub miara albo zbyt wiele wymiarów"""
+
+
+def _lista(tekst: str, dozwolone: dict, rodzaj: str) -> list:
+    nazwy = [n.strip() for n in tekst.split(",") if n.strip()] if tekst else []
+    nieznane = [n for n in nazwy if n not in dozwolone]
+    if nieznane:
+        raise BladPivotu(
+            f"Nieznane {rodzaj}: {', '.join(nieznane)}. Dostępne: {', '.join(dozwolone)}"
+        )
+    return list(dict.fromkeys(nazwy))
+
+
+def tabela_przestawna(
+    db: Session, wymiary: str, miary: str, warunki, rollup: bool = False, archiwum: bool = False
+) -> dict:
+    """
+    Grupuje rekrutacje po podanych wymiarach (nazwy rozdzielone przecinkami)
+    i liczy wybrane miary w SQL.
+
+    Z rollup=True dokładane są sumy częściowe dla kolejnych prefiksów wymiarów
+    i suma całkowita (UNION ALL, działa też na SQLite bez GROUP BY ROLLUP).
+    Pole "poziom" to liczba wymiarów, po których zgrupowano wiersz.
+    Z archiwum=True grupowane są rekrutacje z obu tabel.
+    """
+    nazwy_wymiarow = _lista(wymiary, WYMIARY, "wymiary")
+    nazwy_miar = _lista(miary, MIARY, "miary") or ["count"]
+    if len(nazwy_wymiarow) > MAX_WYMIAROW:
+        raise BladPivotu(f"Maksymalnie {MAX_WYMIAROW} wymiarów")
+
+    poziomy = range(len(nazwy_wymiarow), -1, -1) if rollup else [len(nazwy_wymiarow)]
+    zapytania = [
+        select(
+            *[WYMIARY[n].label(n) for n in nazwy_wymiarow[:poziom]],
+            *[null().label(n) for n in nazwy_wymiarow[poziom:]],
+            *[MIARY[n].label(n) for n in nazwy_miar],
+            literal_column(str(poziom)).label("poziom"),
+        )
+        .where(*warunki)
+        .group_by(*[WYMIARY[n] for n in nazwy_wymiarow[:poziom]])
+        for poziom in poziomy
+    ]
+    zapytanie = zapytania[0] if len(zapytania) == 1 else union_all(*zapytania)
+    if archiwum:
+        zapytanie = ze_wszystkich(zapytanie)
+    wiersze = [dict(wiersz) for wiersz in db.execute(zapytanie).mappings()]
+
+    # Sumy częściowe bezpośrednio pod swoją grupą, puste wartości na końcu
+    def klucz(wiersz):
+        return [
+            (i >= wiersz["poziom"], wiersz[n] is None, "" if wiersz[n] is None else wiersz[n])
+            for i, n in enumerate(nazwy_wymiarow)
+        ]
+
+    wiersze.sort(key=klucz)
+    return {"wymiary": nazwy_wymiarow, "miary": nazwy_miar, "rollup": rollup, "wiersze": wiersze}
@@ -0,0 +1,107 @@
+# Rankingi top/bottom-K (hiring managerowie, departamenty, ...) i wiek otwartych rekrutacji
+#
+# Ranking to jedno zapytanie GROUP BY ... ORDER BY miara LIMIT k - do Pythona trafia
+# k wierszy niezależnie od liczby grup (SQLite i PostgreSQL sortują wtedy top-N).
+# Przedziały wieku liczone są z porównań data_otwarcia z datami granicznymi, więc
+# zapytanie o otwarte rekrutacje korzysta z indeksu częściowego otwartych rekrutacji.
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session
+
+from backend.archive import ze_wszystkich
+from backend.database import Rekrutacja
+from backend.pagination import warunki_statusu
+from backend.pivot import MIARY, WYMIARY
+
+MAX_K = 100
+# Przedziały wieku otwartej rekrutacji w dniach od otwarcia: (etykieta, od, do)
+PRZEDZIALY_WIEKU = (("0-30", 0, 30), ("31-60", 31, 60), ("61-90", 61, 90), ("90+", 91, None))
+MIARY_WIEKU = ("otwarte_0_30", "otwarte_31_60", "otwarte_61_90", "otwarte_90_plus")
+MIARY_RANKINGU = tuple(MIARY) + MIARY_WIEKU
+
+
+def miary_wieku(dzisiaj: Optional[date] = None) -> dict:
+    """Liczba otwartych rekrutacji w każdym przedziale wieku (miary SQL)"""
+    dzisiaj = dzisiaj or date.today()
+    miary = {}
+    for nazwa, (_, od, do) in zip(MIARY_WIEKU, PRZEDZIALY_WIEKU):
+        warunki = warunki_statusu("otwarta")
+        if od:
+            warunki.append(Rekrutacja.data_otwarcia <= dzisiaj - timedelta(days=od))
+        if do is not None:
+            warunki.append(Rekrutacja.data_otwarcia >= dzisiaj - timedelta(days=do))
+        miary[nazwa] = func.count(case((and_(*warunki), 1)))
+    return miary
+
+
+def _przedzialy(wiersz) -> dict:
+    return {etykieta: wiersz[nazwa] for (etykieta, _, _), nazwa in zip(PRZEDZIALY_WIEKU, MIARY_WIEKU)}
+
+
+def wiek_otwartych(db: Session, warunki, dzisiaj: Optional[date] = None) -> dict:
+    """Otwarte rekrutacje w przedziałach wieku 0-30 / 31-60 / 61-90 / 90+ dni"""
+    miary = miary_wieku(dzisiaj)
+    wiersz = db.execute(
+        select(*[miara.label(nazwa) for nazwa, miara in miary.items()])
+        .where(*warunki_statusu("otwarta"), *warunki)
+    ).mappings().one()
+    return _przedzialy(wiersz)
+
+
+def ranking(
+    db: Session,
+    wymiar: str,
+    miara: str,
+    warunki,
+    k: int = 10,
+    order: str = "desc",
+    min_rekrutacji: int = 1,
+    archiwum: bool = False,
+    dzisiaj: Optional[date] = None,
+) -> dict:
+    """
+    K grup wymiaru z najwyższą (order=desc) lub najniższą (asc) wartością miary,
+    z liczbą rekrutacji i wiekiem otwartych rekrutacji każdej grupy.
+
+    Grupy z mniej niż min_rekrutacji rekrutacjami, bez wartości wymiaru lub bez
+    wartości miary (np. średni TTF bez zamkniętych rekrutacji) są pomijane.
+    Z archiwum=True grupowane są rekrutacje z obu tabel.
+    """
+    miary = {**MIARY, **miary_wieku(dzisiaj)}
+    kolumna = WYMIARY[wymiar]
+    wyrazenie = miary[miara]
+    liczba = MIARY["count"]
+    kierunek = wyrazenie.desc() if order == "desc" else wyrazenie.asc()
+
+    kolumny = {miara: wyrazenie, "liczba_rekrutacji": liczba, **{nazwa: miary[nazwa] for nazwa in MIARY_WIEKU}}
+    zapytanie = (
+        select(kolumna.label("wartosc"), *[kolumna_sql.label(nazwa) for nazwa, kolumna_sql in kolumny.items()])
+        .where(kolumna.isnot(None), *warunki)
+        .group_by(kolumna)
+        .having(liczba >= min_rekrutacji, wyrazenie.isnot(None))
+        .order_by(kierunek, kolumna)
+        .limit(min(k, MAX_K))
+    )
+    if archiwum:
+        zapytanie = ze_wszystkich(zapytanie)
+
+    pozycje = [
+        {
+            "miejsce": miejsce,
+            "wartosc": wiersz["wartosc"],
+            miara: wiersz[miara],
+            "liczba_rekrutacji": wiersz["liczba_rekrutacji"],
+            "wiek_otwartych": _przedzialy(wiersz),
+        }
+        for miejsce, wiersz in enumerate(db.execute(zapytanie).mappings(), start=1)
+    ]
+    return {
+        "wymiar": wymiar,
+        "miara": miara,
+        "order": order,
+        "k": k,
+        "pozycje": pozycje,
+        "wiek_otwartych": wiek_otwartych(db, warunki, dzisiaj),
+    }
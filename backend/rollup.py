@@ -0,0 +1,180 @@
+# Tabela agregatów rekrutacji utrzymywana przyrostowo przy każdym zapisie
+import argparse
+from collections import defaultdict
+
+from sqlalchemy import func, case, insert, select, delete
+from sqlalchemy.orm import Session
+
+from backend.archive import siega_archiwum, ze_wszystkich
+from backend.database import (
+    Rekrutacja, RekrutacjaAgregat, SessionLocal, init_db, insert_z_on_conflict, jako_date, roznica_dni,
+)
+from backend.stats import TTF_SQL, TTO_SQL, CZAS_OTWARCIA_SQL
+
+KLUCZ = ("data_otwarcia", "departament", "collar_type", "przyczyna_rekrutacji", "typ_zatrudnienia")
+
+LICZNIKI = (
+    "liczba_rekrutacji", "otwarte", "zamkniete", "z_zatrudnieniem", "managers",
+    "liczba_cv_otrzymana", "liczba_cv_odrzucone_rekruter", "liczba_spotkan",
+    "liczba_zlozonych_ofert", "liczba_zatrudnionych", "liczba_odrzuconych_ofert_przez_kandydata",
+    "suma_ttf", "liczba_ttf", "suma_tto", "liczba_tto", "suma_czas_otwarcia", "liczba_czas_otwarcia",
+)
+
+
+def _klucz(rekrutacja) -> tuple:
+    return (
+        jako_date(rekrutacja.data_otwarcia),
+        rekrutacja.departament,
+        rekrutacja.collar_type,
+        rekrutacja.przyczyna_rekrutacji,
+        rekrutacja.typ_zatrudnienia or "",
+    )
+
+
+def _wklad(rekrutacja) -> dict:
+    """Wartości liczników, które pojedyncza rekrutacja wnosi do swojej grupy"""
+    ttf = roznica_dni(rekrutacja.data_zatrudnienia, rekrutacja.data_otwarcia)
+    czas_otwarcia = roznica_dni(rekrutacja.data_zamkniecia, rekrutacja.data_otwarcia)
+    tto = czas_otwarcia if (rekrutacja.liczba_zlozonych_ofert or 0) > 0 else None
+    return {
+        "liczba_rekrutacji": 1,
+        "otwarte": 0 if rekrutacja.data_zamkniecia else 1,
+        "zamkniete": 1 if rekrutacja.data_zamkniecia else 0,
+        "z_zatrudnieniem": 1 if rekrutacja.data_zatrudnienia else 0,
+        "managers": 1 if rekrutacja.czy_manager else 0,
+        "liczba_cv_otrzymana": rekrutacja.liczba_cv_otrzymana or 0,
+        "liczba_cv_odrzucone_rekruter": rekrutacja.liczba_cv_odrzucone_rekruter or 0,
+        "liczba_spotkan": (rekrutacja.liczba_spotkan_rekruter or 0) + (rekrutacja.liczba_spotkan_hiring_manager or 0),
+        "liczba_zlozonych_ofert": rekrutacja.liczba_zlozonych_ofert or 0,
+        "liczba_zatrudnionych": rekrutacja.liczba_zatrudnionych or 0,
+        "liczba_odrzuconych_ofert_przez_kandydata": rekrutacja.liczba_odrzuconych_ofert_przez_kandydata or 0,
+        "suma_ttf": ttf or 0,
+        "liczba_ttf": 0 if ttf is None else 1,
+        "suma_tto": tto or 0,
+        "liczba_tto": 0 if tto is None else 1,
+        "suma_czas_otwarcia": czas_otwarcia or 0,
+        "liczba_czas_otwarcia": 0 if czas_otwarcia is None else 1,
+    }
+
+
+class DeltaAgregatow:
+    """
+    Zbiera zmiany liczników z jednej transakcji i nakłada je na tabelę agregatów.
+
+    Przy aktualizacji należy wywołać odejmij() przed zmianą pól i dodaj() po niej.
+    Przyjmuje obiekty Rekrutacja lub dowolne obiekty z tymi samymi atrybutami.
+    """
+
+    def __init__(self):
+        self._zmiany = defaultdict(lambda: dict.fromkeys(LICZNIKI, 0))
+
+    def _nalicz(self, rekrutacja, znak: int):
+        zmiana = self._zmiany[_klucz(rekrutacja)]
+        for licznik, wartosc in _wklad(rekrutacja).items():
+            zmiana[licznik] += znak * wartosc
+
+    def dodaj(self, rekrutacja):
+        self._nalicz(rekrutacja, 1)
+
+    def odejmij(self, rekrutacja):
+        self._nalicz(rekrutacja, -1)
+
+    def zastosuj(self, db: Session):
+        """Nakłada zebrane zmiany w bieżącej transakcji (bez commit)"""
+        zmiany = [
+            {**dict(zip(KLUCZ, klucz)), **zmiana}
+            for klucz, zmiana in self._zmiany.items() if any(zmiana.values())
+        ]
+        self._zmiany.clear()
+        if not zmiany:
+            return
+
+        tabela = RekrutacjaAgregat.__table__
+        insert = insert_z_on_conflict(db)(tabela)
+        upsert = insert.on_conflict_do_update(
+            index_elements=[tabela.c[k] for k in KLUCZ],
+            set_={licznik: tabela.c[licznik] + insert.excluded[licznik] for licznik in LICZNIKI},
+        )
+        polaczenie = db.connection()
+        polaczenie.execute(upsert, zmiany)
+
+        # Grupy, z których ubyły rekrutacje, mogły zostać puste
+        dni = sorted({z["data_otwarcia"] for z in zmiany if z["liczba_rekrutacji"] < 0})
+        for i in range(0, len(dni), 500):
+            polaczenie.execute(
+                delete(tabela).where(
+                    tabela.c.data_otwarcia.in_(dni[i:i + 500]),
+                    tabela.c.liczba_rekrutacji <= 0,
+                )
+            )
+
+
+def _licz_gdy(warunek):
+    return func.sum(case((warunek, 1), else_=0))
+
+
+def przebuduj_agregaty(db: Session) -> int:
+    """Odtwarza całą tabelę agregatów z tabeli rekrutacje i archiwum (bez commit)"""
+    typ_zatrudnienia = func.coalesce(Rekrutacja.typ_zatrudnienia, "")
+    zrodlo = select(
+        Rekrutacja.data_otwarcia,
+        Rekrutacja.departament,
+        Rekrutacja.collar_type,
+        Rekrutacja.przyczyna_rekrutacji,
+        typ_zatrudnienia,
+        func.count(Rekrutacja.id),
+        _licz_gdy(Rekrutacja.data_zamkniecia.is_(None)),
+        _licz_gdy(Rekrutacja.data_zamkniecia.isnot(None)),
+        _licz_gdy(Rekrutacja.data_zatrudnienia.isnot(None)),
+        _licz_gdy(Rekrutacja.czy_manager.is_(True)),
+        func.coalesce(func.sum(Rekrutacja.liczba_cv_otrzymana), 0),
+        func.coalesce(func.sum(Rekrutacja.liczba_cv_odrzucone_rekruter), 0),
+        func.coalesce(func.sum(Rekrutacja.liczba_spotkan_rekruter + Rekrutacja.liczba_spotkan_hiring_manager), 0),
+        func.coalesce(func.sum(Rekrutacja.liczba_zlozonych_ofert), 0),
+        func.coalesce(func.sum(Rekrutacja.liczba_zatrudnionych), 0),
+        func.coalesce(func.sum(Rekrutacja.liczba_odrzuconych_ofert_przez_kandydata), 0),
+        func.coalesce(func.sum(TTF_SQL), 0),
+        func.count(TTF_SQL),
+        func.coalesce(func.sum(TTO_SQL), 0),
+        func.count(TTO_SQL),
+        func.coalesce(func.sum(CZAS_OTWARCIA_SQL), 0),
+        func.count(CZAS_OTWARCIA_SQL),
+    ).group_by(
+        Rekrutacja.data_otwarcia,
+        Rekrutacja.departament,
+        Rekrutacja.collar_type,
+        Rekrutacja.przyczyna_rekrutacji,
+        typ_zatrudnienia,
+    )
+    if siega_archiwum(db):
+        zrodlo = ze_wszystkich(zrodlo)
+
+    db.query(RekrutacjaAgregat).delete(synchronize_session=False)
+    db.execute(insert(RekrutacjaAgregat).from_select(list(KLUCZ + LICZNIKI), zrodlo))
+    return db.query(RekrutacjaAgregat).count()
+
+
+def uzupelnij_agregaty(db: Session):
+    """Buduje agregaty dla bazy, która ma rekrutacje, ale jeszcze nie ma agregatów"""
+    if db.query(RekrutacjaAgregat.id).first() is None and db.query(Rekrutacja.id).first() is not None:
+        przebuduj_agregaty(db)
+        db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zarządzanie tabelą agregatów rekrutacji")
+    parser.add_argument("polecenie", choices=["przebuduj"], help="przebuduj - odtwarza agregaty od zera")
+    parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        grupy = przebuduj_agregaty(db)
+        db.commit()
+        print(f"✓ Przebudowano agregaty: {grupy} grup")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
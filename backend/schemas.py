@@ -1,6 +1,9 @@
 from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import date
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime
+
+# Maksymalna liczba elementów w jednym żądaniu /api/rekrutacje/batch
+MAX_ELEMENTOW_BATCH = 1000
 
 
 class RekrutacjaBase(BaseModel):
@@ -70,3 +73,29 @@ class RekrutacjaResponse(RekrutacjaBase):
 
     class Config:
         from_attributes = True
+
+
+class RekrutacjeBatch(BaseModel):
+    # Elementy walidowane pojedynczo, żeby błąd jednego nie odrzucał całego żądania
+    rekrutacje: List[Dict[str, Any]] = Field(..., max_length=MAX_ELEMENTOW_BATCH)
+
+
+class RekrutacjeBatchDelete(BaseModel):
+    ids: List[int] = Field(default_factory=list, max_length=MAX_ELEMENTOW_BATCH)
+    id_referencyjne: List[str] = Field(default_factory=list, max_length=MAX_ELEMENTOW_BATCH)
+
+
+class ZadanieResponse(BaseModel):
+    id: int
+    typ: str
+    status: str
+    parametry: Dict[str, Any]
+    postep: Optional[Dict[str, Any]] = None
+    wynik: Optional[Dict[str, Any]] = None
+    blad: Optional[str] = None
+    utworzono: datetime
+    rozpoczeto: Optional[datetime] = None
+    zakonczono: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,263 @@
+# Wyszukiwanie pełnotekstowe w polach tekstowych rekrutacji
+#
+# SQLite: tabela wirtualna FTS5 (ranking bm25), PostgreSQL: indeks GIN na tsvector
+# (ranking ts_rank), inne bazy i SQLite bez FTS5: własny indeks odwrócony
+# w tabeli rekrutacje_slowa. Indeks aktualizuje TransakcjaZapisu przy każdym zapisie.
+# Rekrutacje przeniesione do archiwum zostają w indeksie (te same id).
+import argparse
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Optional
+
+from sqlalchemy import (
+    Column, Float, Integer, MetaData, String, Table, column, delete, func, insert, literal,
+    literal_column, select, table, text, union_all,
+)
+from sqlalchemy.orm import Session
+
+from backend.archive import z_archiwum, ze_wszystkich
+from backend.database import Rekrutacja, SessionLocal, init_db
+from backend.serializacja import KOLUMNY
+
+POLA = ("stanowisko", "hiring_manager", "komentarz", "replacement_za_kogo")
+WAGI = (4.0, 2.0, 1.0, 1.0)  # trafienie w stanowisku liczy się najbardziej
+MAX_TERMINOW = 8
+ROZMIAR_PARTII = 5000
+
+_SLOWO = re.compile(r"[^\W_]+")
+# ł/Ł nie rozkłada się w NFKD i unicode61 go nie zmienia - zamiana jawna, także w indeksowanej treści
+_BEZ_KRESEK = str.maketrans("łŁ", "lL")
+
+
+def terminy(tekst: Optional[str]) -> list:
+    """Słowa małymi literami, bez znaków diakrytycznych (jak tokenizer unicode61 w FTS5)"""
+    if not tekst:
+        return []
+    rozlozony = unicodedata.normalize("NFKD", tekst.translate(_BEZ_KRESEK).lower())
+    return _SLOWO.findall("".join(znak for znak in rozlozony if not unicodedata.combining(znak)))
+
+
+def _bez_kresek_sql(wyrazenie):
+    return func.replace(func.replace(wyrazenie, "ł", "l"), "Ł", "L")
+
+
+def pola_tekstowe(rekrutacja) -> dict:
+    return {pole: getattr(rekrutacja, pole) for pole in POLA}
+
+
+class _IndeksFTS5:
+    nazwa = "fts5"
+    _tabela = table("rekrutacje_fts", column("rowid"), *[column(pole) for pole in POLA])
+
+    def utworz(self, db: Session):
+        db.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS rekrutacje_fts USING fts5("
+            f"{', '.join(POLA)}, tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+
+    def pusty(self, db: Session) -> bool:
+        return db.execute(select(self._tabela.c.rowid).limit(1)).first() is None
+
+    def przebuduj(self, db: Session):
+        db.execute(delete(self._tabela))
+        db.execute(insert(self._tabela).from_select(
+            ["rowid", *POLA],
+            ze_wszystkich(select(Rekrutacja.id, *[_bez_kresek_sql(getattr(Rekrutacja, pole)) for pole in POLA])),
+        ))
+
+    def aktualizuj(self, db: Session, zmiany: dict):
+        db.execute(delete(self._tabela).where(self._tabela.c.rowid.in_(list(zmiany))))
+        wiersze = [
+            {"rowid": id, **{pole: wartosc and wartosc.translate(_BEZ_KRESEK) for pole, wartosc in pola.items()}}
+            for id, pola in zmiany.items() if pola is not None
+        ]
+        if wiersze:
+            db.execute(insert(self._tabela), wiersze)
+
+    def dopasowania(self, szukane: list):
+        # Każdy termin jako prefiks w cudzysłowie - bez interpretacji składni zapytań FTS5
+        zapytanie = " ".join(f'"{termin}"*' for termin in szukane)
+        return select(
+            self._tabela.c.rowid.label("id"),
+            (-func.bm25(literal_column("rekrutacje_fts"), *WAGI)).label("ranga"),
+        ).where(literal_column("rekrutacje_fts").op("MATCH")(zapytanie))
+
+
+# Wyrażenie indeksu GIN; zapytanie musi używać identycznego, żeby planer wybrał indeks.
+# Słownik simple nie usuwa znaków diakrytycznych, a terminy() tak - polskie litery zamienia translate
+_TSVECTOR_SQL = " || ".join(
+    f"setweight(to_tsvector('simple', translate(coalesce({pole}, ''), "
+    f"'ąćęłńóśźżĄĆĘŁŃÓŚŹŻ', 'acelnoszzACELNOSZZ')), '{waga}')"
+    for pole, waga in zip(POLA, "ABCD")
+)
+
+
+class _IndeksPostgres:
+    """Indeks na wyrażeniu aktualizuje się sam razem z tabelą rekrutacje (i archiwum)"""
+    nazwa = "tsvector"
+    _TABELE = ("rekrutacje", "rekrutacje_archiwum")
+
+    def utworz(self, db: Session):
+        for tabela in self._TABELE:
+            # Indeks sprzed zamiany polskich liter miał inne wyrażenie - zapytania by go nie użyły
+            db.execute(text(f"DROP INDEX IF EXISTS ix_{tabela}_tsvector"))
+            db.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{tabela}_tsvector_pl ON {tabela} USING GIN (({_TSVECTOR_SQL}))"
+            ))
+
+    def pusty(self, db: Session) -> bool:
+        return False
+
+    def przebuduj(self, db: Session):
+        for tabela in self._TABELE:
+            db.execute(text(f"REINDEX INDEX ix_{tabela}_tsvector_pl"))
+
+    def aktualizuj(self, db: Session, zmiany: dict):
+        pass
+
+    def dopasowania(self, szukane: list):
+        zapytanie = func.to_tsquery("simple", " & ".join(f"{termin}:*" for termin in szukane))
+        wektor = literal_column(f"({_TSVECTOR_SQL})")
+        return select(
+            Rekrutacja.id.label("id"),
+            func.ts_rank(wektor, zapytanie).label("ranga"),
+        ).where(wektor.op("@@")(zapytanie))
+
+
+_metadata = MetaData()
+_slowa = Table(
+    "rekrutacje_slowa",
+    _metadata,
+    Column("slowo", String, primary_key=True),
+    Column("rekrutacja_id", Integer, primary_key=True, index=True),
+    Column("waga", Float, nullable=False),
+)
+
+
+class _IndeksSlow:
+    """Indeks odwrócony (słowo, rekrutacja, waga) w zwykłej tabeli - działa na każdej bazie"""
+    nazwa = "slowa"
+
+    def utworz(self, db: Session):
+        _metadata.create_all(db.connection())
+
+    def pusty(self, db: Session) -> bool:
+        return db.execute(select(_slowa.c.slowo).limit(1)).first() is None
+
+    @staticmethod
+    def _wiersze(id: int, pola: dict) -> list:
+        wagi = defaultdict(float)
+        for pole, waga in zip(POLA, WAGI):
+            for slowo in terminy(pola[pole]):
+                wagi[slowo] += waga
+        return [{"slowo": slowo, "rekrutacja_id": id, "waga": waga} for slowo, waga in wagi.items()]
+
+    def _wstaw(self, db: Session, zmiany: dict):
+        wiersze = [w for id, pola in zmiany.items() if pola is not None for w in self._wiersze(id, pola)]
+        if wiersze:
+            db.execute(insert(_slowa), wiersze)
+
+    def przebuduj(self, db: Session):
+        db.execute(delete(_slowa))
+        wynik = db.execute(
+            ze_wszystkich(select(Rekrutacja.id, *[getattr(Rekrutacja, pole) for pole in POLA]))
+            .execution_options(yield_per=ROZMIAR_PARTII)
+        )
+        for partia in wynik.partitions():
+            self._wstaw(db, {wiersz.id: wiersz._mapping for wiersz in partia})
+
+    def aktualizuj(self, db: Session, zmiany: dict):
+        db.execute(delete(_slowa).where(_slowa.c.rekrutacja_id.in_(list(zmiany))))
+        self._wstaw(db, zmiany)
+
+    def dopasowania(self, szukane: list):
+        # Prefiks jako zakres na kluczu głównym (slowo >= t AND slowo < t + max znak)
+        czesci = union_all(*[
+            select(_slowa.c.rekrutacja_id, literal(i).label("termin"), _slowa.c.waga).where(
+                _slowa.c.slowo >= termin, _slowa.c.slowo < termin + "\U0010ffff"
+            )
+            for i, termin in enumerate(szukane)
+        ]).subquery()
+        return (
+            select(czesci.c.rekrutacja_id.label("id"), func.sum(czesci.c.waga).label("ranga"))
+            .group_by(czesci.c.rekrutacja_id)
+            .having(func.count(func.distinct(czesci.c.termin)) == len(szukane))
+        )
+
+
+_indeks = None
+
+
+def indeks_wyszukiwania(db: Session):
+    """Implementacja indeksu dla bazy, z którą połączona jest sesja"""
+    global _indeks
+    if _indeks is None:
+        dialekt = db.get_bind().dialect.name
+        if dialekt == "postgresql":
+            _indeks = _IndeksPostgres()
+        elif dialekt == "sqlite" and db.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar():
+            _indeks = _IndeksFTS5()
+        else:
+            _indeks = _IndeksSlow()
+    return _indeks
+
+
+def przygotuj_wyszukiwanie(db: Session):
+    """Tworzy indeks i wypełnia go dla bazy, która ma rekrutacje, ale jeszcze nie ma indeksu"""
+    indeks = indeks_wyszukiwania(db)
+    indeks.utworz(db)
+    if indeks.pusty(db) and db.query(Rekrutacja.id).first() is not None:
+        indeks.przebuduj(db)
+    db.commit()
+
+
+def wyszukaj(db: Session, q: str, warunki, limit: int, offset: int = 0, archiwum: bool = False):
+    """
+    Rekrutacje pasujące do wszystkich słów zapytania (każde słowo jako prefiks),
+    od najlepiej dopasowanych. Zwraca (wiersze z kolumnami KOLUMNY, offset następnej strony lub None).
+    Z archiwum=True trafienia łączone są osobno z każdą tabelą i scalane według rangi.
+    """
+    szukane = list(dict.fromkeys(terminy(q)))[:MAX_TERMINOW]
+    if not szukane:
+        return [], None
+    trafienia = indeks_wyszukiwania(db).dopasowania(szukane).subquery()
+    zapytanie = (
+        select(*KOLUMNY, trafienia.c.ranga)
+        .join(trafienia, Rekrutacja.id == trafienia.c.id)
+        .where(*warunki)
+    )
+    if archiwum:
+        # Złączenie z UNION ALL obu tabel wymagałoby jego materializacji - każda tabela osobno po id
+        zapytanie = union_all(zapytanie, z_archiwum(zapytanie))
+    wynik = zapytanie.subquery()
+    rekrutacje = db.execute(
+        select(*[wynik.c[kolumna.key] for kolumna in KOLUMNY])
+        .order_by(wynik.c.ranga.desc(), wynik.c.id)
+        .offset(offset)
+        .limit(limit + 1)
+    ).all()
+    if len(rekrutacje) > limit:
+        return rekrutacje[:limit], offset + limit
+    return rekrutacje, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zarządzanie indeksem wyszukiwania rekrutacji")
+    parser.add_argument("polecenie", choices=["przebuduj"], help="przebuduj - odtwarza indeks od zera")
+    parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        indeks = indeks_wyszukiwania(db)
+        indeks.utworz(db)
+        indeks.przebuduj(db)
+        db.commit()
+        print(f"Przebudowano indeks wyszukiwania ({indeks.nazwa})")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
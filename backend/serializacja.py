@@ -0,0 +1,69 @@
+# Szybka ścieżka odpowiedzi z rekrutacjami (lista, wyszukiwanie, szczegóły)
+#
+# Zamiast obiektów ORM i modeli Pydantic (from_attributes) zapytania zwracają krotki
+# kolumn, pola wyliczane liczone są w jednej pętli po wierszach, a wynik trafia
+# od razu do orjson. Schemat JSON jak w RekrutacjaResponse.
+import json
+from datetime import date
+
+from fastapi import Response
+
+from backend.database import Rekrutacja
+from backend.schemas import RekrutacjaResponse
+
+try:
+    import orjson
+except ImportError:  # orjson jest opcjonalny - bez niego json ze standardowej biblioteki
+    orjson = None
+
+# Kolumny w kolejności pól RekrutacjaResponse, więc dict(zip(...)) ma od razu właściwy układ
+_NAZWY = tuple(pole for pole in RekrutacjaResponse.model_fields if pole in Rekrutacja.__table__.columns)
+KOLUMNY = tuple(Rekrutacja.__table__.columns[pole] for pole in _NAZWY)
+
+_OTWARCIE, _ZAMKNIECIE, _ZATRUDNIENIE, _CV, _SPOTKANIA_R, _SPOTKANIA_HM, _ZATRUDNIENI, _OFERTY = (
+    _NAZWY.index(pole) for pole in (
+        "data_otwarcia", "data_zamkniecia", "data_zatrudnienia", "liczba_cv_otrzymana", "liczba_spotkan_rekruter",
+        "liczba_spotkan_hiring_manager", "liczba_zatrudnionych", "liczba_zlozonych_ofert",
+    )
+)
+
+
+def jako_slowniki(wiersze) -> list:
+    """
+    Wiersze z kolumnami KOLUMNY -> słowniki o polach RekrutacjaResponse.
+    Pola wyliczane jak hybrid_property w database.py, ale na indeksach krotki.
+    """
+    wynik = []
+    for wiersz in wiersze:
+        slownik = dict(zip(_NAZWY, wiersz))
+        otwarcie, zamkniecie, zatrudnienie = wiersz[_OTWARCIE], wiersz[_ZAMKNIECIE], wiersz[_ZATRUDNIENIE]
+        cv, oferty = wiersz[_CV] or 0, wiersz[_OFERTY] or 0
+        czas_otwarcia = (zamkniecie - otwarcie).days if zamkniecie and otwarcie else None
+        slownik["ttf"] = (zatrudnienie - otwarcie).days if zatrudnienie and otwarcie else None
+        slownik["tto"] = czas_otwarcia if oferty > 0 else None
+        slownik["czas_otwarcia"] = czas_otwarcia
+        slownik["wskaznik_akceptacji_ofert"] = (
+            round((wiersz[_ZATRUDNIENI] / oferty) * 100, 2) if oferty > 0 else None
+        )
+        slownik["wskaznik_konwersji_cv"] = (
+            round(((wiersz[_SPOTKANIA_R] + wiersz[_SPOTKANIA_HM]) / cv) * 100, 2) if cv > 0 else None
+        )
+        slownik["status"] = "z_zatrudnieniem" if zatrudnienie else "zamknieta" if zamkniecie else "otwarta"
+        wynik.append(slownik)
+    return wynik
+
+
+def _domyslna(wartosc):
+    if isinstance(wartosc, date):
+        return wartosc.isoformat()
+    raise TypeError(f"Nieobsługiwany typ: {type(wartosc).__name__}")
+
+
+class OdpowiedzJSON(Response):
+    """Odpowiedź JSON bez walidacji response_model (dane są już w docelowym kształcie)"""
+    media_type = "application/json"
+
+    def render(self, tresc) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(tresc)
+        return json.dumps(tresc, ensure_ascii=False, separators=(",", ":"), default=_domyslna).encode("utf-8")
@@ -0,0 +1,209 @@
+# Uruchamianie serwera produkcyjnego: przygotowanie bazy raz, potem N procesów uvicorn
+#
+# Proces nadzorcy otwiera gniazdo, przygotowuje bazę (schemat, agregaty, indeks
+# wyszukiwania) i startuje workery, które dzielą gniazdo. SIGHUP przeładowuje
+# workery po kolei (nowy startuje, zanim stary dokończy obsługę żądań i się
+# zamknie), SIGTERM/SIGINT zatrzymuje serwer. Workery, które padły, są wznawiane.
+# Nadzorca raz dziennie zapisuje migawkę KPI (backend/snapshots.py).
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from datetime import datetime
+
+import uvicorn
+from uvicorn.config import Config
+from uvicorn.server import Server
+
+APLIKACJA = "backend.main:app"
+# Ustawiana przez nadzorcę - workery nie powtarzają przygotowania bazy przy starcie
+BAZA_PRZYGOTOWANA = "BAZA_PRZYGOTOWANA"
+CZAS_GOTOWOSCI = 60.0  # sekundy na start workera przy przeładowaniu
+
+
+def przygotuj_baze():
+    """Tworzy schemat, uzupełnia agregaty i indeks wyszukiwania, zamyka osierocone zadania"""
+    from backend.database import SessionLocal, init_db
+    from backend.jobs import przerwij_niedokonczone
+    from backend.rollup import uzupelnij_agregaty
+    from backend.search import przygotuj_wyszukiwanie
+
+    init_db()
+    with SessionLocal() as db:
+        uzupelnij_agregaty(db)
+        przygotuj_wyszukiwanie(db)
+        przerwij_niedokonczone(db)
+
+
+def zapisz_migawke_kpi():
+    """Dzisiejsza migawka KPI dashboardu (wątek nadzorcy)"""
+    from backend.database import SessionLocal
+    from backend.snapshots import zapisz_migawke
+
+    try:
+        with SessionLocal() as db:
+            grupy = zapisz_migawke(db)
+            db.commit()
+        print(f"Zapisano migawkę KPI ({grupy} grup)", flush=True)
+    except Exception as e:
+        print(f"Błąd zapisu migawki KPI: {e}", flush=True)
+
+
+def _godzina(tekst: str):
+    return datetime.strptime(tekst, "%H:%M").time() if tekst else None
+
+
+def baza_przygotowana() -> bool:
+    return os.getenv(BAZA_PRZYGOTOWANA) == "1"
+
+
+class _SerwerWorkera(Server):
+    """Server uvicorn, który zgłasza nadzorcy zakończony start (lifespan + nasłuchiwanie)"""
+
+    def __init__(self, config: Config, gotowy):
+        super().__init__(config)
+        self.gotowy = gotowy
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets)
+        if not self.should_exit:
+            self.gotowy.set()
+
+
+def _worker(config: Config, sockets, gotowy):
+    config.configure_logging()
+    _SerwerWorkera(config, gotowy).run(sockets=sockets)
+
+
+class Nadzorca:
+    def __init__(self, config: Config, liczba_workerow: int, godzina_migawki=None):
+        self.config = config
+        self.liczba_workerow = liczba_workerow
+        self.godzina_migawki = godzina_migawki
+        self._dzien_migawki = None
+        self.kontekst = multiprocessing.get_context("spawn")
+        self.workery = []
+        self.sockets = []
+        self._koniec = threading.Event()
+        self._przeladuj = threading.Event()
+
+    def _start(self):
+        gotowy = self.kontekst.Event()
+        proces = self.kontekst.Process(
+            target=_worker, kwargs={"config": self.config, "sockets": self.sockets, "gotowy": gotowy}
+        )
+        proces.start()
+        return proces, gotowy
+
+    @staticmethod
+    def _zatrzymaj(proces, czekaj: bool = True):
+        if proces.is_alive():
+            proces.terminate()  # SIGTERM - uvicorn kończy trwające żądania i zamyka się
+        if czekaj:
+            proces.join()
+
+    def _przeladuj_po_kolei(self):
+        print("Przeładowanie workerów...", flush=True)
+        for i, (stary, _) in enumerate(list(self.workery)):
+            nowy, gotowy = self._start()
+            if not gotowy.wait(CZAS_GOTOWOSCI):
+                print(f"Nowy worker nie wystartował w {CZAS_GOTOWOSCI:.0f} s - przerwano przeładowanie", flush=True)
+                self._zatrzymaj(nowy)
+                return
+            self.workery[i] = (nowy, gotowy)
+            self._zatrzymaj(stary)
+        print("Przeładowano workery", flush=True)
+
+    def _pora_migawki(self) -> bool:
+        """Raz dziennie, przy pierwszym obrocie pętli po godzinie migawki"""
+        if self.godzina_migawki is None:
+            return False
+        teraz = datetime.now()
+        if teraz.time() < self.godzina_migawki or self._dzien_migawki == teraz.date():
+            return False
+        self._dzien_migawki = teraz.date()
+        return True
+
+    def uruchom(self):
+        start = time.perf_counter()
+        self.sockets = [self.config.bind_socket()]
+        for sygnal in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sygnal, lambda *_: self._koniec.set())
+        signal.signal(signal.SIGHUP, lambda *_: self._przeladuj.set())
+
+        self.workery = [self._start() for _ in range(self.liczba_workerow)]
+        for _, gotowy in self.workery:
+            gotowy.wait(CZAS_GOTOWOSCI)
+        gotowe = sum(gotowy.is_set() for _, gotowy in self.workery)
+        print(
+            f"Gotowe workery: {gotowe}/{self.liczba_workerow}, start w {time.perf_counter() - start:.2f} s "
+            f"(pid nadzorcy {os.getpid()}, kill -HUP przeładowuje workery)",
+            flush=True,
+        )
+
+        while not self._koniec.wait(0.5):
+            if self._przeladuj.is_set():
+                self._przeladuj.clear()
+                self._przeladuj_po_kolei()
+            for i, (proces, _) in enumerate(self.workery):
+                if not proces.is_alive() and not self._koniec.is_set():
+                    print(f"Worker {proces.pid} zakończył się (kod {proces.exitcode}) - uruchamianie nowego", flush=True)
+                    self.workery[i] = self._start()
+            if self._pora_migawki():
+                threading.Thread(target=zapisz_migawke_kpi, name="migawka-kpi", daemon=True).start()
+
+        for proces, _ in self.workery:
+            self._zatrzymaj(proces, czekaj=False)
+        for proces, _ in self.workery:
+            proces.join()
+        for gniazdo in self.sockets:
+            gniazdo.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serwer System Statystyk Rekrutacji")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument(
+        "--workers", type=int, default=int(os.getenv("WORKERS", "1")),
+        help="Liczba procesów (0 = liczba rdzeni)",
+    )
+    parser.add_argument("--keep-alive", type=int, default=int(os.getenv("KEEP_ALIVE", "5")),
+                        help="Czas utrzymania bezczynnego połączenia (s)")
+    parser.add_argument("--backlog", type=int, default=int(os.getenv("BACKLOG", "2048")),
+                        help="Kolejka połączeń oczekujących na accept")
+    parser.add_argument(
+        "--migawka-kpi", type=_godzina, default=os.getenv("MIGAWKA_KPI_GODZINA", "23:55"),
+        help="Godzina HH:MM dziennej migawki KPI (pusta = wyłączona)",
+    )
+    parser.add_argument("--reload", action="store_true", help="Tryb deweloperski: restart po zmianie kodu")
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    przygotuj_baze()
+    os.environ[BAZA_PRZYGOTOWANA] = "1"
+    print(f"Baza przygotowana w {time.perf_counter() - start:.2f} s", flush=True)
+
+    # loop/http "auto" wybierają uvloop i httptools, jeśli są zainstalowane
+    opcje = dict(
+        host=args.host,
+        port=args.port,
+        timeout_keep_alive=args.keep_alive,
+        backlog=args.backlog,
+        log_level=args.log_level,
+        loop="auto",
+        http="auto",
+    )
+    if args.reload:
+        uvicorn.run(APLIKACJA, reload=True, **opcje)
+        return
+    liczba_workerow = args.workers or os.cpu_count() or 1
+    Nadzorca(Config(APLIKACJA, workers=liczba_workerow, **opcje), liczba_workerow, args.migawka_kpi).uruchom()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+# Dzienne migawki KPI dashboardu: stan "na dzień" i zmiany między dwoma dniami
+#
+# Rekrutacje zmieniane są w miejscu, więc stanu z przeszłości (ile rekrutacji było
+# otwartych 31 marca) nie da się odtworzyć z tabeli rekrutacje. Raz dziennie (nadzorca
+# serwera o MIGAWKA_KPI_GODZINA, cron z `python -m backend.snapshots zapisz` albo
+# POST /api/jobs/migawka_kpi) liczniki dashboardu i mediany trafiają do tabeli
+# migawki_kpi dla każdej pary departament / collar_type i dla sum częściowych
+# ("" = wszystkie). Odczyt czyta jeden wiersz na grupę i dzień, bez skanu rekrutacji.
+import argparse
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from backend.archive import siega_archiwum
+from backend.database import MigawkaKPI, Rekrutacja, RekrutacjaAgregat, SessionLocal, init_db
+from backend.stats import SUMY_DASHBOARDU, TTF_SQL, TTO_SQL, percentyle_w_grupach, wynik_dashboardu
+
+WSZYSTKIE = ""  # departament / collar_type grupy obejmującej wszystkie wartości
+GRUPOWANIA = ("departament", "collar_type")
+POLA_SUM = tuple(suma.name for suma in SUMY_DASHBOARDU)
+MEDIANY = {"median_ttf": TTF_SQL, "median_tto": TTO_SQL}
+# Grupy szczegółowe i sumy częściowe: (departament, collar), departament, collar, całość
+POZIOMY = ((True, True), (True, False), (False, True), (False, False))
+_ROZBICIA = ("departamenty", "przyczyny", "zrodla_rekrutacji")  # w migawce puste - pomijane
+
+
+class BladMigawki(Exception):
+    """Brak migawki na żądany dzień"""
+
+
+def _klucz(poziom: tuple, wartosci) -> tuple:
+    """(departament, collar_type) grupy z wartości kolumn, po których grupuje poziom"""
+    wartosci = iter(wartosci)
+    return tuple(next(wartosci) if uzyj else WSZYSTKIE for uzyj in poziom)
+
+
+def zapisz_migawke(db: Session, dzien: Optional[date] = None) -> int:
+    """
+    Zapisuje migawkę KPI na dzień (domyślnie dziś), zastępując wcześniejszą z tego dnia.
+    Sumy czytane są z tabeli agregatów, mediany z rekrutacji (bez commit). Zwraca liczbę grup.
+    """
+    dzien = dzien or date.today()
+    A = RekrutacjaAgregat
+    wiersze = {}
+    for departament, collar_type, *sumy in (
+        db.query(A.departament, A.collar_type, *SUMY_DASHBOARDU).group_by(A.departament, A.collar_type)
+    ):
+        for poziom in POZIOMY:
+            klucz = tuple(wartosc if uzyj else WSZYSTKIE for wartosc, uzyj in zip((departament, collar_type), poziom))
+            wiersz = wiersze.setdefault(klucz, {**dict.fromkeys(POLA_SUM, 0), **dict.fromkeys(MEDIANY)})
+            for pole, wartosc in zip(POLA_SUM, sumy):
+                wiersz[pole] += wartosc
+
+    archiwum = siega_archiwum(db)
+    for pole, wyrazenie in MEDIANY.items():
+        for poziom in POZIOMY:
+            grupy = [kolumna for kolumna, uzyj in zip((Rekrutacja.departament, Rekrutacja.collar_type), poziom) if uzyj]
+            for wartosci, wynik in percentyle_w_grupach(db, wyrazenie, [], grupy, (0.5,), archiwum).items():
+                klucz = _klucz(poziom, wartosci)
+                if klucz in wiersze:
+                    wiersze[klucz][pole] = wynik["p50"]
+
+    db.execute(delete(MigawkaKPI).where(MigawkaKPI.dzien == dzien))
+    if wiersze:
+        db.execute(insert(MigawkaKPI), [
+            {"dzien": dzien, "departament": departament, "collar_type": collar_type, **wiersz}
+            for (departament, collar_type), wiersz in wiersze.items()
+        ])
+    return len(wiersze)
+
+
+def dzien_migawki(db: Session, dzien: date) -> date:
+    """Ostatni dzień z migawką nie późniejszy niż podany (odczyt z indeksu)"""
+    znaleziony = db.execute(select(func.max(MigawkaKPI.dzien)).where(MigawkaKPI.dzien <= dzien)).scalar()
+    if znaleziony is None:
+        raise BladMigawki(f"Brak migawki KPI z dnia {dzien.isoformat()} ani wcześniejszej")
+    return znaleziony
+
+
+def kpi_migawki(wiersz: MigawkaKPI) -> dict:
+    """KPI jak w /api/dashboard (bez rozbić) z liczników zapisanych w migawce"""
+    wynik = wynik_dashboardu(wiersz, median_ttf=wiersz.median_ttf, median_tto=wiersz.median_tto)
+    return {klucz: wartosc for klucz, wartosc in wynik.items() if klucz not in _ROZBICIA}
+
+
+def _grupy(db: Session, dzien: date, filtry: dict, grupuj: Optional[str]) -> dict:
+    warunki = [MigawkaKPI.dzien == dzien]
+    for pole in GRUPOWANIA:
+        kolumna = getattr(MigawkaKPI, pole)
+        if filtry.get(pole):
+            warunki.append(kolumna == filtry[pole])
+        elif grupuj == pole:
+            warunki.append(kolumna != WSZYSTKIE)
+        else:
+            warunki.append(kolumna == WSZYSTKIE)
+    return {(w.departament, w.collar_type): kpi_migawki(w) for w in db.query(MigawkaKPI).filter(*warunki)}
+
+
+def zmiana(kpi: dict, poprzednie: dict) -> dict:
+    """Różnica wartości liczbowych KPI (None, gdy którejś brak)"""
+    return {
+        klucz: round(wartosc - poprzednie[klucz], 2)
+        if isinstance(wartosc, (int, float)) and isinstance(poprzednie.get(klucz), (int, float)) else None
+        for klucz, wartosc in kpi.items()
+    }
+
+
+def kpi_na_dzien(
+    db: Session,
+    dzien: Optional[date] = None,
+    porownaj_z: Optional[date] = None,
+    departament: Optional[str] = None,
+    collar_type: Optional[str] = None,
+    grupuj: Optional[str] = None,
+) -> dict:
+    """
+    KPI z ostatniej migawki nie późniejszej niż dzien (domyślnie dziś), opcjonalnie
+    ze zmianą względem migawki na dzień porownaj_z - dla wybranej grupy albo
+    osobno dla każdego departamentu / collar_type (grupuj).
+    """
+    dzien = dzien or date.today()
+    filtry = {"departament": departament, "collar_type": collar_type}
+    migawka = dzien_migawki(db, dzien)
+    biezace = _grupy(db, migawka, filtry, grupuj)
+    wynik = {"dzien": dzien.isoformat(), "dzien_migawki": migawka.isoformat()}
+
+    poprzednie = None
+    if porownaj_z:
+        migawka_porownania = dzien_migawki(db, porownaj_z)
+        poprzednie = _grupy(db, migawka_porownania, filtry, grupuj)
+        wynik["porownaj_z"] = porownaj_z.isoformat()
+        wynik["dzien_migawki_porownania"] = migawka_porownania.isoformat()
+
+    grupy = []
+    for klucz in sorted(set(biezace) | set(poprzednie or {})):
+        grupa = {
+            "departament": klucz[0] or None,
+            "collar_type": klucz[1] or None,
+            "kpi": biezace.get(klucz),
+        }
+        if poprzednie is not None:
+            grupa["kpi_porownania"] = poprzednie.get(klucz)
+            grupa["zmiana"] = (
+                zmiana(grupa["kpi"], grupa["kpi_porownania"]) if grupa["kpi"] and grupa["kpi_porownania"] else None
+            )
+        grupy.append(grupa)
+    wynik["grupy"] = grupy
+    return wynik
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dzienne migawki KPI dashboardu")
+    parser.add_argument("polecenie", choices=["zapisz"], help="zapisz - stan na dziś (zastępuje dzisiejszą)")
+    parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        dzien = date.today()
+        grupy = zapisz_migawke(db, dzien)
+        db.commit()
+        print(f"✓ Zapisano migawkę KPI z dnia {dzien} ({grupy} grup)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
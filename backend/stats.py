@@ -0,0 +1,326 @@
+# Silnik zapytań statystycznych - agregaty dashboardu liczone w SQL
+from collections import defaultdict
+from datetime import date
+from fractions import Fraction
+from sqlalchemy import func, case, or_
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from backend.archive import siega_archiwum, ze_wszystkich
+from backend.database import Rekrutacja, RekrutacjaAgregat
+
+
+# Wyrażenia SQL metryk czasowych (strona SQL hybrid properties modelu, objęte indeksami)
+TTF_SQL = Rekrutacja.ttf
+TTO_SQL = Rekrutacja.tto
+CZAS_OTWARCIA_SQL = Rekrutacja.czas_otwarcia
+
+METRYKI_CZASOWE = {
+    "ttf": TTF_SQL,
+    "tto": TTO_SQL,
+    "czas_otwarcia": CZAS_OTWARCIA_SQL,
+}
+
+KWANTYLE = (0.5, 0.75, 0.9, 0.95)
+
+
+def _suma(wyrazenie):
+    return func.coalesce(func.sum(wyrazenie), 0)
+
+
+def _licz_gdy(warunek):
+    return func.coalesce(func.sum(case((warunek, 1), else_=0)), 0)
+
+
+def _rekrutacje_gdzie(warunek):
+    return _suma(case((warunek, RekrutacjaAgregat.liczba_rekrutacji), else_=0))
+
+
+# Sumy liczników tabeli agregatów pod nazwami, których używa wynik_dashboardu
+SUMY_DASHBOARDU = (
+    _suma(RekrutacjaAgregat.liczba_rekrutacji).label("total"),
+    _suma(RekrutacjaAgregat.otwarte).label("otwarte"),
+    _suma(RekrutacjaAgregat.zamkniete).label("zamkniete"),
+    _suma(RekrutacjaAgregat.z_zatrudnieniem).label("z_zatrudnieniem"),
+    _suma(RekrutacjaAgregat.suma_ttf).label("suma_ttf"),
+    _suma(RekrutacjaAgregat.liczba_ttf).label("liczba_ttf"),
+    _suma(RekrutacjaAgregat.suma_tto).label("suma_tto"),
+    _suma(RekrutacjaAgregat.liczba_tto).label("liczba_tto"),
+    _suma(RekrutacjaAgregat.suma_czas_otwarcia).label("suma_czas_otwarcia"),
+    _suma(RekrutacjaAgregat.liczba_czas_otwarcia).label("liczba_czas_otwarcia"),
+    _suma(RekrutacjaAgregat.liczba_cv_otrzymana).label("total_cv"),
+    _suma(RekrutacjaAgregat.liczba_cv_odrzucone_rekruter).label("total_cv_odrzucone"),
+    _suma(RekrutacjaAgregat.liczba_spotkan).label("total_spotkan"),
+    _suma(RekrutacjaAgregat.liczba_zlozonych_ofert).label("total_ofert"),
+    _suma(RekrutacjaAgregat.liczba_zatrudnionych).label("total_zatrudnionych"),
+    _suma(RekrutacjaAgregat.liczba_odrzuconych_ofert_przez_kandydata).label("total_ofert_odrzuconych"),
+    _rekrutacje_gdzie(RekrutacjaAgregat.collar_type == "White").label("white_collar"),
+    _rekrutacje_gdzie(RekrutacjaAgregat.collar_type == "Blue").label("blue_collar"),
+    _suma(RekrutacjaAgregat.managers).label("managers"),
+    _rekrutacje_gdzie(RekrutacjaAgregat.przyczyna_rekrutacji == "Replacement").label("replacement"),
+)
+
+
+def filtry_dashboardu(
+    data_od: Optional[str] = None,
+    data_do: Optional[str] = None,
+    departament: Optional[str] = None,
+    collar_type: Optional[str] = None,
+    model=Rekrutacja,
+):
+    """Buduje listę warunków WHERE dla filtrów dashboardu (rekrutacje lub agregaty)"""
+    warunki = []
+    if data_od:
+        warunki.append(model.data_otwarcia >= data_od)
+    if data_do:
+        warunki.append(model.data_otwarcia <= data_do)
+    if departament:
+        warunki.append(model.departament == departament)
+    if collar_type:
+        warunki.append(model.collar_type == collar_type)
+    return warunki
+
+
+def percentyle(db: Session, wyrazenie, warunki, kwantyle=KWANTYLE, archiwum: bool = False) -> dict:
+    """
+    Dokładne percentyle (interpolacja liniowa) wyliczone jednym zapytaniem.
+
+    Numeracja wierszy odbywa się w SQL funkcjami okna, do Pythona trafiają
+    tylko dwa sąsiednie wiersze dla każdego kwantyla. Z archiwum=True
+    liczone na rekrutacjach z obu tabel.
+    """
+    wyniki = percentyle_w_grupach(db, wyrazenie, warunki, (), kwantyle, archiwum)
+    return wyniki.get((), {f"p{round(q * 100)}": None for q in kwantyle})
+
+
+def percentyle_w_grupach(
+    db: Session, wyrazenie, warunki, grupy=(), kwantyle=KWANTYLE, archiwum: bool = False
+) -> dict:
+    """
+    Percentyle jak w percentyle(), osobno dla każdej kombinacji wartości kolumn grupy
+    (numeracja w oknach PARTITION BY). Zwraca {krotka wartości grupy: {pXX: wartość}}.
+    """
+    if archiwum:
+        wyrazenie, warunki = ze_wszystkich(wyrazenie), [ze_wszystkich(warunek) for warunek in warunki]
+        grupy = [ze_wszystkich(grupa) for grupa in grupy]
+    podzial = list(grupy) or None
+    uporzadkowane = (
+        db.query(
+            *[grupa.label(f"grupa_{i}") for i, grupa in enumerate(grupy)],
+            wyrazenie.label("wartosc"),
+            func.row_number().over(partition_by=podzial, order_by=wyrazenie).label("pozycja"),
+            func.count().over(partition_by=podzial).label("liczba"),
+        )
+        .filter(*warunki, wyrazenie.isnot(None))
+        .subquery()
+    )
+    kolumny_grup = [uporzadkowane.c[f"grupa_{i}"] for i in range(len(grupy))]
+
+    # Pozycja (1-based) dolnego sąsiada dla każdego kwantyla: floor((n - 1) * q) + 1.
+    # Dzielenie całkowite zamiast CAST - PostgreSQL przy rzutowaniu zaokrągla, SQLite obcina
+    dolne = []
+    for q in kwantyle:
+        ulamek = Fraction(q).limit_denominator(1000)
+        dolne.append((uporzadkowane.c.liczba - 1) * ulamek.numerator // ulamek.denominator + 1)
+    wiersze = (
+        db.query(*kolumny_grup, uporzadkowane.c.pozycja, uporzadkowane.c.wartosc, uporzadkowane.c.liczba)
+        .filter(or_(*[
+            uporzadkowane.c.pozycja.between(dolna, dolna + 1) for dolna in dolne
+        ]))
+        .all()
+    )
+
+    wartosci = defaultdict(dict)
+    liczby = {}
+    for wiersz in wiersze:
+        klucz = tuple(wiersz[:len(kolumny_grup)])
+        wartosci[klucz][wiersz.pozycja] = wiersz.wartosc
+        liczby[klucz] = wiersz.liczba
+    return {
+        klucz: {
+            f"p{round(q * 100)}": kwantyl_liniowy(lambda pozycja: pozycje.get(pozycja + 1), liczby[klucz], q)
+            for q in kwantyle
+        }
+        for klucz, pozycje in wartosci.items()
+    }
+
+
+def kwantyl_liniowy(wartosc_na_pozycji, liczba: int, q: float):
+    """
+    Kwantyl z interpolacją liniową między sąsiednimi wartościami posortowanego ciągu.
+
+    wartosc_na_pozycji(i) zwraca i-tą (od 0) wartość ciągu lub None poza zakresem.
+    """
+    pozycja = (liczba - 1) * q
+    dolna = int(pozycja)
+    frakcja = pozycja - dolna
+    dol = wartosc_na_pozycji(dolna)
+    gora = wartosc_na_pozycji(dolna + 1) if frakcja else None
+    if dol is None:
+        return None
+    if gora is None:
+        gora = dol
+    # Zawsze float - typ pola w JSON nie zależy od tego, czy wypadła interpolacja
+    return round(float(dol + (gora - dol) * frakcja), 1)
+
+
+def percentyle_metryk(db: Session, warunki, kwantyle=KWANTYLE, archiwum: bool = False) -> dict:
+    """Percentyle TTF, TTO i czasu otwarcia dla podanych filtrów"""
+    return {
+        nazwa: percentyle(db, wyrazenie, warunki, kwantyle, archiwum)
+        for nazwa, wyrazenie in METRYKI_CZASOWE.items()
+    }
+
+
+def _rozbicie(db: Session, kolumna, warunki):
+    """Liczba rekrutacji w grupach tabeli agregatów"""
+    wiersze = (
+        db.query(kolumna, func.sum(RekrutacjaAgregat.liczba_rekrutacji))
+        .filter(*warunki)
+        .group_by(kolumna)
+        .order_by(kolumna)
+        .all()
+    )
+    return {klucz: liczba for klucz, liczba in wiersze}
+
+
+def statystyki_dashboardu(
+    db: Session,
+    data_od: Optional[date] = None,
+    data_do: Optional[date] = None,
+    departament: Optional[str] = None,
+    collar_type: Optional[str] = None,
+) -> dict:
+    """
+    Wylicza wszystkie KPI dashboardu.
+
+    Sumy i rozbicia czytane są z tabeli agregatów (koszt zależy od liczby grup),
+    mediany liczone są na tabeli rekrutacji.
+    """
+    A = RekrutacjaAgregat
+    warunki = filtry_dashboardu(data_od, data_do, departament, collar_type, model=A)
+
+    sumy = db.query(*SUMY_DASHBOARDU).filter(*warunki).one()
+
+    if not sumy.total:
+        return wynik_dashboardu(sumy)
+
+    # Mediany TTF i TTO (agregaty obejmują też archiwum, mediany czytają je tylko dla starszych zakresów)
+    warunki_rekrutacji = filtry_dashboardu(data_od, data_do, departament, collar_type)
+    archiwum = siega_archiwum(db, data_od)
+    median_ttf = percentyle(db, TTF_SQL, warunki_rekrutacji, (0.5,), archiwum)["p50"] if sumy.liczba_ttf else None
+    median_tto = percentyle(db, TTO_SQL, warunki_rekrutacji, (0.5,), archiwum)["p50"] if sumy.liczba_tto else None
+
+    # Statystyki po departamentach
+    departamenty_stats = {}
+    for dep, dep_total, dep_otwarte, dep_zamkniete, dep_zatrudnienie in (
+        db.query(
+            A.departament,
+            func.sum(A.liczba_rekrutacji),
+            func.sum(A.otwarte),
+            func.sum(A.zamkniete),
+            func.sum(A.z_zatrudnieniem),
+        )
+        .filter(*warunki)
+        .group_by(A.departament)
+        .order_by(A.departament)
+        .all()
+    ):
+        departamenty_stats[dep] = {
+            "total": dep_total,
+            "otwarte": dep_otwarte,
+            "zamkniete": dep_zamkniete,
+            "z_zatrudnieniem": dep_zatrudnienie
+        }
+
+    return wynik_dashboardu(
+        sumy,
+        median_ttf=median_ttf,
+        median_tto=median_tto,
+        departamenty=departamenty_stats,
+        przyczyny=_rozbicie(db, A.przyczyna_rekrutacji, warunki),
+        zrodla_rekrutacji=_rozbicie(db, A.typ_zatrudnienia, warunki + [A.typ_zatrudnienia != ""]),
+    )
+
+
+def wynik_dashboardu(
+    sumy,
+    median_ttf=None,
+    median_tto=None,
+    departamenty: Optional[dict] = None,
+    przyczyny: Optional[dict] = None,
+    zrodla_rekrutacji: Optional[dict] = None,
+) -> dict:
+    """
+    Składa odpowiedź dashboardu z sum liczników (atrybuty jak w zapytaniu
+    statystyki_dashboardu), median i rozbić - wspólne dla SQL i migawki kolumnowej.
+    """
+    total = sumy.total
+    if not total:
+        return {
+            "message": "Brak danych dla wybranych filtrów",
+            "total_rekrutacje": 0
+        }
+
+    # TTF i TTO
+    avg_ttf = round(sumy.suma_ttf / sumy.liczba_ttf, 1) if sumy.liczba_ttf else None
+    avg_tto = round(sumy.suma_tto / sumy.liczba_tto, 1) if sumy.liczba_tto else None
+    avg_czas_otwarcia = (
+        round(sumy.suma_czas_otwarcia / sumy.liczba_czas_otwarcia, 1) if sumy.liczba_czas_otwarcia else None
+    )
+
+    # Wskaźniki konwersji
+    total_spotkan = sumy.total_spotkan
+    total_ofert = sumy.total_ofert
+    total_zatrudnionych = sumy.total_zatrudnionych
+    offer_acceptance_rate = round((total_zatrudnionych / total_ofert * 100), 2) if total_ofert > 0 else 0
+    cv_to_interview_rate = round((total_spotkan / sumy.total_cv * 100), 2) if sumy.total_cv > 0 else 0
+    interview_to_offer_rate = round((total_ofert / total_spotkan * 100), 2) if total_spotkan > 0 else 0
+
+    zamkniete = sumy.zamkniete
+    success_rate = round((sumy.z_zatrudnieniem / zamkniete * 100), 2) if zamkniete > 0 else 0
+    wskaznik_rotacji = round((sumy.replacement / total * 100), 2)
+    avg_spotkan_na_zatrudnienie = round(
+        (total_spotkan / total_zatrudnionych), 2
+    ) if total_zatrudnionych > 0 else 0
+
+    return {
+        # Podstawowe metryki
+        "total_rekrutacje": total,
+        "otwarte": sumy.otwarte,
+        "zamkniete": zamkniete,
+        "z_zatrudnieniem": sumy.z_zatrudnieniem,
+
+        # Time metrics
+        "avg_ttf": avg_ttf,
+        "median_ttf": median_ttf,
+        "avg_tto": avg_tto,
+        "median_tto": median_tto,
+        "avg_czas_otwarcia": avg_czas_otwarcia,
+
+        # Wskaźniki konwersji
+        "total_cv_otrzymane": sumy.total_cv,
+        "total_cv_odrzucone": sumy.total_cv_odrzucone,
+        "total_spotkan": total_spotkan,
+        "total_ofert_zlozonych": total_ofert,
+        "total_zatrudnionych": total_zatrudnionych,
+        "total_ofert_odrzuconych_przez_kandydata": sumy.total_ofert_odrzuconych,
+
+        "offer_acceptance_rate": offer_acceptance_rate,
+        "cv_to_interview_rate": cv_to_interview_rate,
+        "interview_to_offer_rate": interview_to_offer_rate,
+        "success_rate": success_rate,
+        "wskaznik_rotacji": wskaznik_rotacji,
+        "avg_spotkan_na_zatrudnienie": avg_spotkan_na_zatrudnienie,
+
+        # Rozbicie na kategorie
+        "white_collar": sumy.white_collar,
+        "blue_collar": sumy.blue_collar,
+        "managers": sumy.managers,
+        "non_managers": total - sumy.managers,
+
+        # Statystyki szczegółowe
+        "departamenty": departamenty or {},
+        "przyczyny": przyczyny or {},
+        "zrodla_rekrutacji": zrodla_rekrutacji or {},
+    }
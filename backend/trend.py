@@ -0,0 +1,161 @@
+# Szeregi czasowe KPI (tydzień / miesiąc / kwartał) liczone jednym zapytaniem GROUP BY
+from typing import Optional
+
+from sqlalchemy import String, func, literal_column, select, union_all
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
+
+from backend.archive import siega_archiwum, ze_wszystkich
+from backend.database import Rekrutacja, RekrutacjaAgregat
+from backend.stats import filtry_dashboardu
+
+
+class tydzien_daty(FunctionElement):
+    """Poniedziałek tygodnia, w którym wypada data (YYYY-MM-DD)"""
+    type = String()
+    inherit_cache = True
+    name = "tydzien_daty"
+
+
+class miesiac_daty(FunctionElement):
+    """Miesiąc daty (YYYY-MM)"""
+    type = String()
+    inherit_cache = True
+    name = "miesiac_daty"
+
+
+class kwartal_daty(FunctionElement):
+    """Kwartał daty (YYYY-Qn)"""
+    type = String()
+    inherit_cache = True
+    name = "kwartal_daty"
+
+
+def _argument(element, compiler, **kw):
+    (data,) = list(element.clauses)
+    return compiler.process(data, **kw)
+
+
+@compiles(tydzien_daty)
+def _tydzien_default(element, compiler, **kw):
+    return "to_char(date_trunc('week', %s), 'YYYY-MM-DD')" % _argument(element, compiler, **kw)
+
+
+@compiles(tydzien_daty, "sqlite")
+def _tydzien_sqlite(element, compiler, **kw):
+    data = _argument(element, compiler, **kw)
+    # %w: 0 = niedziela, więc (dzień + 6) % 7 to liczba dni od poniedziałku
+    return f"date({data}, '-' || ((CAST(strftime('%w', {data}) AS INTEGER) + 6) % 7) || ' days')"
+
+
+@compiles(miesiac_daty)
+def _miesiac_default(element, compiler, **kw):
+    return "to_char(%s, 'YYYY-MM')" % _argument(element, compiler, **kw)
+
+
+@compiles(miesiac_daty, "sqlite")
+def _miesiac_sqlite(element, compiler, **kw):
+    return f"strftime('%Y-%m', {_argument(element, compiler, **kw)})"
+
+
+@compiles(kwartal_daty)
+def _kwartal_default(element, compiler, **kw):
+    return "to_char(%s, 'YYYY-\"Q\"Q')" % _argument(element, compiler, **kw)
+
+
+@compiles(kwartal_daty, "sqlite")
+def _kwartal_sqlite(element, compiler, **kw):
+    data = _argument(element, compiler, **kw)
+    return f"strftime('%Y', {data}) || '-Q' || ((CAST(strftime('%m', {data}) AS INTEGER) + 2) / 3)"
+
+
+GRANULACJE = {
+    "week": tydzien_daty,
+    "month": miesiac_daty,
+    "quarter": kwartal_daty,
+}
+
+# Liczniki z tabeli agregatów sumowane w okresach daty otwarcia
+LICZNIKI_OTWARC = (
+    "liczba_rekrutacji", "otwarte", "zamkniete", "z_zatrudnieniem",
+    "liczba_cv_otrzymana", "liczba_spotkan", "liczba_zlozonych_ofert", "liczba_zatrudnionych",
+    "suma_ttf", "liczba_ttf", "suma_tto", "liczba_tto",
+)
+
+
+def _procent(licznik, mianownik):
+    return round(licznik / mianownik * 100, 2) if mianownik else 0
+
+
+def _srednia(suma, liczba):
+    return round(suma / liczba, 1) if liczba else None
+
+
+def trend_kpi(
+    db: Session,
+    granulacja: str = "month",
+    data_od: Optional[str] = None,
+    data_do: Optional[str] = None,
+    departament: Optional[str] = None,
+    collar_type: Optional[str] = None,
+) -> dict:
+    """
+    KPI w kolejnych okresach: rekrutacje i metryki wg daty otwarcia,
+    zatrudnienia wg daty zatrudnienia.
+
+    Obie części są złączone UNION ALL i zgrupowane jednym GROUP BY po okresie,
+    część otwarć czyta tabelę agregatów (wiersz na dzień i grupę), część
+    zatrudnień - rekrutacje razem z archiwum (zakres dotyczy daty zatrudnienia).
+    """
+    okres = GRANULACJE[granulacja]
+    A = RekrutacjaAgregat
+    zero = literal_column("0")
+
+    otwarcia = select(
+        okres(A.data_otwarcia).label("okres"),
+        *[getattr(A, licznik).label(licznik) for licznik in LICZNIKI_OTWARC],
+        zero.label("zatrudnienia"),
+        zero.label("zatrudnieni_wg_daty"),
+    ).where(*filtry_dashboardu(data_od, data_do, departament, collar_type, model=A))
+
+    warunki_zatrudnien = [Rekrutacja.data_zatrudnienia.isnot(None)]
+    if data_od:
+        warunki_zatrudnien.append(Rekrutacja.data_zatrudnienia >= data_od)
+    if data_do:
+        warunki_zatrudnien.append(Rekrutacja.data_zatrudnienia <= data_do)
+    warunki_zatrudnien += filtry_dashboardu(departament=departament, collar_type=collar_type)
+    zatrudnienia = select(
+        okres(Rekrutacja.data_zatrudnienia),
+        *[zero for _ in LICZNIKI_OTWARC],
+        literal_column("1"),
+        func.coalesce(Rekrutacja.liczba_zatrudnionych, 0),
+    ).where(*warunki_zatrudnien)
+    if siega_archiwum(db):
+        zatrudnienia = ze_wszystkich(zatrudnienia)
+
+    zrodlo = union_all(otwarcia, zatrudnienia).subquery()
+    kolumny = list(LICZNIKI_OTWARC) + ["zatrudnienia", "zatrudnieni_wg_daty"]
+    wiersze = db.execute(
+        select(zrodlo.c.okres, *[func.sum(zrodlo.c[k]).label(k) for k in kolumny])
+        .group_by(zrodlo.c.okres)
+        .order_by(zrodlo.c.okres)
+    ).all()
+
+    okresy = []
+    for w in wiersze:
+        okresy.append({
+            "okres": w.okres,
+            "total_rekrutacje": w.liczba_rekrutacji,
+            "otwarte": w.otwarte,
+            "zamkniete": w.zamkniete,
+            "z_zatrudnieniem": w.z_zatrudnieniem,
+            "avg_ttf": _srednia(w.suma_ttf, w.liczba_ttf),
+            "avg_tto": _srednia(w.suma_tto, w.liczba_tto),
+            "offer_acceptance_rate": _procent(w.liczba_zatrudnionych, w.liczba_zlozonych_ofert),
+            "cv_to_interview_rate": _procent(w.liczba_spotkan, w.liczba_cv_otrzymana),
+            "interview_to_offer_rate": _procent(w.liczba_zlozonych_ofert, w.liczba_spotkan),
+            "zatrudnienia": w.zatrudnienia,
+            "liczba_zatrudnionych": w.zatrudnieni_wg_daty,
+        })
+    return {"granularity": granulacja, "okresy": okresy}
@@ -0,0 +1,84 @@
+# Wspólna obsługa zapisów rekrutacji: wszystko, co musi się zmienić razem z tabelą rekrutacje
+from types import SimpleNamespace
+
+from sqlalchemy.orm import Session
+
+from backend.cache import podbij_wersje
+from backend.changes import wpis_dodania, wpis_usuniecia, wpis_zmiany, zapisz_wpisy
+from backend.columnar import migawka_kolumnowa
+from backend.database import Rekrutacja
+from backend.rollup import DeltaAgregatow
+from backend.search import indeks_wyszukiwania, pola_tekstowe
+
+
+def kopia(rekrutacja) -> SimpleNamespace:
+    """Stan rekrutacji przed zmianą (wartości wszystkich kolumn)"""
+    return SimpleNamespace(**{
+        kolumna.key: getattr(rekrutacja, kolumna.key) for kolumna in Rekrutacja.__table__.columns
+    })
+
+
+class TransakcjaZapisu:
+    """
+    Zbiera zmiany rekrutacji z jednej transakcji i przy zatwierdzeniu
+    aktualizuje struktury pochodne: tabelę agregatów, indeks wyszukiwania,
+    wersję danych (cache odpowiedzi), dziennik zmian i migawkę kolumnową.
+
+    Przyjmuje obiekty Rekrutacja lub dowolne obiekty z tymi samymi
+    atrybutami; dodane i zmienione muszą mieć już nadane id.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.delta = DeltaAgregatow()
+        self.zmiany = {}  # id -> wiersz migawki kolumnowej, None dla usuniętych
+        self.teksty = {}  # id -> pola tekstowe do indeksu wyszukiwania, None dla usuniętych
+        self.dziennik = []  # wpisy dziennika zmian w kolejności operacji
+
+    def dodana(self, rekrutacja):
+        self.delta.dodaj(rekrutacja)
+        self.dziennik.append(wpis_dodania(rekrutacja))
+        self.teksty[rekrutacja.id] = pola_tekstowe(rekrutacja)
+        self._do_migawki(rekrutacja)
+
+    def zmieniona(self, stara, nowa):
+        """stara: stan sprzed zmiany (np. z kopia()), nowa: stan po zmianie"""
+        self.delta.odejmij(stara)
+        self.delta.dodaj(nowa)
+        wpis = wpis_zmiany(stara, nowa)
+        if wpis is not None:
+            self.dziennik.append(wpis)
+        if pola_tekstowe(stara) != pola_tekstowe(nowa):
+            self.teksty[nowa.id] = pola_tekstowe(nowa)
+        self._do_migawki(nowa)
+
+    def usunieta(self, rekrutacja):
+        self.delta.odejmij(rekrutacja)
+        self.dziennik.append(wpis_usuniecia(rekrutacja))
+        self.teksty[rekrutacja.id] = None
+        self.zmiany[rekrutacja.id] = None
+
+    def _do_migawki(self, rekrutacja):
+        self.zmiany[rekrutacja.id] = (
+            migawka_kolumnowa.wiersz(rekrutacja) if migawka_kolumnowa is not None else None
+        )
+
+    def zatwierdz(self):
+        """Commit razem z agregatami i nową wersją danych; zwraca wersję (None bez zmian)"""
+        wersja = None
+        if self.teksty:
+            indeks_wyszukiwania(self.db).aktualizuj(self.db, self.teksty)
+        if self.zmiany:
+            self.delta.zastosuj(self.db)
+            wersja = podbij_wersje(self.db)
+        if self.dziennik:
+            # Po podbiciu wersji - blokada jej wiersza ustala kolejność numerów seq
+            zapisz_wpisy(self.db, self.dziennik, wersja)
+        self.db.commit()
+        if wersja is not None and migawka_kolumnowa is not None:
+            migawka_kolumnowa.zastosuj(self.zmiany, wersja)
+        self.zmiany = {}
+        self.teksty = {}
+        self.dziennik = []
+        self.delta = DeltaAgregatow()
+        return wersja
@@ -0,0 +1,315 @@
+# Benchmark API w procesie (FastAPI TestClient) na syntetycznej bazie danych
+#
+# Przykłady:
+#   python benchmarks/bench.py --rozmiar 100000 --json wynik.json
+#   python benchmarks/bench.py --rozmiar 100000 --porownaj wynik.json --prog 0.2
+#
+# Baza generowana jest raz dla danego rozmiaru i ziarna w katalogu --katalog
+# (domyślnie katalog tymczasowy) i ponownie używana przy kolejnych uruchomieniach;
+# pomiary idą na jej kopii, bo import i CRUD zmieniają dane.
+# Każdy scenariusz mierzony jest --powtorzenia razy (czas), a potem jeszcze raz
+# pod tracemalloc (szczyt pamięci alokowanej przez Pythona).
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+KATALOG_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, KATALOG_REPO)
+
+from generator import generuj_rekrutacje, jako_json  # noqa: E402
+
+ROZMIARY = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+PARTIA_ZAPISU = 10_000
+
+# Dopuszczalny wzrost mediany czasu / szczytu pamięci względem wyniku porównywanego
+PROG_CZASU = 0.25
+PROG_PAMIECI = 0.5
+# Pomiary krótsze niż tyle ms są zbyt zaszumione, żeby zgłaszać regresję
+MIN_CZAS_MS = 2.0
+
+
+def przygotuj_baze(rozmiar: int, ziarno: int, katalog: str) -> str:
+    """Tworzy (lub używa istniejącej) bazy SQLite z podaną liczbą rekrutacji; zwraca ścieżkę"""
+    sciezka = os.path.join(katalog, f"bench_{rozmiar}_{ziarno}.db")
+    if os.path.exists(sciezka):
+        return sciezka
+
+    from sqlalchemy import insert, text
+    from sqlalchemy.orm import Session
+    from backend.database import Base, Rekrutacja, utworz_engine
+    from backend.rollup import przebuduj_agregaty
+
+    print(f"Generowanie bazy {rozmiar} rekrutacji: {sciezka}", file=sys.stderr)
+    start = time.perf_counter()
+    tymczasowa = sciezka + ".tmp"
+    engine = utworz_engine(f"sqlite:///{tymczasowa}")
+    Base.metadata.create_all(engine)
+    partia = []
+    with engine.begin() as polaczenie:
+        for rekrutacja in generuj_rekrutacje(rozmiar, ziarno):
+            partia.append(rekrutacja)
+            if len(partia) >= PARTIA_ZAPISU:
+                polaczenie.execute(insert(Rekrutacja.__table__), partia)
+                partia = []
+        if partia:
+            polaczenie.execute(insert(Rekrutacja.__table__), partia)
+    with Session(engine) as db:
+        przebuduj_agregaty(db)
+        db.commit()
+        db.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+    engine.dispose()
+    os.replace(tymczasowa, sciezka)
+    print(f"Baza gotowa w {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    return sciezka
+
+
+def scenariusze(klient, rozmiar: int) -> dict:
+    """
+    Nazwa -> (pomiar, mnożnik liczby powtórzeń, przygotowanie). Przygotowanie
+    (np. wygenerowanie pliku importu) wykonuje się poza mierzonym czasem,
+    a jego wynik trafia jako argument do funkcji pomiaru.
+    """
+    from backend.cache import cache_odpowiedzi
+
+    def get(sciezka, **parametry):
+        def wykonaj(_):
+            odpowiedz = klient.get(sciezka, params=parametry)
+            assert odpowiedz.status_code == 200, (sciezka, odpowiedz.status_code, odpowiedz.text[:200])
+            return len(odpowiedz.content)
+        return wykonaj
+
+    def bez_cache():
+        # Mierzymy liczenie odpowiedzi, nie odczyt z cache
+        cache_odpowiedzi.wyczysc()
+
+    def z_cache():
+        klient.get("/api/dashboard")
+
+    licznik = iter(range(1, 1_000_000))
+    rozmiar_importu = max(100, min(rozmiar // 10, 10_000))
+
+    def plik_importu():
+        rekrutacje = [jako_json(r) for r in generuj_rekrutacje(rozmiar_importu, next(licznik), prefiks="IMP")]
+        return json.dumps({"rekrutacje": rekrutacje}, ensure_ascii=False).encode("utf-8")
+
+    def importuj(tresc):
+        odpowiedz = klient.post("/api/import", files={"file": ("dane.json", io.BytesIO(tresc), "application/json")})
+        assert odpowiedz.status_code == 200 and odpowiedz.json()["imported"] == rozmiar_importu, odpowiedz.text[:200]
+        return len(odpowiedz.content)
+
+    def rekrutacje(liczba, prefiks):
+        return lambda: [jako_json(r) for r in generuj_rekrutacje(liczba, next(licznik), prefiks=prefiks)]
+
+    def crud(nowe):
+        odpowiedz = klient.post("/api/rekrutacje", json=nowe[0])
+        assert odpowiedz.status_code == 201, odpowiedz.text[:200]
+        id = odpowiedz.json()["id"]
+        assert klient.get(f"/api/rekrutacje/{id}").status_code == 200
+        zmiana = {"komentarz": "benchmark", "liczba_cv_otrzymana": 10}
+        assert klient.put(f"/api/rekrutacje/{id}", json=zmiana).status_code == 200
+        assert klient.delete(f"/api/rekrutacje/{id}").status_code == 204
+        return 0
+
+    def batch(nowe):
+        utworzone = klient.post("/api/rekrutacje/batch", json={"rekrutacje": nowe}).json()
+        ids = [u["id"] for u in utworzone["utworzone"]]
+        zmiany = [{"id": id, "komentarz": "benchmark"} for id in ids]
+        assert klient.patch("/api/rekrutacje/batch", json={"rekrutacje": zmiany}).json()["updated"] == len(ids)
+        assert klient.request("DELETE", "/api/rekrutacje/batch", json={"ids": ids}).json()["deleted"] == len(ids)
+        return 0
+
+    return {
+        "dashboard": (get("/api/dashboard"), 1, bez_cache),
+        "dashboard_filtr": (get("/api/dashboard", departament="IT", data_od="2023-01-01"), 1, bez_cache),
+        "dashboard_cache": (get("/api/dashboard"), 1, z_cache),
+        "dashboard_percentyle": (get("/api/dashboard/percentyle"), 1, bez_cache),
+        "dashboard_trend": (get("/api/dashboard/trend", granularity="month"), 1, bez_cache),
+        "pivot": (
+            get("/api/pivot", wymiary="departament,stanowisko", miary="count,avg_ttf", rollup="true"), 1, bez_cache
+        ),
+        "statystyki": (get("/api/statystyki"), 1, bez_cache),
+        "filtry": (get("/api/filtry"), 1, bez_cache),
+        "lista": (get("/api/rekrutacje", limit=100), 1, None),
+        "lista_1000_sort": (get("/api/rekrutacje", limit=1000, sort="data_otwarcia", order="desc"), 1, None),
+        "lista_filtr": (get("/api/rekrutacje", departament="IT", status="otwarta", limit=100), 1, None),
+        "szukaj": (get("/api/rekrutacje/szukaj", q="kierownik zmiany"), 1, None),
+        "eksport_json": (get("/api/export", format="json"), 0.4, None),
+        "eksport_csv_gzip": (get("/api/export", format="csv", gzip="true"), 0.4, None),
+        "import": (importuj, 0.4, plik_importu),
+        "crud": (crud, 2, rekrutacje(1, "CRUD")),
+        "batch_100": (batch, 1, rekrutacje(100, "BATCH")),
+    }
+
+
+def _percentyl(posortowane, q):
+    pozycja = (len(posortowane) - 1) * q
+    dolna = int(pozycja)
+    gorna = min(dolna + 1, len(posortowane) - 1)
+    return posortowane[dolna] + (posortowane[gorna] - posortowane[dolna]) * (pozycja - dolna)
+
+
+def zmierz(funkcja, powtorzenia: int, pamiec: bool, przygotuj=None) -> dict:
+    przygotuj = przygotuj or (lambda: None)
+    funkcja(przygotuj())  # rozgrzewka: pierwsze połączenie, plany zapytań, strony bazy w cache
+    czasy = []
+    bajty = 0
+    for _ in range(powtorzenia):
+        argument = przygotuj()
+        start = time.perf_counter()
+        bajty = funkcja(argument)
+        czasy.append((time.perf_counter() - start) * 1000)
+    czasy.sort()
+    wynik = {
+        "powtorzenia": powtorzenia,
+        "min_ms": round(czasy[0], 3),
+        "mediana_ms": round(statistics.median(czasy), 3),
+        "p95_ms": round(_percentyl(czasy, 0.95), 3),
+        "max_ms": round(czasy[-1], 3),
+        "bajty_odpowiedzi": bajty,
+    }
+    if pamiec:
+        argument = przygotuj()
+        tracemalloc.start()
+        try:
+            funkcja(argument)
+            wynik["pamiec_szczyt_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        finally:
+            tracemalloc.stop()
+    return wynik
+
+
+def _commit_git():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=KATALOG_REPO, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def uruchom(rozmiar: int, ziarno: int, katalog: str, powtorzenia: int, wybrane=None, pamiec: bool = True) -> dict:
+    # Kopia robocza - import i CRUD zmieniają bazę, wzorzec zostaje nietknięty.
+    # DATABASE_URL musi być ustawiony przed pierwszym importem modułów backendu.
+    robocza = os.path.join(katalog, f"bench_{rozmiar}_{ziarno}_run.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{robocza}"
+    wzorzec = przygotuj_baze(rozmiar, ziarno, katalog)
+    for rozszerzenie in ("", "-wal", "-shm"):
+        if os.path.exists(robocza + rozszerzenie):
+            os.remove(robocza + rozszerzenie)
+    zrodlo = sqlite3.connect(wzorzec)
+    cel = sqlite3.connect(robocza)
+    zrodlo.backup(cel)
+    zrodlo.close()
+    cel.close()
+
+    os.chdir(KATALOG_REPO)  # aplikacja serwuje frontend/ ze ścieżki względnej
+    start = time.perf_counter()
+    from fastapi.testclient import TestClient
+    from backend.main import app
+    start_aplikacji = time.perf_counter() - start
+
+    wyniki = {}
+    with TestClient(app) as klient:
+        for nazwa, (funkcja, mnoznik, przygotuj) in scenariusze(klient, rozmiar).items():
+            if wybrane and nazwa not in wybrane:
+                continue
+            wyniki[nazwa] = zmierz(funkcja, max(1, round(powtorzenia * mnoznik)), pamiec, przygotuj)
+            print(f"  {nazwa:<24} mediana {wyniki[nazwa]['mediana_ms']:>10.2f} ms", file=sys.stderr)
+
+    return {
+        "meta": {
+            "rozmiar": rozmiar,
+            "ziarno": ziarno,
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "commit": _commit_git(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platforma": platform.platform(),
+            "start_aplikacji_s": round(start_aplikacji, 3),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "zmienne": {k: v for k, v in os.environ.items() if k in ("ANALITYKA_KOLUMNOWA", "CACHE_TTL")},
+        },
+        "wyniki": wyniki,
+    }
+
+
+def porownaj(stary: dict, nowy: dict, prog_czasu: float = PROG_CZASU, prog_pamieci: float = PROG_PAMIECI) -> list:
+    """Lista regresji: scenariusze, w których mediana czasu lub szczyt pamięci wzrosły ponad próg"""
+    regresje = []
+    print(f"\n{'scenariusz':<24} {'przed ms':>10} {'po ms':>10} {'zmiana':>8} {'pamięć':>8}")
+    for nazwa, po in nowy["wyniki"].items():
+        przed = stary["wyniki"].get(nazwa)
+        if przed is None:
+            continue
+        zmiana = po["mediana_ms"] / przed["mediana_ms"] - 1 if przed["mediana_ms"] else 0
+        zmiana_pamieci = None
+        if przed.get("pamiec_szczyt_kb") and po.get("pamiec_szczyt_kb"):
+            zmiana_pamieci = po["pamiec_szczyt_kb"] / przed["pamiec_szczyt_kb"] - 1
+        znacznik = ""
+        if zmiana > prog_czasu and po["mediana_ms"] >= MIN_CZAS_MS:
+            regresje.append(f"{nazwa}: czas +{zmiana:.0%}")
+            znacznik = "  <- regresja"
+        if zmiana_pamieci is not None and zmiana_pamieci > prog_pamieci:
+            regresje.append(f"{nazwa}: pamięć +{zmiana_pamieci:.0%}")
+            znacznik = "  <- regresja"
+        pamiec = f"{zmiana_pamieci:+.0%}" if zmiana_pamieci is not None else "-"
+        print(
+            f"{nazwa:<24} {przed['mediana_ms']:>10.2f} {po['mediana_ms']:>10.2f} "
+            f"{zmiana:>+8.0%} {pamiec:>8}{znacznik}"
+        )
+    if stary["meta"].get("rozmiar") != nowy["meta"].get("rozmiar"):
+        print("Uwaga: porównywane wyniki dotyczą różnych rozmiarów bazy")
+    return regresje
+
+
+def _rozmiar(tekst: str) -> int:
+    return ROZMIARY.get(tekst.lower()) or int(tekst)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API rekrutacji na syntetycznych danych")
+    parser.add_argument("--rozmiar", type=_rozmiar, default=ROZMIARY["10k"], help="Liczba rekrutacji lub 10k/100k/1m")
+    parser.add_argument("--ziarno", type=int, default=1, help="Ziarno generatora danych")
+    parser.add_argument("--katalog", default=os.path.join(tempfile.gettempdir(), "rekrutacje_bench"),
+                        help="Katalog na wygenerowane bazy (ponownie używane)")
+    parser.add_argument("--powtorzenia", type=int, default=10, help="Liczba pomiarów na scenariusz")
+    parser.add_argument("--scenariusze", help="Tylko wybrane scenariusze (rozdzielone przecinkami)")
+    parser.add_argument("--bez-pamieci", action="store_true", help="Bez pomiaru pamięci (tracemalloc)")
+    parser.add_argument("--json", help="Zapisz wynik do pliku JSON")
+    parser.add_argument("--porownaj", help="Plik JSON z poprzednim wynikiem do porównania")
+    parser.add_argument("--prog", type=float, default=PROG_CZASU,
+                        help="Dopuszczalny wzrost mediany czasu (0.25 = 25%%)")
+    parser.add_argument("--prog-pamieci", type=float, default=PROG_PAMIECI, help="Dopuszczalny wzrost szczytu pamięci")
+    args = parser.parse_args()
+
+    os.makedirs(args.katalog, exist_ok=True)
+    wybrane = set(args.scenariusze.split(",")) if args.scenariusze else None
+    print(f"Benchmark: {args.rozmiar} rekrutacji", file=sys.stderr)
+    wynik = uruchom(args.rozmiar, args.ziarno, args.katalog, args.powtorzenia, wybrane, not args.bez_pamieci)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as plik:
+            json.dump(wynik, plik, ensure_ascii=False, indent=2)
+
+    if args.porownaj:
+        with open(args.porownaj, encoding="utf-8") as plik:
+            regresje = porownaj(json.load(plik), wynik, args.prog, args.prog_pamieci)
+        if regresje:
+            print("\nRegresje:\n  " + "\n  ".join(regresje))
+            sys.exit(1)
+        print("\nBrak regresji")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# Generator syntetycznych rekrutacji o realistycznych rozkładach (do benchmarków i testów importu)
+#
+# Przykład - plik do POST /api/import:
+#   python benchmarks/generator.py 100000 --plik rekrutacje_100k.json
+import argparse
+import json
+import math
+import random
+from datetime import date, timedelta
+from typing import Iterator
+
+# departament: (waga, działy, stanowiska (nazwa, collar, czy_manager, waga))
+DEPARTAMENTY = {
+    "Produkcja": (35, ["Montaż", "Lakiernia", "Utrzymanie ruchu", "Jakość"], [
+        ("Operator maszyn", "Blue", False, 40), ("Monter", "Blue", False, 30),
+        ("Mechanik utrzymania ruchu", "Blue", False, 10), ("Kontroler jakości", "Blue", False, 10),
+        ("Brygadzista", "Blue", True, 6), ("Kierownik zmiany", "White", True, 4),
+    ]),
+    "Logistyka": (20, ["Magazyn", "Transport", "Planowanie"], [
+        ("Magazynier", "Blue", False, 45), ("Operator wózka widłowego", "Blue", False, 30),
+        ("Kierowca", "Blue", False, 10), ("Planista logistyki", "White", False, 10),
+        ("Kierownik magazynu", "White", True, 5),
+    ]),
+    "IT": (12, ["Rozwój oprogramowania", "Infrastruktura", "Wsparcie"], [
+        ("Programista Python", "White", False, 30), ("Programista Java", "White", False, 20),
+        ("Administrator systemów", "White", False, 15), ("Specjalista helpdesk", "White", False, 20),
+        ("Analityk danych", "White", False, 10), ("Kierownik zespołu IT", "White", True, 5),
+    ]),
+    "Sprzedaż": (12, ["Sprzedaż krajowa", "Eksport", "Obsługa klienta"], [
+        ("Przedstawiciel handlowy", "White", False, 45), ("Specjalista obsługi klienta", "White", False, 35),
+        ("Key Account Manager", "White", False, 12), ("Dyrektor sprzedaży", "White", True, 3),
+        ("Kierownik regionu", "White", True, 5),
+    ]),
+    "Finanse": (8, ["Księgowość", "Kontroling", "Płace"], [
+        ("Księgowa", "White", False, 45), ("Kontroler finansowy", "White", False, 25),
+        ("Specjalista ds. płac", "White", False, 20), ("Główna księgowa", "White", True, 10),
+    ]),
+    "HR": (5, ["Rekrutacja", "Kadry", "Rozwój"], [
+        ("Rekruter", "White", False, 40), ("Specjalista ds. kadr", "White", False, 35),
+        ("HR Business Partner", "White", False, 15), ("Kierownik HR", "White", True, 10),
+    ]),
+    "Marketing": (8, ["Komunikacja", "Digital", "Produkt"], [
+        ("Specjalista ds. marketingu", "White", False, 45), ("Grafik", "White", False, 25),
+        ("Product Manager", "White", False, 20), ("Kierownik marketingu", "White", True, 10),
+    ]),
+}
+
+MIEJSCA_PRACY = [("Kraków", 40), ("Warszawa", 25), ("Wrocław", 15), ("Katowice", 12)]
+PRZYCZYNY = [("Replacement", 55), ("New Position", 35), ("Rozwój", 10)]
+TYPY_ZATRUDNIENIA = [("Zewnętrzne", 60), ("Wewnętrzne", 20), ("Agencja", 15), ("POL", 5)]
+IMIONA = ["Anna", "Piotr", "Katarzyna", "Tomasz", "Magdalena", "Paweł", "Agnieszka", "Michał", "Joanna", "Łukasz"]
+NAZWISKA = ["Nowak", "Kowalski", "Wiśniewski", "Wójcik", "Kowalczyk", "Kamiński", "Lewandowski", "Zieliński",
+            "Szymański", "Woźniak", "Dąbrowski", "Kozłowski"]
+KOMENTARZE = [
+    "Kandydat zrezygnował po drugim etapie",
+    "Oferta odrzucona z powodu wynagrodzenia",
+    "Pilna rekrutacja - projekt startuje w przyszłym miesiącu",
+    "Wymagana znajomość języka niemieckiego",
+    "Rekrutacja wstrzymana na czas zmian budżetu",
+    "Kandydat z polecenia pracownika",
+    "Trudny rynek, mało kandydatów z doświadczeniem",
+    "Potrzebne uprawnienia UDT",
+    "Praca zmianowa, trzy zmiany",
+    "Zatrudnienie przez agencję pracy tymczasowej",
+]
+
+
+def _wybierz(los: random.Random, opcje):
+    return los.choices([o[0] for o in opcje], weights=[o[-1] for o in opcje])[0]
+
+
+def _dwumianowy(los: random.Random, n: int, p: float) -> int:
+    """Liczba sukcesów w n próbach; dla dużych n przybliżenie normalne"""
+    if n < 25:
+        return sum(1 for _ in range(n) if los.random() < p)
+    return min(n, max(0, round(los.gauss(n * p, math.sqrt(n * p * (1 - p))))))
+
+
+def _osoba(los: random.Random) -> str:
+    return f"{los.choice(IMIONA)} {los.choice(NAZWISKA)}"
+
+
+def generuj_rekrutacje(
+    liczba: int,
+    ziarno: int = 1,
+    data_od: date = date(2022, 1, 1),
+    data_do: date = date(2025, 6, 30),
+    prefiks: str = "SYN",
+) -> Iterator[dict]:
+    """
+    Rekrutacje w formacie RekrutacjaCreate (daty jako date), powtarzalne dla tego samego ziarna.
+
+    Departamenty, stanowiska i lokalizacje losowane z wagami, więcej otwarć wiosną
+    i jesienią, czas do zamknięcia i liczby CV z rozkładów log-normalnych, lejek
+    CV → spotkania → oferty → zatrudnienia zawężany dwumianowo. Świeże rekrutacje
+    częściej są jeszcze otwarte.
+    """
+    los = random.Random(ziarno)
+    dni = (data_do - data_od).days
+    departamenty = list(DEPARTAMENTY.items())
+    wagi_departamentow = [d[1][0] for d in departamenty]
+    menedzerowie = {nazwa: [_osoba(los) for _ in range(6)] for nazwa in DEPARTAMENTY}
+
+    for i in range(liczba):
+        departament, (_, dzialy, stanowiska) = los.choices(departamenty, weights=wagi_departamentow)[0]
+        stanowisko, collar, manager, _ = los.choices(stanowiska, weights=[s[3] for s in stanowiska])[0]
+
+        # Sezonowość: szczyty w marcu-kwietniu i wrześniu-październiku
+        while True:
+            otwarcie = data_od + timedelta(days=los.randrange(dni + 1))
+            sezon = 1 + 0.4 * math.cos((otwarcie.month - 3.5) * math.pi / 3)
+            if los.random() * 1.4 < sezon:
+                break
+
+        cv = int(los.lognormvariate(3.0 if collar == "White" else 2.5, 0.7))
+        odrzucone = _dwumianowy(los, cv, 0.55)
+        spotkania = _dwumianowy(los, cv - odrzucone, 0.5)
+        spotkania_hm = _dwumianowy(los, spotkania, 0.4)
+        oferty = _dwumianowy(los, spotkania_hm or min(spotkania, 1), 0.6)
+
+        # Mediana ok. 36 dni, co dziesiąta rekrutacja wstrzymana lub trudna (ok. 5 miesięcy)
+        czas = max(1, int(los.lognormvariate(5.0 if los.random() < 0.1 else 3.6, 0.5)))
+        zamkniecie = otwarcie + timedelta(days=czas)
+        zatrudnieni = odrzucone_oferty = 0
+        zatrudnienie = typ = None
+        if zamkniecie > data_do:
+            zamkniecie = None
+            oferty = 0
+        else:
+            if oferty:
+                zatrudnieni = min(oferty, 1 + (los.random() < 0.1))
+                if los.random() < 0.15:
+                    zatrudnieni = 0
+                odrzucone_oferty = oferty - zatrudnieni
+            if zatrudnieni:
+                zatrudnienie = zamkniecie + timedelta(days=los.choice([0, 0, 7, 14, 30, 30, 60, 90]))
+                typ = _wybierz(los, TYPY_ZATRUDNIENIA)
+
+        przyczyna = _wybierz(los, PRZYCZYNY)
+        yield {
+            "przyczyna_rekrutacji": przyczyna,
+            "replacement_za_kogo": _osoba(los) if przyczyna == "Replacement" else None,
+            "collar_type": collar,
+            "czy_manager": manager,
+            "id_referencyjne": f"{prefiks}-{ziarno}-{i:07d}",
+            "departament": departament,
+            "dzial": los.choice(dzialy),
+            "stanowisko": stanowisko,
+            "miejsce_pracy": "Zdalnie" if collar == "White" and los.random() < 0.1 else _wybierz(los, MIEJSCA_PRACY),
+            "hiring_manager": los.choice(menedzerowie[departament]),
+            "data_otwarcia": otwarcie,
+            "liczba_cv_otrzymana": cv,
+            "liczba_cv_odrzucone_rekruter": odrzucone,
+            "liczba_spotkan_rekruter": spotkania,
+            "liczba_spotkan_hiring_manager": spotkania_hm,
+            "data_zamkniecia": zamkniecie,
+            "data_zatrudnienia": zatrudnienie,
+            "typ_zatrudnienia": typ,
+            "liczba_zatrudnionych": zatrudnieni,
+            "liczba_odrzuconych_ofert_przez_kandydata": odrzucone_oferty,
+            "liczba_zlozonych_ofert": oferty,
+            "komentarz": los.choice(KOMENTARZE) if los.random() < 0.35 else None,
+            "plec": los.choice(["M", "K"]),
+        }
+
+
+def jako_json(rekrutacja: dict) -> dict:
+    return {k: v.isoformat() if isinstance(v, date) else v for k, v in rekrutacja.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generator syntetycznych rekrutacji")
+    parser.add_argument("liczba", type=int, help="Liczba rekrutacji")
+    parser.add_argument("--plik", required=True, help="Plik wynikowy {\"rekrutacje\": [...]}")
+    parser.add_argument("--ziarno", type=int, default=1)
+    args = parser.parse_args()
+
+    with open(args.plik, "w", encoding="utf-8") as plik:
+        plik.write('{"rekrutacje": [\n')
+        for i, rekrutacja in enumerate(generuj_rekrutacje(args.liczba, args.ziarno)):
+            if i:
+                plik.write(",\n")
+            plik.write(json.dumps(jako_json(rekrutacja), ensure_ascii=False))
+        plik.write("\n]}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# Test obciążeniowy: stała liczba równoległych klientów, percentyle czasów odpowiedzi per ścieżka
+#
+# Przykład (serwer uruchomiony osobno):
+#   python benchmarks/loadtest.py --url http://localhost:8000 --klienci 64 --czas 30
+#
+# Porównanie wersji: uruchom ten sam test na starej i nowej wersji serwera
+# i zestaw p99 z obu wyników (--json zapisuje wynik do pliku).
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+# Mieszanka żądań: odpytywanie dashboardu z różnymi filtrami + strony i pliki statyczne
+SCIEZKI = [
+    ("/api/dashboard", 4),
+    ("/api/dashboard?departament={departament}", 4),
+    ("/api/dashboard/percentyle?collar_type={collar}", 2),
+    ("/api/rekrutacje?limit=100&sort=data_otwarcia&order=desc", 2),
+    ("/api/statystyki", 1),
+    ("/", 2),
+    ("/static/style.css", 2),
+]
+
+DEPARTAMENTY = ["IT", "HR", "Finanse", "Logistyka", "Produkcja"]
+COLLARY = ["White", "Blue"]
+
+
+def percentyl(posortowane, q):
+    if not posortowane:
+        return None
+    pozycja = (len(posortowane) - 1) * q
+    dolna = int(pozycja)
+    gorna = min(dolna + 1, len(posortowane) - 1)
+    return posortowane[dolna] + (posortowane[gorna] - posortowane[dolna]) * (pozycja - dolna)
+
+
+def klient(adres, koniec, wyniki, bledy, lock, ziarno):
+    losowanie = random.Random(ziarno)
+    sciezki = [s for s, waga in SCIEZKI for _ in range(waga)]
+    polaczenie = http.client.HTTPConnection(adres.hostname, adres.port or 80, timeout=60)
+    lokalne = defaultdict(list)
+    lokalne_bledy = defaultdict(int)
+    while time.perf_counter() < koniec:
+        wzor = losowanie.choice(sciezki)
+        sciezka = wzor.format(departament=losowanie.choice(DEPARTAMENTY), collar=losowanie.choice(COLLARY))
+        start = time.perf_counter()
+        try:
+            polaczenie.request("GET", sciezka)
+            odpowiedz = polaczenie.getresponse()
+            odpowiedz.read()
+            if odpowiedz.status >= 400:
+                lokalne_bledy[wzor] += 1
+                continue
+        except (OSError, http.client.HTTPException):
+            lokalne_bledy[wzor] += 1
+            polaczenie.close()
+            polaczenie = http.client.HTTPConnection(adres.hostname, adres.port or 80, timeout=60)
+            continue
+        lokalne[wzor].append((time.perf_counter() - start) * 1000)
+    polaczenie.close()
+    with lock:
+        for wzor, czasy in lokalne.items():
+            wyniki[wzor].extend(czasy)
+        for wzor, liczba in lokalne_bledy.items():
+            bledy[wzor] += liczba
+
+
+def uruchom(url: str, klienci: int, czas: float) -> dict:
+    adres = urlsplit(url)
+    wyniki = defaultdict(list)
+    bledy = defaultdict(int)
+    lock = threading.Lock()
+    koniec = time.perf_counter() + czas
+    watki = [
+        threading.Thread(target=klient, args=(adres, koniec, wyniki, bledy, lock, i))
+        for i in range(klienci)
+    ]
+    for watek in watki:
+        watek.start()
+    for watek in watki:
+        watek.join()
+
+    podsumowanie = {"klienci": klienci, "czas_s": czas, "sciezki": {}}
+    wszystkie = []
+    for wzor, _ in SCIEZKI:
+        czasy = sorted(wyniki.get(wzor, []))
+        wszystkie.extend(czasy)
+        podsumowanie["sciezki"][wzor] = {
+            "zadania": len(czasy),
+            "bledy": bledy.get(wzor, 0),
+            "p50_ms": percentyl(czasy, 0.5),
+            "p95_ms": percentyl(czasy, 0.95),
+            "p99_ms": percentyl(czasy, 0.99),
+        }
+    wszystkie.sort()
+    podsumowanie["razem"] = {
+        "zadania": len(wszystkie),
+        "rps": round(len(wszystkie) / czas, 1),
+        "p50_ms": percentyl(wszystkie, 0.5),
+        "p99_ms": percentyl(wszystkie, 0.99),
+    }
+    return podsumowanie
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test obciążeniowy API rekrutacji")
+    parser.add_argument("--url", default="http://localhost:8000", help="Adres serwera")
+    parser.add_argument("--klienci", type=int, default=64, help="Liczba równoległych klientów")
+    parser.add_argument("--czas", type=float, default=30, help="Czas trwania testu (s)")
+    parser.add_argument("--json", help="Zapisz wynik do pliku JSON")
+    args = parser.parse_args()
+
+    wynik = uruchom(args.url, args.klienci, args.czas)
+
+    print(f"{'ścieżka':<58} {'żądania':>8} {'błędy':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for wzor, s in wynik["sciezki"].items():
+        if not s["zadania"]:
+            print(f"{wzor:<58} {0:>8} {s['bledy']:>6}")
+            continue
+        print(
+            f"{wzor:<58} {s['zadania']:>8} {s['bledy']:>6} "
+            f"{s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f}"
+        )
+    razem = wynik["razem"]
+    if razem["zadania"]:
+        print(f"\nRazem: {razem['zadania']} żądań, {razem['rps']} req/s, "
+              f"p50 {razem['p50_ms']:.1f} ms, p99 {razem['p99_ms']:.1f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as plik:
+            json.dump(wynik, plik, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
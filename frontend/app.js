@@ -7,6 +7,13 @@ document.addEventListener('DOMContentLoaded', () => {
     
     // Obsługa formularza
     document.getElementById('rekrutacjaForm').addEventListener('submit', handleFormSubmit);
+
+    // Wyszukiwanie po stronie serwera, z opóźnieniem po ostatnim znaku
+    let searchTimer = null;
+    document.getElementById('searchInput').addEventListener('input', () => {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => loadRekrutacje(), 300);
+    });
 });
 
 // Pobierz i wyświetl statystyki
@@ -23,20 +30,39 @@ async function loadStatystyki() {
     }
 }
 
-// Pobierz i wyświetl listę rekrutacji
-async function loadRekrutacje() {
+// Kursor kolejnej strony listy (X-Next-Cursor) albo offset kolejnej strony wyników wyszukiwania (X-Next-Offset)
+let nextCursor = null;
+
+// Pobierz i wyświetl listę rekrutacji (append = dołącz kolejną stronę)
+async function loadRekrutacje(append = false) {
     try {
-        const response = await fetch(`${API_BASE}/rekrutacje`);
+        const query = document.getElementById('searchInput').value.trim();
+        let response;
+        if (query) {
+            const params = new URLSearchParams({ q: query, limit: 100 });
+            if (append && nextCursor) {
+                params.set('offset', nextCursor);
+            }
+            response = await fetch(`${API_BASE}/rekrutacje/szukaj?${params.toString()}`);
+        } else {
+            const params = new URLSearchParams({ sort: 'data_otwarcia', order: 'desc', limit: 100 });
+            if (append && nextCursor) {
+                params.set('cursor', nextCursor);
+            }
+            response = await fetch(`${API_BASE}/rekrutacje?${params.toString()}`);
+        }
         const rekrutacje = await response.json();
+        nextCursor = response.headers.get(query ? 'X-Next-Offset' : 'X-Next-Cursor');
+        document.getElementById('loadMoreBtn').style.display = nextCursor ? 'inline-block' : 'none';
         
         const tbody = document.getElementById('rekrutacjeTableBody');
         
-        if (rekrutacje.length === 0) {
+        if (!append && rekrutacje.length === 0) {
             tbody.innerHTML = '<tr><td colspan="9" class="text-center">Brak rekrutacji</td></tr>';
             return;
         }
         
-        tbody.innerHTML = rekrutacje.map(r => {
+        const rows = rekrutacje.map(r => {
             const daysOpen = calculateDaysOpen(r.data_otwarcia, r.data_zamkniecia);
             const daysOpenClass = daysOpen > 60 ? 'days-warning' : daysOpen > 45 ? 'days-alert' : 'days-ok';
             
@@ -63,6 +89,12 @@ async function loadRekrutacje() {
             `;
         }).join('');
         
+        if (append) {
+            tbody.insertAdjacentHTML('beforeend', rows);
+        } else {
+            tbody.innerHTML = rows;
+        }
+        
         loadStatystyki();
     } catch (error) {
         console.error('Błąd ładowania rekrutacji:', error);
@@ -382,25 +414,36 @@ function closeDetailsModal() {
 // Eksport danych do JSON
 async function exportData() {
     try {
-        const response = await fetch(`${API_BASE}/export`);
-        const blob = await response.blob();
-        const url = window.URL.createObjectURL(blob);
+        // Bezpośredni link - przeglądarka zapisuje strumień na dysk bez buforowania w pamięci
         const a = document.createElement('a');
         a.style.display = 'none';
-        a.href = url;
+        a.href = `${API_BASE}/export?format=json`;
         a.download = `rekrutacje_export_${new Date().toISOString().slice(0,10)}.json`;
         document.body.appendChild(a);
         a.click();
-        window.URL.revokeObjectURL(url);
         document.body.removeChild(a);
-        alert('Dane zostały wyeksportowane!');
     } catch (error) {
         console.error('Błąd eksportu:', error);
         alert('Nie udało się wyeksportować danych');
     }
 }
 
-// Import danych z JSON
+// Czeka na zakończenie zadania w tle, odpytując jego stan
+async function czekajNaZadanie(id) {
+    while (true) {
+        const response = await fetch(`${API_BASE}/jobs/${id}`);
+        const zadanie = await response.json();
+        if (!response.ok) {
+            throw new Error(zadanie.detail);
+        }
+        if (zadanie.status === 'zakonczone' || zadanie.status === 'blad') {
+            return zadanie;
+        }
+        await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+}
+
+// Import danych z JSON (zadanie w tle - duży plik nie blokuje żądania)
 async function importData(event) {
     const file = event.target.files[0];
     if (!file) return;
@@ -414,25 +457,34 @@ async function importData(event) {
         const formData = new FormData();
         formData.append('file', file);
         
-        const response = await fetch(`${API_BASE}/import`, {
+        const response = await fetch(`${API_BASE}/jobs/import`, {
             method: 'POST',
             body: formData
         });
         
-        const result = await response.json();
-        
-        if (response.ok) {
+        const zlecone = await response.json();
+        if (!response.ok) {
+            alert(`Błąd importu: ${zlecone.detail}`);
+            return;
+        }
+
+        const zadanie = await czekajNaZadanie(zlecone.id);
+        if (zadanie.status === 'zakonczone') {
+            const result = zadanie.wynik;
             let message = `Import zakończony!\n\n`;
             message += `Zaimportowano: ${result.imported}\n`;
             message += `Pominięto (duplikaty): ${result.skipped}\n`;
             if (result.errors.length > 0) {
-                message += `\nBłędy:\n${result.errors.join('\n')}`;
+                message += `\nBłędy (${result.liczba_bledow}):\n${result.errors.slice(0, 10).join('\n')}`;
+                if (result.liczba_bledow > 10) {
+                    message += `\n...`;
+                }
             }
             alert(message);
-            loadRekrutacje();
         } else {
-            alert(`Błąd importu: ${result.detail}`);
+            alert(`Błąd importu: ${zadanie.blad}`);
         }
+        loadRekrutacje();
     } catch (error) {
         console.error('Błąd importu:', error);
         alert('Nie udało się zaimportować danych');
@@ -81,6 +81,9 @@ async function loadDashboardData() {
         updateCharts(data);
         updateDetailedStats(data);
         updateDepartamentyTable(data);
+
+        const trendResponse = await fetch(`${API_BASE}/dashboard/trend?granularity=month&${params.toString()}`);
+        updateTrendChart(await trendResponse.json());
     } catch (error) {
         console.error('Błąd ładowania danych:', error);
         alert('Nie udało się załadować danych dashboardu');
@@ -342,6 +345,65 @@ function updateFunnelChart(data) {
     });
 }
 
+// Wykres trendu miesięcznego
+function updateTrendChart(trend) {
+    const ctx = document.getElementById('trendChart');
+    
+    if (charts.trend) {
+        charts.trend.destroy();
+    }
+    
+    const labels = trend.okresy.map(o => o.okres);
+    
+    charts.trend = new Chart(ctx, {
+        type: 'line',
+        data: {
+            labels: labels,
+            datasets: [
+                {
+                    label: 'Rekrutacje otwarte w okresie',
+                    data: trend.okresy.map(o => o.total_rekrutacje),
+                    borderColor: 'rgba(52, 152, 219, 1)',
+                    backgroundColor: 'rgba(52, 152, 219, 0.2)',
+                    yAxisID: 'y'
+                },
+                {
+                    label: 'Zatrudnienia',
+                    data: trend.okresy.map(o => o.zatrudnienia),
+                    borderColor: 'rgba(46, 204, 113, 1)',
+                    backgroundColor: 'rgba(46, 204, 113, 0.2)',
+                    yAxisID: 'y'
+                },
+                {
+                    label: 'Średni TTF (dni)',
+                    data: trend.okresy.map(o => o.avg_ttf),
+                    borderColor: 'rgba(231, 76, 60, 1)',
+                    backgroundColor: 'rgba(231, 76, 60, 0.2)',
+                    borderDash: [5, 5],
+                    yAxisID: 'y1'
+                }
+            ]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: true,
+            scales: {
+                y: {
+                    beginAtZero: true,
+                    position: 'left'
+                },
+                y1: {
+                    beginAtZero: true,
+                    position: 'right',
+                    grid: {
+                        drawOnChartArea: false
+                    }
+                }
+            }
+        }
+    });
+}
+
 // Aktualizuj szczegółowe statystyki
 function updateDetailedStats(data) {
     document.getElementById('statCV').textContent = data.total_cv_otrzymane;
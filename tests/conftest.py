@@ -0,0 +1,94 @@
+# Testy API na bazie z TEST_DATABASE_URL (np. PostgreSQL, wymaga psycopg2 i asyncpg)
+# albo domyślnie na tymczasowym pliku SQLite. Tabele bazy testowej są usuwane na starcie,
+# więc TEST_DATABASE_URL nie może wskazywać bazy z danymi.
+#
+# Każdy test tworzy rekrutacje we własnym departamencie i filtruje po nim, więc testy
+# nie zależą od siebie i od kolejności.
+import os
+import tempfile
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+_KATALOG = tempfile.mkdtemp(prefix="rekrutacja_testy_")
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or f"sqlite:///{_KATALOG}/testy.db"
+os.environ["KATALOG_ZADAN"] = os.path.join(_KATALOG, "zadania")
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+from backend.database import Base, RekrutacjaAgregat, SessionLocal, engine  # noqa: E402
+from backend.main import app  # noqa: E402
+from backend.rollup import przebuduj_agregaty  # noqa: E402
+
+DZIEN = date(2024, 3, 1)
+
+
+@pytest.fixture(scope="session")
+def klient():
+    Base.metadata.drop_all(bind=engine)
+    with TestClient(app) as klient:
+        yield klient
+
+
+@pytest.fixture
+def departament() -> str:
+    return f"Test {uuid.uuid4().hex[:8]}"
+
+
+@pytest.fixture
+def rekrutacja(departament):
+    """Dane nowej rekrutacji w departamencie testu; dni_* to przesunięcia dat względem otwarcia"""
+    def dane(dni_zamkniecia=None, dni_zatrudnienia=None, **pola) -> dict:
+        otwarcie = pola.pop("data_otwarcia", DZIEN)
+        wynik = {
+            "przyczyna_rekrutacji": "New Position",
+            "collar_type": "White",
+            "czy_manager": False,
+            "id_referencyjne": f"T-{uuid.uuid4().hex}",
+            "departament": departament,
+            "dzial": "Dział testowy",
+            "stanowisko": "Specjalista",
+            "miejsce_pracy": "Warszawa",
+            "hiring_manager": "Anna Nowak",
+            "data_otwarcia": otwarcie.isoformat(),
+            "liczba_cv_otrzymana": 10,
+            "liczba_spotkan_rekruter": 4,
+        }
+        if dni_zamkniecia is not None:
+            wynik["data_zamkniecia"] = (otwarcie + timedelta(days=dni_zamkniecia)).isoformat()
+        if dni_zatrudnienia is not None:
+            wynik["data_zatrudnienia"] = (otwarcie + timedelta(days=dni_zatrudnienia)).isoformat()
+        wynik.update(pola)
+        return wynik
+    return dane
+
+
+@pytest.fixture
+def utworz(klient, rekrutacja):
+    """Tworzy rekrutację przez API i zwraca odpowiedź"""
+    def wykonaj(**pola) -> dict:
+        odpowiedz = klient.post("/api/rekrutacje", json=rekrutacja(**pola))
+        assert odpowiedz.status_code == 201, odpowiedz.text
+        return odpowiedz.json()
+    return wykonaj
+
+
+def _stan_agregatow(db) -> list:
+    kolumny = [kolumna for kolumna in RekrutacjaAgregat.__table__.c if kolumna.name != "id"]
+    return sorted(tuple(wiersz) for wiersz in db.execute(select(*kolumny)))
+
+
+@pytest.fixture
+def sprawdz_agregaty():
+    """Porównuje tabelę agregatów utrzymywaną przyrostowo z jej przebudową od zera"""
+    def sprawdz():
+        with SessionLocal() as db:
+            przyrostowo = _stan_agregatow(db)
+            przebuduj_agregaty(db)
+            od_zera = _stan_agregatow(db)
+            db.rollback()
+        assert przyrostowo == od_zera
+    return sprawdz
@@ -0,0 +1,81 @@
+import json
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from backend.archive import archiwizuj
+from backend.database import Rekrutacja, SessionLocal, engine
+
+
+def test_agregaty_po_zapisach_rowne_przebudowie(klient, utworz, rekrutacja, departament, sprawdz_agregaty):
+    rekrutacje = [utworz(), utworz(dni_zamkniecia=20, liczba_zlozonych_ofert=1), utworz(typ_zatrudnienia="B2B")]
+    sprawdz_agregaty()
+
+    # Zmiana klucza grupy (departament, data otwarcia) i liczników
+    klient.put(f"/api/rekrutacje/{rekrutacje[0]['id']}", json={
+        "departament": f"{departament} inny", "data_otwarcia": "2024-02-01", "data_zamkniecia": "2024-02-20",
+    })
+    klient.patch("/api/rekrutacje/batch", json={"rekrutacje": [
+        {"id": rekrutacje[1]["id"], "data_zatrudnienia": "2024-03-15", "liczba_zatrudnionych": 1},
+        {"id_referencyjne": rekrutacje[2]["id_referencyjne"], "collar_type": "Blue"},
+    ]})
+    sprawdz_agregaty()
+
+    klient.post("/api/rekrutacje/batch", json={"rekrutacje": [rekrutacja(), rekrutacja(dni_zamkniecia=3)]})
+    plik = json.dumps({"rekrutacje": [rekrutacja(), rekrutacja(czy_manager=True)]})
+    klient.post("/api/import", files={"file": ("rekrutacje.json", plik, "application/json")})
+    sprawdz_agregaty()
+
+    assert klient.delete(f"/api/rekrutacje/{rekrutacje[1]['id']}").status_code == 204
+    klient.request("DELETE", "/api/rekrutacje/batch", json={"ids": [rekrutacje[2]["id"]]})
+    sprawdz_agregaty()
+
+
+def test_archiwum_nie_zmienia_odpowiedzi(klient, utworz, departament, sprawdz_agregaty):
+    for dni in (10, 40, 70):
+        utworz(data_otwarcia=date(2015, 1, 1), dni_zamkniecia=dni, dni_zatrudnienia=dni - 5, hiring_manager="Ewa Archiwalna")
+    biezaca = utworz(hiring_manager="Ewa Archiwalna")
+    zapytania = [
+        ("/api/rekrutacje", {"departament": departament, "sort": "data_otwarcia"}),
+        ("/api/rekrutacje/szukaj", {"q": "archiwalna", "departament": departament}),
+        ("/api/dashboard", {"departament": departament}),
+        ("/api/dashboard/percentyle", {"departament": departament}),
+        ("/api/pivot", {"wymiary": "status", "miary": "count,avg_ttf", "departament": departament}),
+    ]
+    przed = [klient.get(url, params=parametry).json() for url, parametry in zapytania]
+
+    with SessionLocal() as db:
+        assert archiwizuj(db, date(2016, 1, 1)) >= 3
+    assert [klient.get(url, params=parametry).json() for url, parametry in zapytania] == przed
+    sprawdz_agregaty()
+
+    # Zmiana i usunięcie rekrutacji z archiwum
+    archiwalne = [r for r in przed[0] if r["id"] != biezaca["id"]]
+    zmieniona = klient.put(f"/api/rekrutacje/{archiwalne[0]['id']}", json={"komentarz": "przywrócona"})
+    assert zmieniona.status_code == 200
+    assert klient.delete(f"/api/rekrutacje/{archiwalne[1]['id']}").status_code == 204
+    assert len(klient.get("/api/rekrutacje", params={"departament": departament}).json()) == 3
+    sprawdz_agregaty()
+
+
+@pytest.mark.skipif(engine.dialect.name != "sqlite", reason="w PostgreSQL zmianę wstrzymuje blokada partii")
+def test_archiwizacja_pomija_ponownie_otwarta(klient, utworz, departament, sprawdz_agregaty):
+    ponownie_otwarta = utworz(data_otwarcia=date(2015, 1, 1), dni_zamkniecia=10)
+    utworz()
+
+    def otworz_po_wyborze_partii(stan):
+        # Zmiana przez API między odczytem pierwszej partii a przeniesieniem jej do archiwum
+        if stan.is_select and "data_zamkniecia" in str(stan.statement):
+            event.remove(stan.session, "do_orm_execute", otworz_po_wyborze_partii)
+            partia = stan.invoke_statement().freeze()
+            klient.put(f"/api/rekrutacje/{ponownie_otwarta['id']}", json={"data_zamkniecia": None})
+            return partia()
+
+    with SessionLocal() as db:
+        event.listen(db, "do_orm_execute", otworz_po_wyborze_partii)
+        archiwizuj(db, date(2016, 1, 1))
+        assert db.get(Rekrutacja, ponownie_otwarta["id"]).data_zamkniecia is None
+    otwarte = klient.get("/api/rekrutacje", params={"departament": departament, "status": "otwarta"}).json()
+    assert ponownie_otwarta["id"] in [r["id"] for r in otwarte]
+    sprawdz_agregaty()
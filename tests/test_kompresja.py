@@ -0,0 +1,40 @@
+import gzip
+import json
+
+from backend.main import bez_kompresji
+
+GZIP = {"accept-encoding": "gzip"}
+
+
+def test_plik_frontendu_skompresowany_raz(klient):
+    with open("frontend/app.js", "rb") as plik:
+        tresc = plik.read()
+    odpowiedz = klient.get("/static/app.js", headers=GZIP)
+    assert odpowiedz.headers.get_list("content-encoding") == ["gzip"]
+    # httpx dekoduje gzip raz - podwójna kompresja dałaby tu bajty gzip zamiast pliku
+    assert odpowiedz.content == tresc
+
+
+def test_eksport_gzip_bez_content_encoding(klient, utworz, departament):
+    ids = sorted(utworz()["id_referencyjne"] for _ in range(3))
+    odpowiedz = klient.get("/api/export", params={"departament": departament, "gzip": "true"}, headers=GZIP)
+    assert "content-encoding" not in odpowiedz.headers
+    assert sorted(r["id_referencyjne"] for r in json.loads(gzip.decompress(odpowiedz.content))["rekrutacje"]) == ids
+
+    # Bez gzip=true odpowiedź kompresuje middleware
+    odpowiedz = klient.get("/api/export", params={"departament": departament}, headers=GZIP)
+    assert odpowiedz.headers["content-encoding"] == "gzip"
+    assert sorted(r["id_referencyjne"] for r in odpowiedz.json()["rekrutacje"]) == ids
+
+
+def test_bez_kompresji():
+    for sciezka, zapytanie in (
+        ("/api/changes/stream", b"since=0"),
+        ("/static/app.js", b""),
+        ("/", b""),
+        ("/api/export", b"format=csv&gzip=1"),
+        ("/api/jobs/12/wynik", b""),
+    ):
+        assert bez_kompresji({"path": sciezka, "query_string": zapytanie}), sciezka
+    for sciezka, zapytanie in (("/api/export", b"gzip=false"), ("/api/rekrutacje", b""), ("/api/jobs/12", b"")):
+        assert not bez_kompresji({"path": sciezka, "query_string": zapytanie}), sciezka
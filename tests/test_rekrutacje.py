@@ -0,0 +1,98 @@
+import json
+
+from backend.pagination import koduj_kursor
+
+
+def test_tworzenie_odczyt_zmiana_usuniecie(klient, utworz, departament):
+    utworzona = utworz(liczba_zlozonych_ofert=2)
+    assert utworzona["status"] == "otwarta"
+    assert utworzona["ttf"] is None
+
+    odczytana = klient.get(f"/api/rekrutacje/{utworzona['id']}").json()
+    assert odczytana["id_referencyjne"] == utworzona["id_referencyjne"]
+
+    zmieniona = klient.put(
+        f"/api/rekrutacje/{utworzona['id']}",
+        json={"data_zamkniecia": "2024-03-31", "data_zatrudnienia": "2024-03-21", "liczba_zatrudnionych": 1},
+    )
+    assert zmieniona.status_code == 200, zmieniona.text
+    zmieniona = zmieniona.json()
+    assert zmieniona["status"] == "z_zatrudnieniem"
+    assert (zmieniona["ttf"], zmieniona["tto"], zmieniona["czas_otwarcia"]) == (20, 30, 30)
+    assert zmieniona["wskaznik_akceptacji_ofert"] == 50.0
+
+    lista = klient.get("/api/rekrutacje", params={"departament": departament}).json()
+    assert [r["id"] for r in lista] == [utworzona["id"]]
+
+    assert klient.delete(f"/api/rekrutacje/{utworzona['id']}").status_code == 204
+    assert klient.get(f"/api/rekrutacje/{utworzona['id']}").status_code == 404
+    assert klient.delete(f"/api/rekrutacje/{utworzona['id']}").status_code == 404
+
+
+def test_duplikat_id_referencyjnego(klient, utworz, rekrutacja):
+    istniejaca = utworz()
+    odpowiedz = klient.post("/api/rekrutacje", json=rekrutacja(id_referencyjne=istniejaca["id_referencyjne"]))
+    assert odpowiedz.status_code == 400
+
+
+def test_filtr_statusu(klient, utworz, departament):
+    otwarta = utworz()
+    zamknieta = utworz(dni_zamkniecia=10)
+    zatrudnienie = utworz(dni_zamkniecia=10, dni_zatrudnienia=5)
+    for status, oczekiwana in (("otwarta", otwarta), ("zamknieta", zamknieta), ("z_zatrudnieniem", zatrudnienie)):
+        lista = klient.get("/api/rekrutacje", params={"departament": departament, "status": status}).json()
+        assert [r["id"] for r in lista] == [oczekiwana["id"]]
+
+
+def test_wsadowe_tworzenie_z_bledem(klient, rekrutacja, departament):
+    bledna = rekrutacja()
+    del bledna["departament"]
+    wynik = klient.post("/api/rekrutacje/batch", json={"rekrutacje": [rekrutacja(), bledna, rekrutacja()]}).json()
+    assert wynik["created"] == 2
+    assert [blad["indeks"] for blad in wynik["errors"]] == [1]
+    assert len(klient.get("/api/rekrutacje", params={"departament": departament}).json()) == 2
+
+
+def test_import_pomija_duplikaty(klient, utworz, rekrutacja, departament):
+    istniejaca = utworz()
+    nowa = rekrutacja()
+    plik = json.dumps({"rekrutacje": [nowa, rekrutacja(id_referencyjne=istniejaca["id_referencyjne"]), nowa]})
+    wynik = klient.post("/api/import", files={"file": ("rekrutacje.json", plik, "application/json")}).json()
+    assert (wynik["imported"], wynik["skipped"]) == (1, 2)
+    assert len(klient.get("/api/rekrutacje", params={"departament": departament}).json()) == 2
+
+
+def test_wyszukiwanie_bez_polskich_znakow(klient, utworz, departament):
+    szukana = utworz(hiring_manager="Łukasz Żółtowski", stanowisko="Główny księgowy")
+    utworz(hiring_manager="Anna Nowak")
+    for q in ("Łukasz", "lukasz", "LUKASZ zoltowski", "glowny ksieg"):
+        wynik = klient.get("/api/rekrutacje/szukaj", params={"q": q, "departament": departament}).json()
+        assert [r["id"] for r in wynik] == [szukana["id"]], q
+
+    klient.put(f"/api/rekrutacje/{szukana['id']}", json={"hiring_manager": "Paweł Łoś"})
+    wynik = klient.get("/api/rekrutacje/szukaj", params={"q": "pawel los", "departament": departament}).json()
+    assert [r["id"] for r in wynik] == [szukana["id"]]
+
+
+def test_zmieniony_kursor(klient, utworz, departament):
+    for _ in range(2):
+        utworz()
+    parametry = {"departament": departament, "sort": "data_otwarcia", "limit": 1}
+    kursor = klient.get("/api/rekrutacje", params=parametry).headers["X-Next-Cursor"]
+    assert klient.get("/api/rekrutacje", params={**parametry, "cursor": kursor}).status_code == 200
+
+    for wartosc, id in (("notadate", 1), (5, 1), (None, 1), ("2024-13-01", 1), ("2024-03-01", "1")):
+        zmieniony = koduj_kursor("data_otwarcia", "asc", wartosc, id)
+        odpowiedz = klient.get("/api/rekrutacje", params={**parametry, "cursor": zmieniony})
+        assert odpowiedz.status_code == 400, (wartosc, id)
+    odpowiedz = klient.get("/api/rekrutacje", params={**parametry, "cursor": koduj_kursor("id", "asc", 1, 1)})
+    assert odpowiedz.json()["detail"] == "Kursor dotyczy innego sortowania"
+
+
+def test_eksport_csv(klient, utworz, departament):
+    utworz(hiring_manager="Łukasz Żółtowski")
+    odpowiedz = klient.get("/api/export", params={"format": "csv", "departament": departament})
+    assert odpowiedz.headers["content-type"] == "text/csv; charset=utf-8"
+    # BOM na początku pliku - Excel rozpoznaje wtedy UTF-8 i polskie znaki
+    assert odpowiedz.content.startswith(b"\xef\xbb\xbf")
+    assert "Łukasz Żółtowski" in odpowiedz.content.decode("utf-8-sig")
@@ -0,0 +1,98 @@
+from datetime import date
+
+import pytest
+
+from backend.archive import archiwizuj
+from backend.columnar import MigawkaKolumnowa, np
+from backend.database import SessionLocal
+from backend.stats import statystyki_dashboardu
+
+TTF = (10, 20, 30, 40, 50)
+
+
+@pytest.fixture
+def zatrudnienia(utworz):
+    """Pięć rekrutacji z zatrudnieniem po TTF dniach, zamkniętych 5 dni później, z ofertą"""
+    return [
+        utworz(dni_zatrudnienia=ttf, dni_zamkniecia=ttf + 5, liczba_zlozonych_ofert=2, liczba_zatrudnionych=1)
+        for ttf in TTF
+    ]
+
+
+def test_percentyle_z_interpolacja(klient, zatrudnienia, departament):
+    wynik = klient.get("/api/dashboard/percentyle", params={"departament": departament}).json()
+    assert wynik["ttf"] == {"p50": 30.0, "p75": 40.0, "p90": 46.0, "p95": 48.0}
+    assert wynik["tto"] == {"p50": 35.0, "p75": 45.0, "p90": 51.0, "p95": 53.0}
+    assert wynik["czas_otwarcia"] == wynik["tto"]
+    # Typ pola nie zależy od tego, czy wypadła interpolacja
+    assert all(isinstance(w, float) for metryka in wynik.values() for w in metryka.values())
+
+
+def test_percentyle_bez_danych(klient, utworz, departament):
+    utworz()
+    wynik = klient.get("/api/dashboard/percentyle", params={"departament": departament}).json()
+    assert wynik["ttf"] == {"p50": None, "p75": None, "p90": None, "p95": None}
+
+
+def test_mediana_parzystej_liczby(klient, utworz, departament):
+    for ttf in (10, 15):
+        utworz(dni_zatrudnienia=ttf, dni_zamkniecia=ttf)
+    wynik = klient.get("/api/dashboard", params={"departament": departament}).json()
+    assert wynik["median_ttf"] == 12.5
+
+
+def test_dashboard(klient, zatrudnienia, utworz, departament):
+    utworz()
+    wynik = klient.get("/api/dashboard", params={"departament": departament}).json()
+    assert (wynik["total_rekrutacje"], wynik["otwarte"], wynik["zamkniete"], wynik["z_zatrudnieniem"]) == (6, 1, 5, 5)
+    assert (wynik["avg_ttf"], wynik["median_ttf"], wynik["avg_tto"]) == (30.0, 30.0, 35.0)
+    assert isinstance(wynik["median_ttf"], float)
+    assert wynik["offer_acceptance_rate"] == 50.0
+    assert wynik["success_rate"] == 100.0
+
+    odfiltrowany = klient.get("/api/dashboard", params={"departament": departament, "data_od": "2030-01-01"}).json()
+    assert odfiltrowany["total_rekrutacje"] == 0
+
+
+def test_pivot(klient, zatrudnienia, utworz, departament):
+    utworz(collar_type="Blue")
+    wynik = klient.get("/api/pivot", params={
+        "wymiary": "collar_type", "miary": "count,avg_ttf,offer_acceptance_rate,success_rate",
+        "departament": departament, "rollup": True,
+    }).json()
+    wiersze = {(w["poziom"], w["collar_type"]): w for w in wynik["wiersze"]}
+    assert wiersze[(1, "White")]["count"] == 5
+    assert wiersze[(1, "White")]["avg_ttf"] == 30.0
+    assert wiersze[(1, "White")]["offer_acceptance_rate"] == 50.0
+    assert wiersze[(1, "Blue")]["avg_ttf"] is None
+    assert wiersze[(0, None)]["count"] == 6
+
+
+def test_trend(klient, zatrudnienia, departament):
+    wynik = klient.get("/api/dashboard/trend", params={"granularity": "month", "departament": departament}).json()
+    okresy = {okres["okres"]: okres for okres in wynik["okresy"]}
+    assert (okresy["2024-03"]["total_rekrutacje"], okresy["2024-03"]["avg_ttf"]) == (5, 30.0)
+    # Zatrudnienia według daty zatrudnienia: 11, 21 i 31 marca, 10 i 20 kwietnia
+    assert (okresy["2024-03"]["zatrudnienia"], okresy["2024-04"]["zatrudnienia"]) == (3, 2)
+
+
+def test_niepoprawna_data_filtra(klient, utworz, departament):
+    utworz(data_otwarcia=date(2015, 1, 1), dni_zamkniecia=10)
+    utworz()
+    with SessionLocal() as db:
+        assert archiwizuj(db, date(2016, 1, 1)) >= 1
+    for url in ("/api/dashboard", "/api/dashboard/percentyle"):
+        for data_od in ("2024", "abc", "2024-13-01"):
+            assert klient.get(url, params={"data_od": data_od}).status_code == 422, (url, data_od)
+        assert klient.get(url, params={"data_od": "2015-01-01", "departament": departament}).status_code == 200
+
+
+@pytest.mark.skipif(np is None, reason="migawka kolumnowa wymaga numpy")
+def test_migawka_kolumnowa_jak_sql(klient, zatrudnienia, utworz, departament):
+    utworz(collar_type="Blue")
+    migawka = MigawkaKolumnowa()
+    for filtry in ({}, {"data_od": date(2024, 3, 1), "data_do": date(2024, 3, 31)}, {"data_od": date(2030, 1, 1)}):
+        filtry["departament"] = departament
+        with SessionLocal() as db:
+            oczekiwane = statystyki_dashboardu(db, **filtry)
+        assert migawka.statystyki_aktualne(filtry) == oczekiwane, filtry
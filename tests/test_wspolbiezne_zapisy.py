@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+
+WATKI = 8
+
+
+def _rownolegle(*wywolania) -> list:
+    with ThreadPoolExecutor(max_workers=len(wywolania)) as pula:
+        return [przyszly.result() for przyszly in [pula.submit(wywolanie) for wywolanie in wywolania]]
+
+
+def test_rownolegle_zmiany_tej_samej_rekrutacji(klient, utworz, departament, sprawdz_agregaty):
+    for _ in range(3):
+        id = utworz(dni_zamkniecia=10)["id"]
+        odpowiedzi = _rownolegle(*[
+            lambda i=i: klient.put(f"/api/rekrutacje/{id}", json={"departament": f"{departament} {i % 2}"})
+            for i in range(WATKI)
+        ])
+        assert [odpowiedz.status_code for odpowiedz in odpowiedzi] == [200] * WATKI
+    sprawdz_agregaty()
+
+    # Dziennik zapisuje tylko faktyczne zmiany - liczone od stanu po poprzednim zapisie,
+    # więc kolejne wpisy tej rekrutacji mają różne departamenty
+    dziennik = klient.get("/api/changes", params={"since": 0, "limit": 10000}).json()
+    zmiany = [z["pola"]["departament"] for z in dziennik if z["id"] == id and z["operacja"] == "update"]
+    assert zmiany and all(poprzedni != nastepny for poprzedni, nastepny in zip(zmiany, zmiany[1:]))
+
+
+def test_rownolegle_usuwanie_tej_samej_rekrutacji(klient, utworz, sprawdz_agregaty):
+    for _ in range(3):
+        id = utworz(dni_zamkniecia=10, dni_zatrudnienia=5)["id"]
+        odpowiedzi = _rownolegle(*[lambda: klient.delete(f"/api/rekrutacje/{id}") for _ in range(WATKI)])
+        assert sorted(odpowiedz.status_code for odpowiedz in odpowiedzi) == [204] + [404] * (WATKI - 1)
+    sprawdz_agregaty()
+
+
+def test_rownolegle_operacje_wsadowe(klient, utworz, departament, sprawdz_agregaty):
+    ids = [utworz()["id"] for _ in range(4)]
+    odpowiedzi = _rownolegle(*[
+        lambda i=i: klient.patch("/api/rekrutacje/batch", json={"rekrutacje": [
+            {"id": id, "departament": f"{departament} {i % 2}", "liczba_zlozonych_ofert": i} for id in ids
+        ]})
+        for i in range(WATKI)
+    ])
+    assert all(odpowiedz.json()["updated"] == len(ids) for odpowiedz in odpowiedzi)
+    sprawdz_agregaty()
+
+    odpowiedzi = _rownolegle(*[
+        lambda: klient.request("DELETE", "/api/rekrutacje/batch", json={"ids": ids}) for _ in range(WATKI)
+    ])
+    assert sum(odpowiedz.json()["deleted"] for odpowiedz in odpowiedzi) == len(ids)
+    sprawdz_agregaty()